@@ -25,6 +25,7 @@ class FileRenameEditor:
         
         # 将控制器绑定到视图
         self.view.controller = self.controller
+        self.view.bind_stats(self.controller.stats)
     
     def preview_rename(self):
         """预览重命名"""
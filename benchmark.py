@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FileRenameEditor - 重命名流程性能基准
+
+生成合成目录（文件名长度不一，含中文文件名）和映射表，分别计时：
+目录扫描、编译映射、apply_mappings、正则替换、apply_delete_chars、apply_prefix_suffix、
+生成计划（完整扫描及基于实时索引的再次预览）、执行重命名和 .fre 保存/加载。
+
+用法:
+    python benchmark.py                                   # 默认 1k/100k 个文件，10/1000/100000 条规则
+    python benchmark.py --files 1k,100k,1m --rules 10,100k
+    python benchmark.py --output bench.json --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json    # 与基准比较，有性能退化时返回 1
+
+结果以 JSON 格式写入 --output 指定的文件。
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+# 退出码
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+
+# 默认规模
+DEFAULT_FILE_COUNTS = "1k,100k"
+DEFAULT_RULE_COUNTS = "10,1000,100k"
+
+# 默认重复次数（取最短时间），会修改文件的阶段只执行一次
+DEFAULT_REPEAT = 3
+
+# 比较基准时，耗时超过基准的倍数且绝对差值超过该秒数才视为退化
+DEFAULT_THRESHOLD = 1.25
+MIN_REGRESSION_SECONDS = 0.005
+
+ASCII_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789_- "
+CJK_CHARS = ("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工"
+             "也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物"
+             "第集季话卷章节版高清字幕中英双语完整")
+EXTENSIONS = [".mp4", ".mkv", ".jpg", ".txt", ".flac", ".pdf", ""]
+
+# 正则替换规则：包括可以组合的规则、引用自身分组的规则和带全局标志的规则
+REGEX_RULES = [
+    {"pattern": r"第(\d+)集", "replacement": r"E\1"},
+    {"pattern": r"_(\d+)(\.\w+)?$", "replacement": r"#\1\2"},
+    {"pattern": r"(?P<a>[a-z])(?P<b>\d)", "replacement": r"\g<b>\g<a>"},
+    {"pattern": r"[高清]+", "replacement": ""},
+    {"pattern": r"\s{2,}", "replacement": " "},
+    {"pattern": r"([a-z])\1+", "replacement": r"\1"},
+    {"pattern": r"(?i)MKV$", "replacement": "mkv"},
+    {"pattern": r"(?:字幕|双语)版?", "replacement": "SUB"},
+]
+
+# 模拟高延迟挂载：每次文件系统调用的延迟（秒）和执行的步骤数
+LATENCY = 0.001
+LATENCY_STEPS = 500
+
+
+def parse_count(text: str) -> int:
+    """解析 1k / 100k / 1m 形式的数量"""
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1000000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def format_count(count: int) -> str:
+    if count >= 1000000 and count % 1000000 == 0:
+        return f"{count // 1000000}m"
+    if count >= 1000 and count % 1000 == 0:
+        return f"{count // 1000}k"
+    return str(count)
+
+
+def random_name(rng: random.Random, cjk_ratio: float) -> str:
+    """生成一个长度 4~60 的随机文件名（不含扩展名）"""
+    chars = CJK_CHARS if rng.random() < cjk_ratio else ASCII_CHARS
+    length = int(rng.triangular(4, 60, 12))
+    return "".join(rng.choice(chars) for _ in range(length)).strip() or "x"
+
+
+def generate_names(count: int, seed: int, cjk_ratio: float) -> List[str]:
+    """生成互不相同的文件名"""
+    rng = random.Random(seed)
+    names = set()
+    result = []
+    while len(result) < count:
+        name = f"{random_name(rng, cjk_ratio)}_{len(result)}{rng.choice(EXTENSIONS)}"
+        if name not in names:
+            names.add(name)
+            result.append(name)
+    return result
+
+
+def generate_mappings(names: List[str], count: int, seed: int) -> Dict[str, str]:
+    """生成映射表：一半取自现有文件名的子串（会实际匹配），一半随机"""
+    rng = random.Random(seed)
+    mappings = {}
+    attempts = 0
+    while len(mappings) < count and attempts < count * 20:
+        attempts += 1
+        if rng.random() < 0.5 and names:
+            name = rng.choice(names)
+            length = rng.randint(2, 6)
+            if len(name) <= length:
+                continue
+            start = rng.randrange(len(name) - length)
+            key = name[start:start + length]
+        else:
+            chars = CJK_CHARS if rng.random() < 0.5 else ASCII_CHARS
+            key = "".join(rng.choice(chars) for _ in range(rng.randint(2, 6)))
+        if key.strip() and key not in mappings:
+            # 替换结果不含路径分隔符
+            mappings[key] = "".join(rng.choice(CJK_CHARS) for _ in range(rng.randint(1, 4)))
+    return mappings
+
+
+def create_files(path: str, names: List[str]):
+    """在目录中创建空文件"""
+    for name in names:
+        with open(os.path.join(path, name), "wb"):
+            pass
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """执行 repeat 次，返回最短耗时（秒）"""
+    best = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def log(message: str):
+    sys.stderr.write(message + "\n")
+    sys.stderr.flush()
+
+
+def run_case(path: str, names: List[str], mappings: Dict[str, str], repeat: int,
+             execute: bool) -> Dict[str, float]:
+    """对一个目录和映射表运行全部阶段，返回 {阶段: 秒数}"""
+    from controllers.rename_controller import RenameController
+    from core.journal import JournalState, RenameJournal
+    from core.mapping_engine import MappingMatcher
+    from core.regex_rules import RegexMatcher, normalize_regex_rules
+    from core.async_executor import LatencyFileSystem, async_step_executor
+    from core.rename_worker import execute_steps, iter_execute, iter_undo, run_steps
+    from models.config_manager import ConfigManager
+    from models.file_manager import FileManager
+    from utils.scanner import scan_directory
+
+    controller = RenameController(None, None)
+    rules = {"prefix": "[BK]", "suffix": "_v2", "delete_chars": "高清,_-",
+             "mappings": mappings, "settings": {}}
+    results = {}
+
+    results["scan"] = measure(lambda: scan_directory(path), repeat)
+
+    results["compile_mappings"] = measure(lambda: MappingMatcher(mappings), repeat)
+    matcher = controller.compile_mappings(mappings)
+
+    mapped = [controller.apply_mappings(name, matcher) for name in names]
+    results["apply_mappings"] = measure(
+        lambda: [controller.apply_mappings(name, matcher) for name in names], repeat)
+
+    # 不区分大小写：自动机由 casefold 后的查找内容构建，每个文件名只 casefold 一次
+    results["compile_mappings_casefold"] = measure(lambda: MappingMatcher(mappings, case_sensitive=False), repeat)
+    casefold_matcher = MappingMatcher(mappings, case_sensitive=False)
+    results["apply_mappings_casefold"] = measure(
+        lambda: [casefold_matcher.apply(name) for name in names], repeat)
+
+    regex_rules = normalize_regex_rules(REGEX_RULES)
+    results["compile_regex_rules"] = measure(lambda: RegexMatcher(regex_rules), repeat)
+    regex = controller.compile_regex_rules(REGEX_RULES)
+    results["apply_regex_rules"] = measure(lambda: [regex.apply(name) for name in mapped], repeat)
+    sequential_regex = controller.compile_regex_rules(REGEX_RULES, sequential=True)
+    results["apply_regex_rules_sequential"] = measure(
+        lambda: [sequential_regex.apply(name) for name in mapped], repeat)
+
+    deleted = [controller.apply_delete_chars(name, rules["delete_chars"]) for name in mapped]
+    results["apply_delete_chars"] = measure(
+        lambda: [controller.apply_delete_chars(name, rules["delete_chars"]) for name in mapped], repeat)
+    results["apply_prefix_suffix"] = measure(
+        lambda: [controller.apply_prefix_suffix(name, rules["prefix"], rules["suffix"]) for name in deleted],
+        repeat)
+
+    # 编译后的规则：空规则省略、删除模式预先拆分，整批文件名逐步 map
+    transform = controller.compile_rules(rules, matcher)
+    results["apply_rules_compiled"] = measure(lambda: transform.batch(names), repeat)
+
+    results["build_plan"] = measure(lambda: controller.build_plan(path, rules), repeat)
+
+    # 基于实时索引：第一次预览建立索引，之后目录和规则未变时的再次预览
+    file_manager = FileManager()
+    indexed = RenameController(None, file_manager)
+    start = time.perf_counter()
+    indexed.build_plan(path, rules)
+    results["build_plan_indexed_first"] = time.perf_counter() - start
+    results["build_plan_indexed_repeat"] = measure(lambda: indexed.build_plan(path, rules), repeat)
+
+    # 只改动一条映射后的再次预览（第一次改动包括建立文件名倒排索引）
+    for stage, key in (("build_plan_mapping_changed", "第集"), ("build_plan_mapping_changed_again", "字幕")):
+        rules = dict(rules, mappings=dict(rules["mappings"], **{key: "EP"}))
+        start = time.perf_counter()
+        indexed.build_plan(path, rules)
+        results[stage] = time.perf_counter() - start
+    file_manager.close_index()
+
+    config_manager = ConfigManager()
+    config = config_manager.create_config(path, rules["prefix"], rules["suffix"],
+                                          rules["delete_chars"], mappings, name="benchmark")
+    with tempfile.TemporaryDirectory() as config_dir:
+        config_path = os.path.join(config_dir, "benchmark.fre")
+        # 内容未变化时 save_config 不重写文件，每次保存前改动描述以计入实际写入
+        revisions = itertools.count()
+
+        def save_changed(file_path: str, compact: bool):
+            changed = dict(config, description=f"revision {next(revisions)}")
+            config_manager.save_config(changed, file_path, compact=compact)
+
+        results["fre_save"] = measure(lambda: save_changed(config_path, False), repeat)
+        results["fre_save_unchanged"] = measure(lambda: config_manager.save_config(config, config_path), repeat)
+        results["fre_load"] = measure(lambda: config_manager.load_config(config_path), repeat)
+        compact_path = os.path.join(config_dir, "benchmark_compact.fre")
+        results["fre_save_compact"] = measure(lambda: save_changed(compact_path, True), repeat)
+        results["fre_load_compact"] = measure(lambda: config_manager.load_config(compact_path), repeat)
+        results["fre_metadata_compact"] = measure(lambda: config_manager.load_config_metadata(compact_path), repeat)
+
+        if execute:
+            # 执行一次并计时，再借助日志撤销（不计时），使目录恢复原状供后续用例使用
+            plan = controller.build_plan(path, rules)
+            journal_path = os.path.join(config_dir, "benchmark.journal")
+            start = time.perf_counter()
+            for _ in iter_execute(plan, RenameJournal(journal_path)):
+                pass
+            results["execute"] = time.perf_counter() - start
+
+            state = JournalState.load(journal_path)
+            state.recover()
+            for _ in iter_undo(state, RenameJournal(journal_path)):
+                pass
+
+            # 高延迟挂载：每次文件系统调用前等待 LATENCY 秒，比较逐个执行与异步执行前 LATENCY_STEPS 个步骤
+            steps = plan.steps[:LATENCY_STEPS]
+            executors = {
+                "execute_latency": functools.partial(execute_steps, fs=LatencyFileSystem(LATENCY)),
+                "execute_latency_async": async_step_executor(fs=LatencyFileSystem(LATENCY)),
+            }
+            for stage, execute_with in executors.items():
+                journal = RenameJournal(journal_path)
+                journal.begin(path, steps)
+                start = time.perf_counter()
+                for _ in run_steps(path, enumerate(steps), set(), True, journal, execute=execute_with):
+                    pass
+                results[stage] = time.perf_counter() - start
+
+                state = JournalState.load(journal_path)
+                state.recover()
+                for _ in iter_undo(state, RenameJournal(journal_path)):
+                    pass
+
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """与基准比较，返回退化描述列表"""
+    regressions = []
+    for case, stages in results.get("cases", {}).items():
+        base_stages = baseline.get("cases", {}).get(case)
+        if not base_stages:
+            continue
+        for stage, seconds in stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            if seconds > base * threshold and seconds - base > MIN_REGRESSION_SECONDS:
+                regressions.append(f"{case} {stage}: {base:.4f}s -> {seconds:.4f}s "
+                                   f"({seconds / base if base else float('inf'):.2f}x)")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="FileRenameEditor 性能基准")
+    parser.add_argument("--files", default=DEFAULT_FILE_COUNTS,
+                        help=f"文件数量，逗号分隔（默认 {DEFAULT_FILE_COUNTS}）")
+    parser.add_argument("--rules", default=DEFAULT_RULE_COUNTS,
+                        help=f"映射规则数量，逗号分隔（默认 {DEFAULT_RULE_COUNTS}）")
+    parser.add_argument("--cjk-ratio", type=float, default=0.5, help="中文文件名比例（默认 0.5）")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个阶段的重复次数")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--no-execute", action="store_true", help="不计时执行重命名")
+    parser.add_argument("--work-dir", help="生成合成目录的位置（默认系统临时目录）")
+    parser.add_argument("--output", default="bench_output.json", help="结果 JSON 文件")
+    parser.add_argument("--baseline", help="与该基准 JSON 文件比较")
+    parser.add_argument("--save-baseline", help="同时把结果保存为基准文件")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"判定退化的耗时倍数（默认 {DEFAULT_THRESHOLD}）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    file_counts = [parse_count(text) for text in args.files.split(",") if text.strip()]
+    rule_counts = [parse_count(text) for text in args.rules.split(",") if text.strip()]
+
+    results = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cjk_ratio": args.cjk_ratio,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "cases": {},
+    }
+
+    for file_count in file_counts:
+        work_dir = tempfile.mkdtemp(prefix="fre-bench-", dir=args.work_dir)
+        try:
+            log(f"生成 {file_count} 个文件...")
+            names = generate_names(file_count, args.seed, args.cjk_ratio)
+            create_files(work_dir, names)
+
+            for rule_count in rule_counts:
+                case = f"files={format_count(file_count)},rules={format_count(rule_count)}"
+                log(f"运行 {case} ...")
+                mappings = generate_mappings(names, rule_count, args.seed + rule_count)
+                stages = run_case(work_dir, names, mappings, args.repeat, not args.no_execute)
+                results["cases"][case] = {stage: round(seconds, 6) for stage, seconds in stages.items()}
+                for stage, seconds in stages.items():
+                    print(f"{case:<28} {stage:<34} {seconds:>10.4f}s")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        log(f"结果已写入 {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能退化（阈值 {args.threshold}x）:")
+            for line in regressions:
+                print(f"  {line}")
+            return EXIT_REGRESSION
+        print(f"\n与基准相比没有性能退化（阈值 {args.threshold}x）")
+
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FileRenameEditor - 命令行批处理入口
+加载 .fre 配置，生成重命名计划并执行，不依赖 tkinter
+
+用法:
+    python -m cli config.fre [目录 ...] [--dry-run | --resume | --undo]
+
+多个目录按所在设备分组并发处理，每个设备同时处理的目录数有上限。
+每个文件的处理结果以 JSON Lines 格式逐行输出到标准输出，最后输出按目录和
+设备汇总的报告、各阶段的耗时统计和一行汇总。
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+# 退出码
+EXIT_OK = 0            # 全部完成
+EXIT_PARTIAL = 1       # 有文件重命名失败或因目标已存在而跳过
+EXIT_USAGE = 2         # 参数或配置错误
+EXIT_PATH_ERROR = 3    # 有目录无法访问
+EXIT_INTERRUPTED = 4   # 有目录上次的重命名未完成，需要先 --resume 或 --undo
+EXIT_BACKUP_FAILED = 5 # 有目录的原文件未能全部备份，该目录未执行重命名
+EXIT_ERROR = 6         # 有目录处理时发生意外错误（如无法写入重命名日志）
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(prog="python -m cli",
+                                     description="使用 .fre 配置批量重命名文件")
+    parser.add_argument("config", help=".fre 配置文件路径")
+    parser.add_argument("paths", nargs="*",
+                        help="要处理的目录，默认使用配置中的 work_path")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true",
+                      help="只输出重命名计划，不执行")
+    mode.add_argument("--resume", action="store_true",
+                      help="根据重命名日志继续上次中断的重命名")
+    mode.add_argument("--undo", action="store_true",
+                      help="根据重命名日志撤销上次重命名")
+    parser.add_argument("--jobs-per-device", type=int, default=None, metavar="N",
+                        help="每个设备同时处理的目录数，默认机械硬盘为 1，其他设备为 4")
+    parser.add_argument("--io-depth", type=int, default=1, metavar="N",
+                        help="每个目录同时进行的重命名调用数，用于高延迟的网络挂载（默认 1，逐个执行）")
+    return parser.parse_args(argv)
+
+
+def write_record(record: dict):
+    """输出一行 JSON"""
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数，返回退出码"""
+    args = parse_args(argv)
+
+    # 解析参数后才导入各模块；它们在模块级不能导入 tkinter、asyncio、sqlite3 和
+    # concurrent.futures（见 test_job_runner.test_cli_startup_imports）
+    from models.config_manager import ConfigManager
+    from controllers.rename_controller import RenameController
+    from controllers.job_runner import (JobRunner, MODE_DRY_RUN, MODE_EXECUTE, MODE_RESUME, MODE_UNDO,
+                                        ROOT_BACKUP_FAILED, ROOT_ERROR, ROOT_INTERRUPTED, ROOT_NO_JOURNAL,
+                                        ROOT_PATH_ERROR)
+
+    exit_codes = {ROOT_NO_JOURNAL: EXIT_USAGE, ROOT_PATH_ERROR: EXIT_PATH_ERROR,
+                  ROOT_INTERRUPTED: EXIT_INTERRUPTED, ROOT_BACKUP_FAILED: EXIT_BACKUP_FAILED,
+                  ROOT_ERROR: EXIT_ERROR}
+
+    config = ConfigManager().load_config(args.config)
+    if config is None:
+        write_record({"type": "error", "error": f"无法加载配置: {args.config}"})
+        return EXIT_USAGE
+
+    rules = {
+        "prefix": config.get("prefix", ""),
+        "suffix": config.get("suffix", ""),
+        "delete_chars": config.get("delete_chars", ""),
+        "mappings": config.get("mappings", {}),
+        "regex_rules": config.get("regex_rules", []),
+        "settings": config.get("settings", {}),
+    }
+    if not (rules["prefix"] or rules["suffix"] or rules["delete_chars"] or rules["mappings"]
+            or rules["regex_rules"]):
+        write_record({"type": "error", "error": "配置中没有任何重命名规则"})
+        return EXIT_USAGE
+
+    paths = args.paths or [config.get("work_path", "")]
+    controller = RenameController(None, None)
+
+    try:
+        controller.compile_regex_rules(rules["regex_rules"], rules["settings"].get("sequential_mappings", False))
+    except ValueError as e:
+        write_record({"type": "error", "error": str(e)})
+        return EXIT_USAGE
+
+    if args.resume:
+        mode = MODE_RESUME
+    elif args.undo:
+        mode = MODE_UNDO
+    else:
+        mode = MODE_DRY_RUN if args.dry_run else MODE_EXECUTE
+    runner = JobRunner(controller, rules, mode, args.jobs_per_device, args.io_depth, on_record=write_record)
+    report = runner.run(paths)
+
+    # 与逐个处理目录时相同，以最后一个出错目录的状态为准
+    exit_code = EXIT_OK
+    for root in report.failed_roots():
+        exit_code = exit_codes[root.status]
+    counts = report.counts
+    if exit_code == EXIT_OK and (counts["failed"] or counts["skipped"]):
+        exit_code = EXIT_PARTIAL
+
+    write_record(dict(type="report", **report.as_dict()))
+    write_record(dict(type="stats", **controller.stats.as_dict()))
+    write_record(dict(type="summary", exit_code=exit_code, dry_run=args.dry_run, **counts))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
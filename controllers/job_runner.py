@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+多目录任务 - 对多个目录应用同一组规则
+
+目录按所在设备（st_dev）分组，每个设备限制同时处理的目录数：机械硬盘
+默认一次只处理一个目录，避免多个目录交替读写导致磁头来回寻道；SSD 和
+网络文件系统等可以同时处理多个目录。全部目录处理完成后汇总为一份报告。
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from controllers.rename_controller import RenameController
+from core.journal import JournalState, RenameJournal
+from core.rename_worker import iter_execute, iter_resume, iter_undo, RESULT_RENAMED, RESULT_UNCHANGED
+
+
+# 运行模式
+MODE_EXECUTE = "execute"
+MODE_DRY_RUN = "dry_run"
+MODE_RESUME = "resume"
+MODE_UNDO = "undo"
+
+# 单个目录的处理状态
+ROOT_DONE = "done"                    # 已处理（可能有文件失败或跳过）
+ROOT_NO_JOURNAL = "no_journal"        # 继续或撤销时没有重命名日志
+ROOT_PATH_ERROR = "path_error"        # 目录无法访问
+ROOT_INTERRUPTED = "interrupted"      # 上次的重命名未完成
+ROOT_BACKUP_FAILED = "backup_failed"  # 原文件未能全部备份，未执行重命名
+ROOT_ERROR = "error"                  # 处理时发生意外错误（如无法写入重命名日志），不影响其他目录
+
+# 每个设备同时处理的目录数
+ROTATIONAL_DEVICE_LIMIT = 1
+DEFAULT_DEVICE_LIMIT = 4
+
+
+def is_rotational(device: int) -> Optional[bool]:
+    """设备是否为机械硬盘 - 读取 Linux 的 /sys/dev/block，无法判断（网络文件系统、其他系统）时返回 None"""
+    base = f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+    # 分区没有自己的 queue 目录，取所在磁盘的
+    for path in (os.path.join(base, "queue", "rotational"), os.path.join(base, "..", "queue", "rotational")):
+        try:
+            with open(path) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def default_device_limit(device: Optional[int]) -> int:
+    """设备的默认并发目录数，设备未知（目录无法访问）时为 1"""
+    if device is None or is_rotational(device):
+        return ROTATIONAL_DEVICE_LIMIT
+    return DEFAULT_DEVICE_LIMIT
+
+
+def group_by_device(paths: List[str]) -> Dict[Optional[int], List[str]]:
+    """按 st_dev 分组目录，保持各组内的顺序；重复的目录只保留一次，无法访问的目录归入 None 组"""
+    groups: Dict[Optional[int], List[str]] = {}
+    seen = set()
+    for path in paths:
+        key = os.path.realpath(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            device = os.stat(path).st_dev
+        except OSError:
+            device = None
+        groups.setdefault(device, []).append(path)
+    return groups
+
+
+def nested_roots(paths: List[str]) -> Dict[str, str]:
+    """找出位于另一个目录之下的目录（按 realpath 判断），返回 {内层目录: 包含它的目录}
+
+    包含子文件夹时内层目录的文件也会随外层目录处理，两者同时处理会重命名同一批文件。
+    """
+    outer = {}
+    for path in paths:
+        outer.setdefault(os.path.realpath(path), path)
+    nested = {}
+    for path in paths:
+        parent = os.path.realpath(path)
+        while True:
+            parent, child = os.path.dirname(parent), parent
+            if parent == child:
+                break
+            if parent in outer:
+                nested[path] = outer[parent]
+                break
+    return nested
+
+
+class RootReport:
+    """单个目录的处理结果"""
+
+    def __init__(self, path: str, device: Optional[int]):
+        self.path = path
+        self.device = device
+        self.status = ROOT_DONE
+        self.error: Optional[str] = None
+        self.counts = {"renamed": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+        self.seconds = 0.0
+
+    def fail(self, status: str, error: str):
+        self.status = status
+        self.error = error
+
+    def as_dict(self) -> Dict[str, Any]:
+        """转换为可序列化为 JSON 的字典"""
+        return dict(path=self.path, device=self.device, status=self.status, error=self.error,
+                    seconds=round(self.seconds, 6), **self.counts)
+
+
+class JobReport:
+    """多目录任务的汇总报告"""
+
+    def __init__(self, roots: List[RootReport], limits: Dict[Optional[int], int], seconds: float):
+        # 与输入的目录顺序一致
+        self.roots = roots
+        self.limits = limits
+        self.seconds = seconds
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """全部目录的文件数合计"""
+        totals = {"renamed": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+        for root in self.roots:
+            for key, value in root.counts.items():
+                totals[key] += value
+        return totals
+
+    def failed_roots(self) -> List[RootReport]:
+        """未能处理的目录"""
+        return [root for root in self.roots if root.status != ROOT_DONE]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """转换为可序列化为 JSON 的字典"""
+        devices = []
+        for device, limit in self.limits.items():
+            roots = [root for root in self.roots if root.device == device]
+            devices.append({"device": device, "limit": limit, "roots": len(roots),
+                            "seconds": round(sum(root.seconds for root in roots), 6)})
+        return dict(seconds=round(self.seconds, 6), roots=[root.as_dict() for root in self.roots],
+                    devices=devices, **self.counts)
+
+
+class JobRunner:
+    """多目录任务执行器 - 按设备分组，每个设备按并发上限同时处理多个目录
+
+    每个设备开启不超过上限的处理线程，从该设备的目录队列中依次取出目录，
+    生成计划并执行。各目录使用各自的重命名日志，可以单独继续或撤销。
+    """
+
+    def __init__(self, controller: RenameController, rules: Dict[str, Any], mode: str = MODE_EXECUTE,
+                 device_limit: Optional[int] = None, io_depth: int = 1,
+                 on_record: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """device_limit 为每个设备的并发目录数，None 时按设备类型决定；
+        io_depth 大于 1 时每个目录用异步执行器同时进行多个重命名调用（用于网络挂载）；
+        on_record 接收每个文件的计划或结果记录，调用时已加锁，不会同时被多个线程调用"""
+        self.controller = controller
+        self.rules = rules
+        self.mode = mode
+        self.device_limit = device_limit
+        self.execute = None
+        if io_depth > 1:
+            # 只在需要时导入 asyncio，保持命令行启动快
+            from core.async_executor import async_step_executor
+            self.execute = async_step_executor(io_depth)
+        self.on_record = on_record
+        self._record_lock = threading.Lock()
+
+    def limit_for(self, device: Optional[int]) -> int:
+        """设备的并发目录数"""
+        if self.device_limit is not None:
+            return max(1, self.device_limit)
+        return default_device_limit(device)
+
+    def _emit(self, record: Dict[str, Any]):
+        if self.on_record is not None:
+            with self._record_lock:
+                self.on_record(record)
+
+    def run(self, paths: List[str]) -> JobReport:
+        """处理全部目录，返回汇总报告"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        start = time.perf_counter()
+        if self.rules["settings"].get("include_subfolders", False):
+            # 内层目录随外层目录一起处理，不再单独处理
+            nested = nested_roots(paths)
+            for path, parent in nested.items():
+                self._emit({"type": "nested", "path": path, "parent": parent})
+            paths = [path for path in paths if path not in nested]
+        groups = group_by_device(paths)
+        limits = {device: self.limit_for(device) for device in groups}
+
+        if self.mode in (MODE_EXECUTE, MODE_DRY_RUN):
+            # 在开始并发前编译规则，各线程只读取编译缓存
+            self.controller.compile_rules(self.rules)
+
+        reports: Dict[str, RootReport] = {}
+        with ThreadPoolExecutor(max_workers=max(1, sum(min(limits[device], len(roots))
+                                                        for device, roots in groups.items())),
+                                thread_name_prefix="fre-job") as executor:
+            futures = []
+            for device, roots in groups.items():
+                pending = deque(roots)
+                for _ in range(min(limits[device], len(roots))):
+                    futures.append(executor.submit(self._drain, device, pending, reports))
+            for future in futures:
+                future.result()
+
+        ordered = [reports[path] for path in dict.fromkeys(paths) if path in reports]
+        return JobReport(ordered, limits, time.perf_counter() - start)
+
+    def _drain(self, device: Optional[int], pending: deque, reports: Dict[str, RootReport]):
+        """从设备的目录队列中依次取出目录处理，直到队列为空"""
+        while True:
+            try:
+                path = pending.popleft()
+            except IndexError:
+                return
+            reports[path] = self.run_root(path, device)
+
+    def run_root(self, path: str, device: Optional[int] = None) -> RootReport:
+        """处理单个目录 - 出错时记录在报告中，不抛出异常"""
+        report = RootReport(path, device)
+        start = time.perf_counter()
+        try:
+            results = self._results(path, report)
+            if results is not None:
+                self._consume(path, results, report)
+        except Exception as e:
+            report.fail(ROOT_ERROR, f"{type(e).__name__}: {e}")
+        finally:
+            report.seconds = time.perf_counter() - start
+        if report.error is not None:
+            self._emit({"type": "error", "path": path, "error": report.error})
+        return report
+
+    def _results(self, path: str, report: RootReport):
+        """按模式生成该目录的结果迭代器，不需要执行或出错时返回 None"""
+        controller = self.controller
+        journal_path = RenameJournal.default_path(path)
+        state = JournalState.load(journal_path)
+        if state is not None:
+            state.recover()
+
+        if self.mode in (MODE_RESUME, MODE_UNDO):
+            if state is None:
+                report.fail(ROOT_NO_JOURNAL, "没有重命名日志")
+                return None
+            if self.mode == MODE_RESUME:
+                if state.undo_order is not None or state.finished:
+                    return None
+                return iter_resume(state, RenameJournal(journal_path), controller.stats, self.execute)
+            if not state.steps_to_undo():
+                return None
+            return iter_undo(state, RenameJournal(journal_path), controller.stats, self.execute)
+
+        if state is not None and state.is_interrupted() and self.mode != MODE_DRY_RUN:
+            report.fail(ROOT_INTERRUPTED, "上次的重命名未完成，请先使用 --resume 或 --undo")
+            return None
+
+        try:
+            plan = controller.build_plan(path, self.rules)
+        except OSError as e:
+            report.fail(ROOT_PATH_ERROR, str(e))
+            return None
+
+        if self.mode == MODE_DRY_RUN:
+            for old_name, new_name, status in plan:
+                self._emit({"type": "plan", "path": path, "old": old_name,
+                            "new": new_name, "status": status})
+            return None
+
+        if self.rules["settings"].get("backup_original", False):
+            backup = controller.backup_originals(plan)
+            self._emit(dict(type="backup", path=path, **backup.as_dict()))
+            if not backup.complete:
+                report.fail(ROOT_BACKUP_FAILED, "原文件未能全部备份，未执行重命名")
+                return None
+
+        return iter_execute(plan, RenameJournal(journal_path), controller.stats, self.execute)
+
+    def _consume(self, path: str, results, report: RootReport):
+        counts = report.counts
+        for old_name, new_name, result, error in results:
+            self._emit({"type": "result", "path": path, "old": old_name,
+                        "new": new_name, "result": result, "error": error})
+            if result == RESULT_RENAMED:
+                counts["renamed"] += 1
+            elif result == RESULT_UNCHANGED:
+                counts["unchanged"] += 1
+            else:
+                counts["failed" if error else "skipped"] += 1
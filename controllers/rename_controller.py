@@ -4,43 +4,154 @@
 """
 
 import os
-from typing import List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from models.file_manager import FileManager
+from core.mapping_engine import MappingMatcher
+from core.regex_rules import RegexMatcher, normalize_regex_rules
+from core.rule_compiler import RuleTransform, compile_rule_transform, split_delete_chars
+from core.conflict_resolver import RenameStep
+from core.backup import BACKUP_DIR_NAME, BackupReport, FileBackup
+from core.journal import JournalState, RenameJournal
+from core.rename_worker import RenameWorker, count_final_steps, iter_execute, iter_resume, iter_undo
+from utils.scanner import DirectoryListing, is_case_sensitive, scan_directory, walk_directories
+from utils.stats import (PipelineStats, STAGE_SCAN, STAGE_COMPILE, STAGE_RULES, STAGE_CONFLICTS,
+                         STAGE_BACKUP, STAGE_RENDER_PREVIEW)
+from core.rename_plan import (RenamePlan, PlanEntry, DirectorySnapshot, DirectoryPlan,
+                              STATUS_CHANGED, STATUS_UNCHANGED, STATUS_CONFLICT)
 
 
 class RenameController:
     """重命名控制器"""
     
+    # 保留编译结果的正则规则组数
+    regex_cache_size = 8
+    
     def __init__(self, view, file_manager: FileManager):
         self.view = view
         self.file_manager = file_manager
+        
+        # 最近一次预览生成的重命名计划
+        self.last_plan = None
+        
+        # 后台重命名线程
+        self.worker = None
+        
+        # 基于实时索引按目录缓存的计划：目录路径 -> DirectoryPlan
+        self._directory_plans = {}
+        self._directory_plans_rules = None
+        self._plan_lock = threading.Lock()
+        
+        # 最近一次编译的映射：(映射对象, 映射条数, (映射副本, 查找内容顺序, 是否逐条替换, 是否区分大小写), 匹配器)
+        self._compiled_mappings = None
+        
+        # 最近一次编译的不区分大小写的删除字符：(删除字符, 匹配器)
+        self._compiled_delete_chars = None
+        
+        # 最近编译的正则规则：(规则, 是否逐条替换) -> 匹配器，按最近使用排序
+        self._compiled_regex_rules = OrderedDict()
+        
+        # 最近一次预览或执行的各阶段统计
+        self.stats = PipelineStats()
     
-    def apply_mappings(self, filename: str, mappings: dict) -> str:
-        """应用映射替换"""
-        result = filename
+    def compile_mappings(self, mappings: dict, sequential: bool = False,
+                         case_sensitive: bool = True) -> MappingMatcher:
+        """将映射字典编译为匹配器 - 每次预览/执行只编译一次，映射未变化时复用上次的结果
+        
+        与上次是同一个映射对象且条数未变时直接复用，不比较内容；原地修改映射
+        而条数不变时应传入新的字典。其他对象按内容和顺序与上次编译的映射比较。
+        """
+        cached = self._compiled_mappings
+        if cached is not None:
+            cached_mappings, size, (copy, order, cached_sequential, cached_case_sensitive), matcher = cached
+            if sequential == cached_sequential and case_sensitive == cached_case_sensitive:
+                if mappings is cached_mappings and len(mappings) == size:
+                    return matcher
+                if mappings == copy and list(mappings) == order:
+                    # 记住新的映射对象，之后逐个文件调用时走上面的快速路径
+                    self._compiled_mappings = (mappings, size, cached[2], matcher)
+                    return matcher
+        key = (dict(mappings), list(mappings), sequential, case_sensitive)
+        with self.stats.measure(STAGE_COMPILE, entries=len(mappings)):
+            matcher = MappingMatcher(mappings, sequential=sequential, case_sensitive=case_sensitive)
+        self._compiled_mappings = (mappings, len(mappings), key, matcher)
+        return matcher
+    
+    def _compile_rule_mappings(self, rules: Dict[str, Any], sequential: Optional[bool] = None) -> MappingMatcher:
+        """按规则中的设置编译映射，sequential 为 None 时取设置中的值"""
+        settings = rules["settings"]
+        if sequential is None:
+            sequential = settings.get("sequential_mappings", False)
+        return self.compile_mappings(rules["mappings"], sequential, settings.get("case_sensitive", True))
+    
+    def compile_delete_chars(self, delete_chars: str) -> MappingMatcher:
+        """把删除字符编译为不区分大小写的匹配器 - 按顺序逐条删除，与 apply_delete_chars 相同"""
+        cached = self._compiled_delete_chars
+        if cached is not None and cached[0] == delete_chars:
+            return cached[1]
+        patterns = self._delete_patterns(delete_chars)
+        with self.stats.measure(STAGE_COMPILE, entries=len(patterns)):
+            matcher = MappingMatcher(dict.fromkeys(patterns, ""), sequential=True, case_sensitive=False)
+        self._compiled_delete_chars = (delete_chars, matcher)
+        return matcher
+    
+    def compile_regex_rules(self, regex_rules, sequential: bool = False) -> RegexMatcher:
+        """编译正则规则 - 最近使用过的若干组规则直接复用编译结果，规则无效时抛出 ValueError"""
+        key = (tuple(normalize_regex_rules(regex_rules)), sequential)
+        cache = self._compiled_regex_rules
+        matcher = cache.get(key)
+        if matcher is not None:
+            cache.move_to_end(key)
+            return matcher
+        with self.stats.measure(STAGE_COMPILE, entries=len(key[0])):
+            matcher = RegexMatcher(key[0], sequential=sequential)
+        cache[key] = matcher
+        if len(cache) > self.regex_cache_size:
+            cache.popitem(last=False)
+        return matcher
+    
+    def apply_mappings(self, filename: str, mappings) -> str:
+        """应用映射替换 - mappings 可以是映射字典或已编译的 MappingMatcher
+        
+        传入字典时按 compile_mappings 的缓存规则复用编译结果；逐个文件调用时
+        应传入同一个字典对象或已编译的匹配器。
+        """
+        if not mappings:
+            return filename
         
-        for key, value in mappings.items():
-            if key in result:
-                result = result.replace(key, value)
+        if not isinstance(mappings, MappingMatcher):
+            mappings = self.compile_mappings(mappings)
         
-        return result
+        return mappings.apply(filename)
     
-    def apply_delete_chars(self, filename: str, delete_chars: str) -> str:
-        """应用删除字符 - 整段匹配删除"""
+    def apply_regex_rules(self, filename: str, regex_rules) -> str:
+        """应用正则替换 - regex_rules 可以是配置中的规则列表或已编译的 RegexMatcher"""
+        if not regex_rules:
+            return filename
+        
+        if not isinstance(regex_rules, RegexMatcher):
+            regex_rules = self.compile_regex_rules(regex_rules)
+        
+        return regex_rules.apply(filename)
+    
+    @staticmethod
+    def _delete_patterns(delete_chars: str) -> List[str]:
+        """拆分删除字符中的各个删除模式"""
+        return split_delete_chars(delete_chars)
+    
+    def apply_delete_chars(self, filename: str, delete_chars) -> str:
+        """应用删除字符 - 整段匹配删除；delete_chars 可以是删除字符或 compile_delete_chars 编译的匹配器"""
         if not delete_chars:
             return filename
         
-        result = filename
+        if isinstance(delete_chars, MappingMatcher):
+            return delete_chars.apply(filename)
         
-        # 检查是否包含逗号分隔符
-        if ',' in delete_chars:
-            # 按逗号分割，支持多个删除模式
-            delete_patterns = [pattern.strip() for pattern in delete_chars.split(',') if pattern.strip()]
-        else:
-            # 单个删除模式
-            delete_patterns = [delete_chars]
+        result = filename
         
-        for pattern in delete_patterns:
+        for pattern in self._delete_patterns(delete_chars):
             # 整段匹配删除
             result = result.replace(pattern, "")
         
@@ -64,70 +175,327 @@ class RenameController:
         
         return name + ext
     
-    def preview_rename(self):
-        """预览重命名"""
-        path = self.view.get_current_path()
-        prefix = self.view.get_prefix()
-        suffix = self.view.get_suffix()
-        delete_chars = self.view.get_delete_chars()
-        mappings = self.view.get_mappings()
+    def compile_rules(self, rules: Dict[str, Any], matcher: Optional[MappingMatcher] = None) -> RuleTransform:
+        """把规则编译为一个文件名变换函数 - 结果与依次应用映射、正则、删除字符和前后缀相同
+        
+        matcher 为已编译的映射，为 None 时按规则中的设置编译。
+        """
+        settings = rules["settings"]
+        if matcher is None:
+            matcher = self._compile_rule_mappings(rules)
+        regex_matcher = None
+        if rules.get("regex_rules"):
+            regex_matcher = self.compile_regex_rules(rules["regex_rules"],
+                                                     settings.get("sequential_mappings", False))
+        delete_chars = rules["delete_chars"]
+        delete_matcher = None
+        if delete_chars and not settings.get("case_sensitive", True):
+            delete_matcher = self.compile_delete_chars(delete_chars)
+        return compile_rule_transform(rules["prefix"], rules["suffix"], delete_chars,
+                                      mappings=matcher, regex_rules=regex_matcher,
+                                      delete_matcher=delete_matcher)
+    
+    def get_rules(self) -> Dict[str, Any]:
+        """从视图收集重命名规则"""
+        return {
+            "prefix": self.view.get_prefix(),
+            "suffix": self.view.get_suffix(),
+            "delete_chars": self.view.get_delete_chars(),
+            "mappings": self.view.get_mappings(),
+            "regex_rules": self.view.get_regex_rules(),
+            "settings": self.view.get_settings(),
+        }
+    
+    def build_plan(self, path: str, rules: Dict[str, Any]) -> RenamePlan:
+        """生成重命名计划 - 列出目录并对每个文件应用全部规则
+        
+        设置 include_subfolders 时并行递归扫描子目录，每个目录扫描完成后
+        立即生成该目录的计划条目，条目文件名为相对于 path 的路径。
+        有文件管理器时改用其实时索引，只重新计算有变化的目录。
+        """
+        if self.file_manager is not None:
+            return self._build_indexed_plan(path, rules)
+        
+        matcher = self._compile_rule_mappings(rules)
+        
+        # 递归扫描时目录在后台线程中列出，记录的是等待下一个目录的时间
+        scan_start = time.perf_counter()
+        if rules["settings"].get("include_subfolders", False):
+            listings = walk_directories(path, exclude=(BACKUP_DIR_NAME,))
+        else:
+            listings = [scan_directory(path)]
+        
+        entries = []
+        steps = []
+        snapshots = []
+        for listing in listings:
+            self.stats.add(STAGE_SCAN, time.perf_counter() - scan_start, entries=len(listing.names))
+            snapshots.append(DirectorySnapshot.from_stat(listing.path, listing.stat, listing.scanned_at_ns))
+            relative_dir = os.path.relpath(listing.path, path)
+            if relative_dir == os.curdir:
+                relative_dir = ""
+            directory_entries, directory_steps = self._plan_directory(listing, relative_dir, matcher, rules)
+            entries.extend(directory_entries)
+            steps.extend(directory_steps)
+            scan_start = time.perf_counter()
+        
+        return RenamePlan(path, entries, snapshots, rules, steps)
+    
+    def _build_indexed_plan(self, path: str, rules: Dict[str, Any]) -> RenamePlan:
+        """基于实时索引生成计划 - 版本号未变的目录直接复用上次的计划，
+        有变化的目录只对新增的文件应用规则，并尽量只局部更新冲突解析结果"""
+        include_subfolders = rules["settings"].get("include_subfolders", False)
+        with self._plan_lock:
+            scan_start = time.perf_counter()
+            directories = self.file_manager.get_index(path, include_subfolders).sync()
+            self.stats.add(STAGE_SCAN, time.perf_counter() - scan_start,
+                           entries=sum(len(directory.files) + len(directory.others) for directory in directories))
+            # 映射的顺序在逐条替换模式下会影响结果，一并比较
+            rules_key = (rules, list(rules["mappings"]))
+            changed_keys = None
+            if rules_key != self._directory_plans_rules:
+                changed_keys = self._changed_mapping_keys(self._directory_plans_rules, rules)
+                if changed_keys is None:
+                    self._directory_plans = {}
+                self._directory_plans_rules = rules_key
+            
+            matcher = None
+            plans = {}
+            entries = []
+            steps = []
+            snapshots = []
+            for directory in directories:
+                snapshots.append(DirectorySnapshot.from_stat(directory.path, directory.stat,
+                                                             directory.scanned_at_ns))
+                plan = self._directory_plans.get(directory.path)
+                if changed_keys and plan is not None:
+                    if matcher is None:
+                        matcher = self._compile_rule_mappings(rules, sequential=False)
+                    self._apply_mapping_change(plan, changed_keys, matcher, rules)
+                if plan is None or plan.version != directory.version:
+                    if matcher is None:
+                        matcher = self._compile_rule_mappings(rules)
+                    plan = self._update_directory_plan(plan, directory, path, matcher, rules)
+                plans[directory.path] = plan
+                entries.extend(plan.entries.values())
+                steps.extend(plan.steps)
+            
+            # 已删除的目录随之移出缓存
+            self._directory_plans = plans
+            return RenamePlan(path, entries, snapshots, rules, steps)
+    
+    def _changed_mapping_keys(self, previous_key, rules: Dict[str, Any]) -> Optional[set]:
+        """与上次计划相比只有映射改变时，返回改变的查找内容；否则返回 None
+        
+        单次扫描替换时，文件名的映射结果只取决于在其中出现的查找内容，
+        因此只有包含改变的查找内容的文件需要重新计算。逐条替换模式下
+        替换结果会被后续规则再次匹配，无法据此判断，需要全部重新计算。
+        不区分大小写时，casefold 后相同的查找内容中只有第一条生效，
+        这些查找内容的相对顺序改变也算作改变。
+        """
+        if previous_key is None:
+            return None
+        previous = previous_key[0]
+        for field in ("prefix", "suffix", "delete_chars", "regex_rules", "settings"):
+            if previous.get(field) != rules.get(field):
+                return None
+        if rules["settings"].get("sequential_mappings", False):
+            return None
+        
+        old_mappings = previous["mappings"]
+        new_mappings = rules["mappings"]
+        # 空查找内容在单次扫描替换中不起作用
+        changed = {key for key in old_mappings.keys() | new_mappings.keys()
+                   if key and old_mappings.get(key) != new_mappings.get(key)}
+        if not rules["settings"].get("case_sensitive", True):
+            old_groups = self._casefold_groups(old_mappings)
+            for folded, keys in self._casefold_groups(new_mappings).items():
+                old_keys = old_groups.get(folded, [])
+                if (len(keys) > 1 or len(old_keys) > 1) and keys != old_keys:
+                    changed.update(keys, old_keys)
+        return changed
+    
+    @staticmethod
+    def _casefold_groups(mappings) -> Dict[str, List[str]]:
+        """按 casefold 分组查找内容，组内保持映射中的顺序"""
+        groups = {}
+        for key in mappings:
+            if key:
+                groups.setdefault(key.casefold(), []).append(key)
+        return groups
+    
+    def _apply_mapping_change(self, plan: DirectoryPlan, changed_keys: set,
+                              matcher: MappingMatcher, rules: Dict[str, Any]):
+        """映射改变后，只重新计算文件名中包含改变的查找内容的文件"""
+        affected = plan.files_containing(changed_keys, casefold=not matcher.case_sensitive)
+        if not affected:
+            return
+        changed = [(file, new_name) for file, new_name in self._new_names(affected, matcher, rules)
+                   if new_name != plan.new_names[file]]
+        if not changed:
+            return
+        with self.stats.measure(STAGE_CONFLICTS, entries=len(changed)):
+            if not plan.update(changed=changed):
+                new_names = dict(plan.new_names)
+                new_names.update(changed)
+                plan.rebuild(new_names.items(), plan.others)
+    
+    def _update_directory_plan(self, plan: Optional[DirectoryPlan], directory, path: str,
+                               matcher: MappingMatcher, rules: Dict[str, Any]) -> DirectoryPlan:
+        """按索引中目录的当前条目更新其计划，只对新增的文件应用规则"""
+        if plan is None:
+            relative_dir = os.path.relpath(directory.path, path)
+            # 无法确定文件系统区分大小写时按不区分处理，避免大小写不同的文件名互相覆盖
+            casefold = is_case_sensitive(directory.path, directory.names) is not True
+            plan = DirectoryPlan("" if relative_dir == os.curdir else relative_dir, casefold)
+            new_names = self._new_names(directory.file_names, matcher, rules)
+            with self.stats.measure(STAGE_CONFLICTS, entries=len(new_names)):
+                plan.rebuild(new_names, directory.others)
+        else:
+            files = directory.files
+            added = self._new_names([file for file in files if file not in plan.new_names], matcher, rules)
+            removed = [file for file in plan.new_names if file not in files]
+            with self.stats.measure(STAGE_CONFLICTS, entries=len(added) + len(removed)):
+                updated = plan.update(added, removed, directory.others - plan.others,
+                                      plan.others - directory.others)
+            if not updated:
+                new_names = self._new_names(directory.file_names, matcher, rules, plan.new_names)
+                with self.stats.measure(STAGE_CONFLICTS, entries=len(new_names)):
+                    plan.rebuild(new_names, directory.others)
+        plan.version = directory.version
+        return plan
+    
+    def _new_names(self, files: List[str], matcher: MappingMatcher, rules: Dict[str, Any],
+                   known_names: Optional[Dict[str, str]] = None) -> List[Tuple[str, str]]:
+        """对每个文件名应用全部规则，返回 (原文件名, 新文件名) 列表
+        
+        known_names 为同一规则下已计算过的结果，其中的文件名直接复用。
+        """
+        transform = self.compile_rules(rules, matcher)
         
+        start = time.perf_counter()
+        if known_names is None:
+            files = list(files)
+            names = list(zip(files, transform.batch(files)))
+            computed = len(files)
+        else:
+            pending = [file for file in files if known_names.get(file) is None]
+            new_names = dict(zip(pending, transform.batch(pending)))
+            names = [(file, new_names[file] if file in new_names else known_names[file]) for file in files]
+            computed = len(pending)
+        
+        self.stats.add(STAGE_RULES, time.perf_counter() - start, entries=computed)
+        return names
+    
+    def _plan_directory(self, listing: DirectoryListing, relative_dir: str,
+                        matcher: MappingMatcher, rules: Dict[str, Any]) -> Tuple[List[PlanEntry], List[RenameStep]]:
+        """生成单个目录的计划条目和执行步骤"""
+        plan = DirectoryPlan(relative_dir, is_case_sensitive(listing.path, listing.names) is not True)
+        new_names = self._new_names(listing.file_names, matcher, rules)
+        with self.stats.measure(STAGE_CONFLICTS, entries=len(new_names)):
+            plan.rebuild(new_names, listing.names)
+        return list(plan.entries.values()), plan.steps
+    
+    def backup_originals(self, plan: RenamePlan, should_stop=None) -> BackupReport:
+        """备份计划中将被重命名的原文件"""
+        names = [entry.old_name for entry in plan if entry.status == STATUS_CHANGED]
+        start = time.perf_counter()
+        report = FileBackup(plan.path).run(names, should_stop)
+        self.stats.add(STAGE_BACKUP, time.perf_counter() - start,
+                       entries=sum(report.files.values()), bytes=sum(report.bytes.values()))
+        return report
+    
+    def _validate_rules(self, path: str, rules: Dict[str, Any]) -> bool:
+        """检查路径和规则是否有效"""
         if not path:
             self.view.update_status("错误：请先确认工作路径！\n")
-            return
+            return False
         
-        if not prefix and not suffix and not delete_chars and not mappings:
+        if not (rules["prefix"] or rules["suffix"] or rules["delete_chars"] or rules["mappings"]
+                or rules.get("regex_rules")):
             self.view.update_status("错误：请至少设置一种重命名方式！\n")
+            return False
+        
+        try:
+            self.compile_regex_rules(rules.get("regex_rules"), rules["settings"].get("sequential_mappings", False))
+        except ValueError as e:
+            self.view.update_status(f"错误：{e}\n")
+            return False
+        
+        return True
+    
+    def preview_rename(self):
+        """预览重命名"""
+        path = self.view.get_current_path()
+        rules = self.get_rules()
+        
+        if not self._validate_rules(path, rules):
             return
         
+        self.stats.reset()
         try:
-            files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
-            if not files:
+            plan = self.build_plan(path, rules)
+            self.last_plan = plan
+            with self.stats.measure(STAGE_RENDER_PREVIEW, entries=len(plan)):
+                self.view.show_plan(plan)
+            if not plan:
                 self.view.update_status("警告：该文件夹中没有文件！\n")
                 return
             
             self.view.update_status(f"\n重命名预览:\n")
-            self.view.update_status(f"前缀: '{prefix}'\n")
-            self.view.update_status(f"后缀: '{suffix}'\n")
-            self.view.update_status(f"删除字符: '{delete_chars}'\n")
+            self.view.update_status(f"前缀: '{rules['prefix']}'\n")
+            self.view.update_status(f"后缀: '{rules['suffix']}'\n")
+            self.view.update_status(f"删除字符: '{rules['delete_chars']}'\n")
+            
+            if rules["mappings"]:
+                self.view.update_status(f"映射替换: {len(rules['mappings'])} 条规则\n")
             
-            if mappings:
-                self.view.update_status(f"映射替换: {len(mappings)} 条规则\n")
+            if rules.get("regex_rules"):
+                self.view.update_status(f"正则替换: {len(rules['regex_rules'])} 条规则\n")
             
-            self.view.update_status(f"将重命名 {len(files)} 个文件\n\n")
+            self.view.update_status(f"将重命名 {len(plan)} 个文件\n")
+            self.view.update_status(f"有变化 {plan.count(STATUS_CHANGED)} 个，"
+                                    f"无变化 {plan.count(STATUS_UNCHANGED)} 个，"
+                                    f"冲突 {plan.count(STATUS_CONFLICT)} 个，详见预览列表\n")
             
-            for file in files:
-                # 应用映射替换
-                mapped_name = self.apply_mappings(file, mappings)
-                
-                # 应用删除字符
-                deleted_name = self.apply_delete_chars(mapped_name, delete_chars)
-                
-                # 智能应用前缀和后缀
-                new_name = self.apply_prefix_suffix(deleted_name, prefix, suffix)
-                
-                if file != new_name:
-                    self.view.update_status(f"  {file} -> {new_name}\n")
-                else:
-                    self.view.update_status(f"  {file} (无变化)\n")
-                    
         except Exception as e:
             self.view.update_status(f"预览失败: {e}\n")
     
+    def _worker_running(self) -> bool:
+        """后台重命名是否正在进行"""
+        if self.worker is not None and self.worker.is_alive():
+            self.view.update_status("重命名正在进行中，请等待完成或取消\n")
+            return True
+        return False
+    
+    def _start_worker(self, task):
+        """在后台线程中运行任务"""
+        self.worker = RenameWorker(task)
+        self.worker.start()
+        self.view.watch_rename_worker(self.worker)
+    
+    def load_journal(self, path: str):
+        """读取工作目录的重命名日志，并补全最后一批未落盘的记录"""
+        state = JournalState.load(RenameJournal.default_path(path))
+        if state is not None:
+            state.recover()
+        return state
+    
     def execute_rename(self):
-        """执行重命名"""
+        """执行重命名 - 在后台线程中执行，进度通过事件队列报告给视图"""
+        if self._worker_running():
+            return
+        
         path = self.view.get_current_path()
-        prefix = self.view.get_prefix()
-        suffix = self.view.get_suffix()
-        delete_chars = self.view.get_delete_chars()
-        mappings = self.view.get_mappings()
+        rules = self.get_rules()
         
-        if not path:
-            self.view.update_status("错误：请先确认工作路径！\n")
+        if not self._validate_rules(path, rules):
             return
         
-        if not prefix and not suffix and not delete_chars and not mappings:
-            self.view.update_status("错误：请至少设置一种重命名方式！\n")
+        # 上次重命名中断时，必须先继续或撤销
+        state = self.load_journal(path)
+        if state is not None and state.is_interrupted():
+            self.view.update_status("错误：该目录上次的重命名未完成，请先继续或撤销上次重命名！\n")
             return
         
         # 确认对话框
@@ -135,45 +503,73 @@ class RenameController:
         if not messagebox.askyesno("确认", "确定要执行重命名操作吗？"):
             return
         
-        try:
-            files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
-            if not files:
-                self.view.update_status("警告：该文件夹中没有文件！\n")
-                return
-            
-            self.view.update_status(f"\n开始重命名操作...\n")
-            
-            renamed_count = 0
-            for file in files:
-                # 应用映射替换
-                mapped_name = self.apply_mappings(file, mappings)
-                
-                # 应用删除字符
-                deleted_name = self.apply_delete_chars(mapped_name, delete_chars)
-                
-                # 智能应用前缀和后缀
-                new_name = self.apply_prefix_suffix(deleted_name, prefix, suffix)
-                
-                if file == new_name:
-                    self.view.update_status(f"跳过: {file} (无变化)\n")
-                    continue
-                
-                old_path = os.path.join(path, file)
-                new_path = os.path.join(path, new_name)
-                
-                # 检查新文件名是否已存在
-                if os.path.exists(new_path):
-                    self.view.update_status(f"跳过: {file} -> {new_name} (文件已存在)\n")
-                    continue
-                
-                try:
-                    os.rename(old_path, new_path)
-                    self.view.update_status(f"重命名: {file} -> {new_name}\n")
-                    renamed_count += 1
-                except Exception as e:
-                    self.view.update_status(f"失败: {file} -> {new_name} (错误: {e})\n")
-            
-            self.view.update_status(f"\n重命名完成！成功重命名 {renamed_count} 个文件\n")
-            
-        except Exception as e:
-            self.view.update_status(f"重命名操作失败: {e}\n")
+        # 目录和规则都未变化时直接执行预览生成的计划
+        plan = self.last_plan
+        self.last_plan = None
+        if plan is not None and plan.is_current(path, rules):
+            self.view.update_status(f"\n使用预览生成的重命名计划\n")
+        else:
+            plan = None
+        
+        journal = RenameJournal(RenameJournal.default_path(path))
+        
+        def task():
+            current_plan = plan if plan is not None else self.build_plan(path, rules)
+            if rules["settings"].get("backup_original", False):
+                worker = self.worker
+                worker.report("正在备份原文件...")
+                report = self.backup_originals(current_plan, lambda: worker.cancelled)
+                worker.report(report.summary())
+                if not report.complete:
+                    for name, error in report.failed[:20]:
+                        worker.report(f"备份失败: {name} (错误: {error})")
+                    raise RuntimeError("原文件未能全部备份，未执行重命名")
+            return len(current_plan), iter_execute(current_plan, journal, self.stats)
+        
+        self.stats.reset()
+        self.view.update_status(f"\n开始重命名操作...\n")
+        self._start_worker(task)
+    
+    def resume_rename(self):
+        """继续上次中断的重命名"""
+        if self._worker_running():
+            return
+        
+        path = self.view.get_current_path()
+        state = self.load_journal(path)
+        if state is None or state.undo_order is not None or state.finished:
+            self.view.update_status("没有需要继续的重命名\n")
+            return
+        
+        remaining = state.remaining_steps()
+        journal = RenameJournal(state.journal_path)
+        self.stats.reset()
+        self.view.update_status(f"\n继续上次中断的重命名，剩余 {len(remaining)} 个步骤...\n")
+        self._start_worker(lambda: (count_final_steps(state, remaining), iter_resume(state, journal, self.stats)))
+    
+    def undo_rename(self):
+        """撤销该目录上次的重命名"""
+        if self._worker_running():
+            return
+        
+        path = self.view.get_current_path()
+        state = self.load_journal(path)
+        order = state.steps_to_undo() if state is not None else []
+        if not order:
+            self.view.update_status("没有可以撤销的重命名\n")
+            return
+        
+        from tkinter import messagebox
+        if not messagebox.askyesno("确认", f"确定要撤销上次重命名吗？将恢复 {len(order)} 个步骤"):
+            return
+        
+        journal = RenameJournal(state.journal_path)
+        self.stats.reset()
+        self.view.update_status(f"\n开始撤销上次重命名...\n")
+        self._start_worker(lambda: (count_final_steps(state, order), iter_undo(state, journal, self.stats)))
+    
+    def cancel_rename(self):
+        """取消正在进行的重命名"""
+        if self.worker is not None and self.worker.is_alive():
+            self.worker.cancel()
+            self.view.update_status("正在取消重命名...\n")
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+异步重命名执行器 - 用于高延迟的挂载（NFS、SMB 等）
+
+网络文件系统上每次 os.rename / os.path.lexists 都要一次往返，逐个执行时
+吞吐量受延迟限制。这里用 asyncio 把每个步骤的文件系统调用分发到有界
+线程池，同时最多进行 depth 个调用。访问同一路径的步骤（目标名需要先被
+腾出的链、临时文件名的两步、撤销时的反向步骤）仍按计划顺序执行，其余
+步骤并发执行。路径按 casefold 比较：不区分大小写的文件系统上 B 与 b 是
+同一个文件（执行器无法知道计划是否按 casefold 生成，区分大小写时只是少
+并发几个步骤）。结果按步骤顺序产生，日志记录和取消的处理与逐个执行相同。
+
+LatencyFileSystem 在每次调用本地文件系统前加入固定延迟，用于在没有网络
+存储时测试和测量。
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from core.conflict_resolver import RenameStep
+from core.journal import MAX_PENDING_STEPS
+from core.rename_worker import (ExecutedStep, StepExecutor, RESULT_FAILED, RESULT_RENAMED,
+                                REQUIRES_ERROR, TEMP_NAME_ERROR, execute_step)
+
+
+# 默认同时进行的文件系统调用数
+DEFAULT_DEPTH = 16
+
+# 已创建但结果尚未产生的步骤数为 depth 的若干倍，不能超过日志恢复时检查的 MAX_PENDING_STEPS
+LOOKAHEAD_FACTOR = 4
+MAX_DEPTH = MAX_PENDING_STEPS // LOOKAHEAD_FACTOR
+
+
+class LocalFileSystem:
+    """本地文件系统"""
+
+    def rename(self, source: str, target: str):
+        os.rename(source, target)
+
+    def lexists(self, path: str) -> bool:
+        return os.path.lexists(path)
+
+
+class LatencyFileSystem(LocalFileSystem):
+    """每次调用前等待 latency 秒的本地文件系统 - 模拟网络挂载的往返延迟
+
+    记录调用次数和同时进行的最大调用数。
+    """
+
+    def __init__(self, latency: float = 0.002):
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, func, *args):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return func(*args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def rename(self, source: str, target: str):
+        self._call(os.rename, source, target)
+
+    def lexists(self, path: str) -> bool:
+        return self._call(os.path.lexists, path)
+
+
+def _path_key(path: str) -> str:
+    """依赖关系中使用的路径键"""
+    return os.path.normcase(path).casefold()
+
+
+def _touched(step: RenameStep) -> Set[str]:
+    """步骤访问的路径键：原路径、目标路径和需要先被腾出的路径"""
+    keys = {_path_key(step.source), _path_key(step.target)}
+    if step.requires is not None:
+        keys.add(_path_key(step.requires))
+    return keys
+
+
+async def execute_steps_async(path: str, indexed_steps: Iterable[Tuple[int, RenameStep]], vacated: Set[str],
+                              check_exists: bool, fs=None, depth: int = DEFAULT_DEPTH,
+                              executor: Optional[Executor] = None) -> AsyncIterator[ExecutedStep]:
+    """并发执行步骤，按步骤顺序产生 (步骤序号, 步骤, 结果, 错误信息, 重命名耗时)
+
+    每个步骤等待之前访问过其原路径或目标路径的步骤完成后才执行，依赖的
+    路径未能腾出时与 execute_steps 一样报告为失败。executor 为执行文件系统
+    调用的线程池，为 None 时使用事件循环的默认线程池。
+    """
+    loop = asyncio.get_running_loop()
+    depth = max(1, min(depth, MAX_DEPTH))
+    slots = asyncio.Semaphore(depth)
+    temp_errors = {}
+    # 路径键 -> 最后一个访问该路径、尚未产生结果的步骤
+    last_touch: Dict[str, asyncio.Task] = {}
+    pending = deque()
+    stopping = False
+
+    async def run(index: int, step: RenameStep, waits) -> Optional[ExecutedStep]:
+        if waits:
+            # 不直接 await 任务：取消本步骤时不应取消所依赖的步骤
+            await asyncio.wait(waits)
+        if step.requires is not None and step.requires not in vacated:
+            result, error, seconds = RESULT_FAILED, temp_errors.get(step.old_name, REQUIRES_ERROR), None
+        else:
+            async with slots:
+                if stopping:
+                    return None
+                result, error, seconds = await loop.run_in_executor(
+                    executor, execute_step, fs, path, step, check_exists)
+            if result == RESULT_RENAMED:
+                vacated.add(step.source)
+        if not step.final and result != RESULT_RENAMED:
+            temp_errors[step.old_name] = error or TEMP_NAME_ERROR
+        return index, step, result, error, seconds
+
+    async def pop() -> ExecutedStep:
+        task, touched = pending.popleft()
+        executed = await task
+        for key in touched:
+            if last_touch.get(key) is task:
+                del last_touch[key]
+        return executed
+
+    try:
+        for index, step in indexed_steps:
+            touched = _touched(step)
+            waits = {last_touch[key] for key in touched if key in last_touch}
+            task = loop.create_task(run(index, step, waits))
+            for key in touched:
+                last_touch[key] = task
+            pending.append((task, touched))
+            if len(pending) >= depth * LOOKAHEAD_FACTOR:
+                yield await pop()
+        while pending:
+            yield await pop()
+    finally:
+        # 被关闭时不再发出新的调用，等待已发出的调用完成；其结果未记入日志，
+        # 由日志恢复时检查（见 JournalState.recover）
+        stopping = True
+        if pending:
+            await asyncio.gather(*(task for task, _ in pending), return_exceptions=True)
+
+
+def iter_execute_steps(path: str, indexed_steps: Iterable[Tuple[int, RenameStep]], vacated: Set[str],
+                       check_exists: bool, fs=None, depth: int = DEFAULT_DEPTH) -> Iterator[ExecutedStep]:
+    """execute_steps_async 的同步版本 - 在当前线程的新事件循环中运行，可作为 run_steps 的步骤执行器"""
+    depth = max(1, min(depth, MAX_DEPTH))
+    loop = asyncio.new_event_loop()
+    executor = ThreadPoolExecutor(max_workers=depth, thread_name_prefix="fre-io")
+    steps = execute_steps_async(path, indexed_steps, vacated, check_exists, fs, depth, executor)
+    try:
+        while True:
+            try:
+                executed = loop.run_until_complete(steps.__anext__())
+            except StopAsyncIteration:
+                return
+            yield executed
+    finally:
+        try:
+            loop.run_until_complete(steps.aclose())
+        finally:
+            executor.shutdown(wait=True)
+            loop.close()
+
+
+def async_step_executor(depth: int = DEFAULT_DEPTH, fs=None) -> StepExecutor:
+    """创建异步步骤执行器，传给 iter_execute / iter_resume / iter_undo 的 execute 参数"""
+    return functools.partial(iter_execute_steps, fs=fs, depth=depth)
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+备份原文件 - 实现 settings.backup_original
+
+重命名不会改变文件内容，所以备份优先使用硬链接：备份与原文件共享同一
+inode，不产生任何数据 I/O。文件系统不支持硬链接时依次尝试 reflink
+（FICLONE，共享数据块）和 copy_file_range（在内核中复制），都不支持时
+才在线程池中流式复制。
+
+备份位于工作目录下的 BACKUP_DIR_NAME 目录中，与原文件在同一文件系统上，
+硬链接才可能成功。
+"""
+
+import errno
+import itertools
+import os
+import shutil
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# 备份目录名，递归扫描时跳过
+BACKUP_DIR_NAME = ".fre_backup"
+
+# 备份方式
+BACKUP_LINKED = "linked"     # 硬链接
+BACKUP_CLONED = "cloned"     # reflink
+BACKUP_COPIED = "copied"     # copy_file_range 或流式复制
+
+# Linux FICLONE ioctl 请求号
+FICLONE = 0x40049409
+
+# 流式复制的块大小
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# copy_file_range 单次调用的最大字节数
+COPY_RANGE_SIZE = 1 << 30
+
+# 复制线程数
+DEFAULT_COPY_WORKERS = 4
+
+# 这些错误表示文件系统（或跨文件系统）不支持该操作，同一设备上不再尝试
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EINVAL,
+                       errno.ENOSYS, errno.EOPNOTSUPP, getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+                       getattr(errno, "ENOTTY", errno.EINVAL)}
+
+
+def format_size(size: int) -> str:
+    """格式化字节数"""
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+class BackupReport:
+    """备份结果统计"""
+
+    def __init__(self, backup_dir: str):
+        self.backup_dir = backup_dir
+        self.files = {BACKUP_LINKED: 0, BACKUP_CLONED: 0, BACKUP_COPIED: 0}
+        self.bytes = {BACKUP_LINKED: 0, BACKUP_CLONED: 0, BACKUP_COPIED: 0}
+        self.failed: List[Tuple[str, str]] = []
+        self.cancelled = False
+
+    def add(self, method: str, size: int):
+        self.files[method] += 1
+        self.bytes[method] += size
+
+    @property
+    def complete(self) -> bool:
+        """全部文件都已备份"""
+        return not self.failed and not self.cancelled
+
+    def summary(self) -> str:
+        """备份结果摘要"""
+        return (f"备份到 {self.backup_dir}：硬链接 {self.files[BACKUP_LINKED]} 个文件 "
+                f"({format_size(self.bytes[BACKUP_LINKED])})，"
+                f"reflink {self.files[BACKUP_CLONED]} 个 ({format_size(self.bytes[BACKUP_CLONED])})，"
+                f"复制 {self.files[BACKUP_COPIED]} 个 ({format_size(self.bytes[BACKUP_COPIED])})，"
+                f"失败 {len(self.failed)} 个")
+
+    def as_dict(self) -> Dict:
+        """转换为可序列化为 JSON 的字典"""
+        return {
+            "backup_dir": self.backup_dir,
+            "linked_files": self.files[BACKUP_LINKED],
+            "linked_bytes": self.bytes[BACKUP_LINKED],
+            "cloned_files": self.files[BACKUP_CLONED],
+            "cloned_bytes": self.bytes[BACKUP_CLONED],
+            "copied_files": self.files[BACKUP_COPIED],
+            "copied_bytes": self.bytes[BACKUP_COPIED],
+            "failed": [{"file": name, "error": error} for name, error in self.failed],
+            "cancelled": self.cancelled,
+        }
+
+
+def create_backup_dir(work_path: str) -> str:
+    """创建本次备份的目录：工作目录下按时间命名的新子目录
+
+    目录以独占方式创建；同一秒内已有备份目录时在名称后加序号，
+    不会与之前的备份混在一起。
+    """
+    parent = os.path.join(work_path, BACKUP_DIR_NAME)
+    os.makedirs(parent, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    for number in itertools.count():
+        path = os.path.join(parent, f"{stamp}-{number}" if number else stamp)
+        try:
+            os.mkdir(path)
+            return path
+        except FileExistsError:
+            continue
+
+
+class FileBackup:
+    """把待重命名的原文件备份到备份目录，保留相对路径"""
+
+    def __init__(self, work_path: str, backup_dir: Optional[str] = None,
+                 max_workers: int = DEFAULT_COPY_WORKERS):
+        """backup_dir 为 None 时在 run 中用 create_backup_dir 创建新的备份目录"""
+        self.work_path = work_path
+        self.backup_dir = backup_dir
+        self.max_workers = max_workers
+
+        # 已确认不支持某种方式的设备号
+        self._no_link = set()
+        self._no_clone = set()
+        self._no_copy_range = set()
+        self._created_dirs = set()
+
+    def _prepare(self, name: str) -> Tuple[str, str, os.stat_result]:
+        source = os.path.join(self.work_path, name)
+        target = os.path.join(self.backup_dir, name)
+        directory = os.path.dirname(target)
+        if directory not in self._created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._created_dirs.add(directory)
+        return source, target, os.stat(source)
+
+    def _link(self, source: str, target: str, st: os.stat_result) -> bool:
+        """尝试硬链接，成功返回 True"""
+        if st.st_dev in self._no_link:
+            return False
+        try:
+            os.link(source, target)
+            return True
+        except OSError as e:
+            if e.errno in _UNSUPPORTED_ERRNOS:
+                self._no_link.add(st.st_dev)
+            return False
+
+    def _copy(self, source: str, target: str, st: os.stat_result) -> str:
+        """依次尝试 reflink、copy_file_range 和流式复制，返回实际使用的方式"""
+        with open(source, "rb", buffering=0) as fsrc, open(target, "xb", buffering=0) as fdst:
+            if fcntl is not None and st.st_dev not in self._no_clone:
+                try:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                    method = BACKUP_CLONED
+                except OSError as e:
+                    if e.errno in _UNSUPPORTED_ERRNOS:
+                        self._no_clone.add(st.st_dev)
+                    method = None
+            else:
+                method = None
+
+            if method is None and hasattr(os, "copy_file_range") and st.st_dev not in self._no_copy_range:
+                try:
+                    while os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_RANGE_SIZE):
+                        pass
+                    method = BACKUP_COPIED
+                except OSError as e:
+                    if e.errno in _UNSUPPORTED_ERRNOS:
+                        self._no_copy_range.add(st.st_dev)
+                    # 从头开始流式复制
+                    fsrc.seek(0)
+                    fdst.seek(0)
+                    fdst.truncate()
+
+            if method is None:
+                shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+                method = BACKUP_COPIED
+
+        shutil.copystat(source, target)
+        return method
+
+    def run(self, names: Iterable[str], should_stop: Optional[Callable[[], bool]] = None) -> BackupReport:
+        """备份全部文件，names 为相对于工作目录的文件名
+
+        硬链接在当前线程中逐个创建；无法硬链接的文件交给线程池复制，
+        同时提交的任务数有上限。should_stop 返回 True 时停止提交新任务。
+        """
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+        if self.backup_dir is None:
+            try:
+                self.backup_dir = create_backup_dir(self.work_path)
+            except OSError as e:
+                report = BackupReport(os.path.join(self.work_path, BACKUP_DIR_NAME))
+                report.failed.extend((name, str(e)) for name in names)
+                return report
+
+        report = BackupReport(self.backup_dir)
+        max_in_flight = self.max_workers * 2
+        in_flight = {}
+
+        def collect(futures):
+            for future in futures:
+                name, size = in_flight.pop(future)
+                try:
+                    report.add(future.result(), size)
+                except OSError as e:
+                    report.failed.append((name, str(e)))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for name in names:
+                if should_stop is not None and should_stop():
+                    report.cancelled = True
+                    break
+                try:
+                    source, target, st = self._prepare(name)
+                    if self._link(source, target, st):
+                        report.add(BACKUP_LINKED, st.st_size)
+                        continue
+                except OSError as e:
+                    report.failed.append((name, str(e)))
+                    continue
+
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight[executor.submit(self._copy, source, target, st)] = (name, st.st_size)
+
+            collect(list(in_flight))
+
+        return report
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+冲突解析 - 处理同一目录内的重命名链和循环（如 a->b, b->a）
+
+把一个目录内的全部重命名看作图：若 x 的目标名正是 y 的原文件名，则 x
+必须在 y 之后执行。每个原文件名最多被一个目标占用，因此图中只有链和
+环两种结构。链按拓扑顺序从末端开始执行，环借助临时文件名打断。
+
+在不区分大小写的文件系统上，文件名按 casefold 比较：a -> B 的目标会与
+已有的 b 冲突，只改变大小写的 a -> A 视为自身构成的环，借助临时文件名完成。
+"""
+
+import os
+from collections import namedtuple
+from typing import List, Optional, Sequence, Set, Tuple
+
+
+# 执行步骤
+#   source / target: 本步实际的源路径和目标路径（可能是临时文件名）
+#   old_name / new_name: 所属计划条目的原文件名和新文件名
+#   final: 本步完成后该条目即完成（临时文件名步骤为 False）
+#   requires: 执行前必须已被移走的路径（目标名原本被另一个待重命名文件占用），否则为 None
+RenameStep = namedtuple("RenameStep", ["source", "target", "old_name", "new_name", "final", "requires"])
+
+# 临时文件名格式
+TEMP_NAME_FORMAT = ".{name}.fre-tmp{index}"
+
+
+def _join(relative_dir: str, name: str) -> str:
+    return os.path.join(relative_dir, name) if relative_dir else name
+
+
+def resolve_renames(renames: Sequence[Tuple[str, str]], existing: Set[str],
+                    relative_dir: str = "", casefold: bool = False) -> Tuple[List[bool], List[RenameStep]]:
+    """解析一个目录内的重命名
+
+    Args:
+        renames: (原文件名, 新文件名) 列表，原文件名与新文件名不同
+        existing: 目录中当前存在的全部条目名
+        relative_dir: 生成步骤时添加到文件名前的相对目录
+        casefold: 文件系统不区分大小写（或无法确定）时为 True，文件名按 casefold 比较
+
+    Returns:
+        (每个重命名是否可执行, 按执行顺序排列的步骤)
+    """
+    count = len(renames)
+    if casefold:
+        existing = {name.casefold() for name in existing}
+        keys = [(old.casefold(), new.casefold()) for old, new in renames]
+    else:
+        keys = renames
+    source_index = {old: i for i, (old, _) in enumerate(keys)}
+
+    # 同一目标名只保留第一个重命名
+    claimed = set()
+    base_ok = [False] * count
+    next_of: List[Optional[int]] = [None] * count
+    for i, (_, new) in enumerate(keys):
+        if new in claimed:
+            continue
+        claimed.add(new)
+        next_of[i] = source_index.get(new)
+        # 目标名已被非待重命名的条目占用
+        base_ok[i] = next_of[i] is not None or new not in existing
+
+    # 沿链求解可执行性：0 未访问，1 访问中，2 已确定
+    state = [0] * count
+    viable = [False] * count
+    in_cycle = [False] * count
+    cycles = []
+    for start in range(count):
+        path = []
+        position = {}
+        i = start
+        while True:
+            if state[i] == 2:
+                result = viable[i]
+                break
+            if state[i] == 1:
+                cycle = path[position[i]:]
+                del path[position[i]:]
+                result = all(base_ok[c] for c in cycle)
+                for c in cycle:
+                    viable[c] = result
+                    in_cycle[c] = True
+                    state[c] = 2
+                if result:
+                    cycles.append(cycle)
+                break
+            state[i] = 1
+            position[i] = len(path)
+            path.append(i)
+            if not base_ok[i]:
+                result = False
+                break
+            if next_of[i] is None:
+                result = True
+                break
+            i = next_of[i]
+
+        for c in path:
+            viable[c] = result
+            state[c] = 2
+
+    steps = _schedule(renames, existing, relative_dir, viable, next_of, in_cycle, cycles, casefold)
+    return viable, steps
+
+
+def _schedule(renames, existing, relative_dir, viable, next_of, in_cycle, cycles, casefold) -> List[RenameStep]:
+    """按依赖顺序生成执行步骤"""
+    count = len(renames)
+    steps = []
+    emitted = [False] * count
+    cycle_of = {}
+    for cycle in cycles:
+        for c in cycle:
+            cycle_of[c] = cycle
+    used_temp_names = set()
+
+    def requires_of(i):
+        nxt = next_of[i]
+        return _join(relative_dir, renames[nxt][0]) if nxt is not None else None
+
+    def emit(i):
+        old, new = renames[i]
+        steps.append(RenameStep(_join(relative_dir, old), _join(relative_dir, new),
+                                _join(relative_dir, old), _join(relative_dir, new), True, requires_of(i)))
+        emitted[i] = True
+
+    def emit_cycle(cycle):
+        # 先把环首移到临时文件名，再逆序执行环中其余重命名，最后把临时文件移到目标名
+        head = cycle[0]
+        head_old, head_new = renames[head]
+        temp_name = _temp_name(head_old, existing, used_temp_names, casefold)
+        temp_path = _join(relative_dir, temp_name)
+        steps.append(RenameStep(_join(relative_dir, head_old), temp_path,
+                                _join(relative_dir, head_old), _join(relative_dir, head_new), False, None))
+        for c in reversed(cycle[1:]):
+            emit(c)
+        steps.append(RenameStep(temp_path, _join(relative_dir, head_new),
+                                _join(relative_dir, head_old), _join(relative_dir, head_new), True,
+                                requires_of(head)))
+        emitted[head] = True
+
+    for start in range(count):
+        if not viable[start] or emitted[start]:
+            continue
+        chain = []
+        i = start
+        while i is not None and not emitted[i]:
+            if in_cycle[i]:
+                emit_cycle(cycle_of[i])
+                break
+            chain.append(i)
+            i = next_of[i]
+        for c in reversed(chain):
+            emit(c)
+
+    return steps
+
+
+def _temp_name(name: str, existing: Set[str], used: Set[str], casefold: bool = False) -> str:
+    """生成目录中不存在的临时文件名（casefold 为 True 时 existing 为 casefold 后的文件名）"""
+    index = 0
+    while True:
+        candidate = TEMP_NAME_FORMAT.format(name=name, index=index or "")
+        key = candidate.casefold() if casefold else candidate
+        if key not in existing and key not in used:
+            used.add(key)
+            return candidate
+        index += 1
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+重命名日志 - 执行前写入的预写日志，用于撤销或继续中断的重命名
+
+日志为 JSON Lines 文件，每行一条记录：
+    begin       日志头：工作路径、步骤数、批大小
+    steps       执行步骤（每行一批）
+    ready       全部步骤已落盘，此后才开始重命名
+    done        一批已处理步骤的完成/失败序号，以及处理到的位置 next
+    reverted    循环中途失败时已还原的步骤序号（之前记为完成，改记为失败）
+    end         执行完成
+    undo_begin  开始撤销，记录按撤销顺序排列的步骤序号
+    undone      一批已撤销步骤的序号及撤销处理到的位置 next
+    undo_end    撤销完成
+
+完成记录按批写入并 fsync，而不是每个文件一次。崩溃后只有最后一批
+（最多 batch_size 个步骤）的状态未知，恢复时只需检查这部分文件。
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import List, Optional, Sequence, Set
+
+from core.conflict_resolver import RenameStep
+from utils.atomic_file import fsync_directory
+
+
+# 日志格式版本
+JOURNAL_VERSION = 1
+
+# 每行 steps 记录包含的步骤数
+STEPS_PER_LINE = 10000
+
+# 异步执行时已完成但尚未交给日志记录的步骤数上限（见 core/async_executor.py），
+# 这些步骤可能乱序完成，恢复时与最后一批一起检查
+MAX_PENDING_STEPS = 512
+
+
+class RenameJournal:
+    """重命名日志写入器"""
+
+    # 默认日志目录
+    journal_dir = os.path.join(os.path.expanduser("~"), ".file_rename_editor", "journals")
+
+    # 每批记录的最大步骤数和最长间隔（秒）
+    batch_size = 1000
+    sync_interval = 1.0
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self._file = None
+        self._next = 0
+        self._ok = []
+        self._failed = []
+        self._last_sync = 0.0
+        self._record_type = "done"
+        # 已写入的字节数（按 UTF-8 计）
+        self.bytes_written = 0
+
+    @classmethod
+    def default_path(cls, work_path: str) -> str:
+        """工作目录对应的日志文件路径"""
+        digest = hashlib.sha1(os.path.abspath(work_path).encode("utf-8", "surrogatepass")).hexdigest()
+        return os.path.join(cls.journal_dir, f"{digest[:16]}.journal")
+
+    def _write_line(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._file.write(line)
+        self.bytes_written += len(line.encode("utf-8", "surrogatepass"))
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def begin(self, work_path: str, steps: Sequence[RenameStep]):
+        """写入日志头和全部步骤，落盘后才允许开始重命名"""
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file = open(self.journal_path, "w", encoding="utf-8")
+        self._write_line({
+            "t": "begin",
+            "version": JOURNAL_VERSION,
+            "path": os.path.abspath(work_path),
+            "count": len(steps),
+            "batch": self.batch_size,
+            "created_at": time.time(),
+        })
+        for start in range(0, len(steps), STEPS_PER_LINE):
+            self._write_line({"t": "steps", "start": start,
+                              "items": [list(step) for step in steps[start:start + STEPS_PER_LINE]]})
+        self._write_line({"t": "ready"})
+        self._sync()
+        if directory:
+            fsync_directory(directory)
+
+        self._record_type = "done"
+        self._next = 0
+
+    def begin_undo(self, order: List[int]):
+        """开始撤销，order 为按撤销顺序排列的步骤序号"""
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._write_line({"t": "undo_begin", "order": order})
+        self._sync()
+        self._record_type = "undone"
+        self._next = 0
+
+    def resume(self, next_position: int, undo: bool):
+        """继续写入中断的执行或撤销记录"""
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._record_type = "undone" if undo else "done"
+        self._next = next_position
+
+    def record(self, index: int, ok: bool):
+        """记录一个步骤的处理结果，累积到一批后统一落盘"""
+        (self._ok if ok else self._failed).append(index)
+        self._next += 1
+        if (len(self._ok) + len(self._failed) >= self.batch_size
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.flush()
+
+    def flush(self):
+        """写入并落盘尚未记录的结果"""
+        if self._file is None or not (self._ok or self._failed):
+            return
+        self._write_line({"t": self._record_type, "next": self._next,
+                          "ok": self._ok, "failed": self._failed})
+        self._ok = []
+        self._failed = []
+        self._sync()
+
+    def revert(self, indices: List[int]):
+        """记录已还原的步骤 - 这些步骤之前记为完成，还原后改为失败"""
+        if self._file is None or not indices:
+            return
+        self.flush()
+        self._write_line({"t": "reverted", "undo": self._record_type == "undone", "items": indices})
+        self._sync()
+
+    def finish(self):
+        """写入结束记录"""
+        self.flush()
+        self._write_line({"t": "end" if self._record_type == "done" else "undo_end"})
+        self._sync()
+        self.close()
+
+    def close(self):
+        """关闭日志文件（未写结束记录时，日志保持中断状态）"""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+class JournalState:
+    """从日志恢复的执行状态"""
+
+    def __init__(self, journal_path: str, work_path: str, steps: List[RenameStep], batch: int):
+        self.journal_path = journal_path
+        self.work_path = work_path
+        self.steps = steps
+        self.batch = batch
+
+        self.ready = False
+        self.finished = False
+        self.done: Set[int] = set()
+        self.failed: Set[int] = set()
+        self.next = 0
+
+        self.undo_order: Optional[List[int]] = None
+        self.undo_finished = False
+        self.undone: Set[int] = set()
+        self.undo_failed: Set[int] = set()
+        self.undo_next = 0
+
+    @classmethod
+    def load(cls, journal_path: str) -> Optional["JournalState"]:
+        """读取日志文件，文件不存在或步骤未完整写入时返回 None"""
+        try:
+            f = open(journal_path, "r", encoding="utf-8")
+        except OSError:
+            return None
+
+        state = None
+        steps = []
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时可能留下不完整的最后一行
+                    break
+                kind = record.get("t")
+                if kind == "begin":
+                    state = cls(journal_path, record["path"], steps, record.get("batch", RenameJournal.batch_size))
+                elif state is None:
+                    return None
+                elif kind == "steps":
+                    steps.extend(RenameStep(*item) for item in record["items"])
+                elif kind == "ready":
+                    state.ready = True
+                elif kind == "done":
+                    state.done.update(record["ok"])
+                    state.failed.update(record["failed"])
+                    state.next = record["next"]
+                elif kind == "reverted":
+                    if record.get("undo"):
+                        state.undone.difference_update(record["items"])
+                        state.undo_failed.update(record["items"])
+                    else:
+                        state.done.difference_update(record["items"])
+                        state.failed.update(record["items"])
+                elif kind == "end":
+                    state.finished = True
+                elif kind == "undo_begin":
+                    state.undo_order = record["order"]
+                elif kind == "undone":
+                    state.undone.update(record["ok"])
+                    state.undo_failed.update(record["failed"])
+                    state.undo_next = record["next"]
+                elif kind == "undo_end":
+                    state.undo_finished = True
+
+        if state is None or not state.ready:
+            return None
+        return state
+
+    def is_interrupted(self) -> bool:
+        """执行或撤销是否中途中断"""
+        if self.undo_order is not None:
+            return not self.undo_finished
+        return not self.finished
+
+    def _probe_window(self, order: Sequence[int], start: int, steps: Sequence[RenameStep],
+                      known: Set[int]) -> Set[int]:
+        """检查最后一批未落盘记录的步骤是否已实际执行
+
+        逆序检查：若后面已执行的步骤移入了本步骤的原路径，或移走了本步骤的
+        目标路径（临时文件名），则本步骤必然已执行；否则根据文件是否存在判断。
+        """
+        window = [i for i in order[start:start + self.window] if i not in known]
+        executed = set()
+        moved_into = set()
+        moved_from = set()
+        for i in reversed(window):
+            step = steps[i]
+            full_source = os.path.join(self.work_path, step.source)
+            full_target = os.path.join(self.work_path, step.target)
+            if (step.source in moved_into or step.target in moved_from
+                    or (not os.path.lexists(full_source) and os.path.lexists(full_target))):
+                executed.add(i)
+                moved_into.add(step.target)
+                moved_from.add(step.source)
+        return executed
+
+    @property
+    def window(self) -> int:
+        """恢复时需要检查的步骤数：最后一批未落盘的记录，以及异步执行时尚未记录的步骤"""
+        return self.batch + MAX_PENDING_STEPS
+
+    def recover(self):
+        """补全最后一批未落盘的执行/撤销记录
+
+        之后从第一个未处理的步骤继续：异步执行时步骤可能乱序完成，
+        检查范围内未执行的步骤之后可能有已执行的步骤。
+        """
+        if not self.finished:
+            known = self.done | self.failed
+            self.done |= self._probe_window(range(len(self.steps)), self.next, self.steps, known)
+            processed = self.done | self.failed
+            self.next = next((i for i in range(self.next, len(self.steps)) if i not in processed),
+                             len(self.steps))
+
+        if self.undo_order is not None and not self.undo_finished:
+            start = self.undo_next
+            window = self.undo_order[start:start + self.window]
+            known = self.undone | self.undo_failed
+            reversed_steps = {i: reverse_step(self.steps[i]) for i in window}
+            self.undone |= self._probe_window(self.undo_order, start, reversed_steps, known)
+            processed = self.undone | self.undo_failed
+            self.undo_next = next((offset for offset, i in enumerate(window, start) if i not in processed),
+                                  start + len(window))
+
+    def remaining_steps(self) -> List[int]:
+        """尚未执行的步骤序号"""
+        return [i for i in range(self.next, len(self.steps)) if i not in self.done and i not in self.failed]
+
+    def vacated_sources(self) -> Set[str]:
+        """已执行步骤腾出的原路径"""
+        return {self.steps[i].source for i in self.done}
+
+    def steps_to_undo(self) -> List[int]:
+        """需要撤销的步骤序号（按撤销顺序）"""
+        if self.undo_order is not None:
+            return [i for i in self.undo_order[self.undo_next:]
+                    if i not in self.undone and i not in self.undo_failed]
+        return sorted(self.done, reverse=True)
+
+
+def reverse_step(step: RenameStep) -> RenameStep:
+    """撤销步骤：目标移回原路径，临时文件名步骤的完成标记随之互换"""
+    temp_out = step.final and step.source != step.old_name
+    return RenameStep(step.target, step.source, step.new_name, step.old_name, not temp_out, None)
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+映射匹配引擎 - 基于 Aho-Corasick 自动机的多模式替换
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class MappingMatcher:
+    """映射匹配器 - 由映射字典一次性编译，每个文件名只需一次从左到右的扫描
+
+    默认采用单次扫描语义：在同一位置取最长匹配，按从左到右的顺序替换，
+    替换结果不会再被其他规则匹配。sequential=True 时保持旧版按字典顺序
+    逐条 str.replace 的语义（前面的替换结果可能被后面的规则再次替换）。
+
+    case_sensitive=False 时自动机由 casefold 后的查找内容构建，匹配时对
+    文件名整体 casefold 一次，再把匹配位置映射回原文件名，未匹配的部分
+    保持原样。忽略大小写后相同的查找内容只有第一条生效。
+    """
+
+    def __init__(self, mappings: Dict[str, str], sequential: bool = False, case_sensitive: bool = True):
+        self.sequential = sequential
+        self.case_sensitive = case_sensitive
+        self._keys = list(mappings.keys())
+        self._values = [mappings[key] for key in self._keys]
+
+        # 空查找内容在 str.replace 中会匹配任意位置，只在顺序模式下保留其语义
+        self._empty_key_index = self._keys.index("") if "" in mappings else None
+
+        self._build_automaton()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _build_automaton(self):
+        """构建 goto / fail / 输出链接表"""
+        goto = [{}]
+        terminal = [-1]
+        depth = [0]
+
+        for index, key in enumerate(self._keys):
+            if not key:
+                continue
+            state = 0
+            for ch in (key if self.case_sensitive else key.casefold()):
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    terminal.append(-1)
+                    depth.append(depth[state] + 1)
+                state = next_state
+            if terminal[state] < 0:
+                terminal[state] = index
+
+        fail = [0] * len(goto)
+        output_link = [0] * len(goto)
+
+        # 按层次遍历计算失配指针和输出链接
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(ch, 0)
+                fail[child] = target if target != child else 0
+                output_link[child] = fail[child] if terminal[fail[child]] >= 0 else output_link[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._terminal = terminal
+        self._depth = depth
+        self._output_link = output_link
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """遍历文本中的所有匹配，产生 (起始位置, 长度, 规则序号)，位置和长度均相对于原文本"""
+        if self.case_sensitive:
+            return self._scan(text)
+
+        folded = text.casefold()
+        # 每个字符 casefold 后至少一个字符，总长度不变时逐字符一一对应
+        if len(folded) == len(text):
+            return self._scan(folded)
+        return self._iter_expanded_matches(text)
+
+    def _iter_expanded_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """个别字符 casefold 后变长（如 ß -> ss）时，把匹配映射回原文本
+
+        只保留起止都落在原字符边界上的匹配，例如查找内容 "s" 不会匹配 "ß" 的一半。
+        """
+        folded_chars = [ch.casefold() for ch in text]
+        # casefold 后的位置 -> 原文本位置，不是原字符起点的位置为 -1
+        boundary = []
+        for pos, chars in enumerate(folded_chars):
+            boundary.append(pos)
+            boundary.extend([-1] * (len(chars) - 1))
+        boundary.append(len(text))
+
+        for start, length, index in self._scan("".join(folded_chars)):
+            original_start = boundary[start]
+            original_end = boundary[start + length]
+            if original_start >= 0 and original_end >= 0:
+                yield original_start, original_end - original_start, index
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """在（不区分大小写时已 casefold 的）文本上运行自动机"""
+        goto = self._goto
+        fail = self._fail
+        terminal = self._terminal
+        depth = self._depth
+        output_link = self._output_link
+
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            match_state = state if terminal[state] >= 0 else output_link[state]
+            while match_state:
+                length = depth[match_state]
+                yield pos + 1 - length, length, terminal[match_state]
+                match_state = output_link[match_state]
+
+    def apply(self, filename: str) -> str:
+        """对文件名应用全部映射"""
+        if not self._keys:
+            return filename
+        if self.sequential:
+            return self._apply_sequential(filename)
+        return self._apply_single_pass(filename)
+
+    def _apply_single_pass(self, text: str) -> str:
+        """单次扫描替换 - 最左最长匹配，互不重叠"""
+        best = {}
+        for start, length, index in self.iter_matches(text):
+            current = best.get(start)
+            if current is None or length > current[0]:
+                best[start] = (length, index)
+
+        if not best:
+            return text
+
+        parts = []
+        last = 0
+        for start in sorted(best):
+            if start < last:
+                continue
+            length, index = best[start]
+            parts.append(text[last:start])
+            parts.append(self._values[index])
+            last = start + length
+        parts.append(text[last:])
+
+        return "".join(parts)
+
+    def _first_rule_index(self, text: str, lower_bound: int) -> Optional[int]:
+        """返回在文本中出现的、序号不小于 lower_bound 的第一条规则"""
+        first = None
+        for _, _, index in self.iter_matches(text):
+            if index >= lower_bound and (first is None or index < first):
+                first = index
+
+        empty = self._empty_key_index
+        if empty is not None and empty >= lower_bound and (first is None or empty < first):
+            first = empty
+
+        return first
+
+    def _apply_sequential(self, text: str) -> str:
+        """顺序替换 - 与逐条 str.replace 结果一致
+
+        文本只会在某条规则实际生效时改变，因此可以用自动机直接跳到下一条
+        会生效的规则，而无需逐条检查未出现的规则。
+        """
+        result = text
+        index = self._first_rule_index(result, 0)
+        while index is not None:
+            result = self._replace(result, index)
+            index = self._first_rule_index(result, index + 1)
+
+        return result
+
+    def _replace(self, text: str, index: int) -> str:
+        """替换一条规则的全部匹配 - 不区分大小写时与 str.replace 一样从左到右、互不重叠"""
+        key = self._keys[index]
+        if self.case_sensitive or not key:
+            return text.replace(key, self._values[index])
+
+        parts = []
+        last = 0
+        for start, length, _ in sorted(match for match in self.iter_matches(text) if match[2] == index):
+            if start < last:
+                continue
+            parts.append(text[last:start])
+            parts.append(self._values[index])
+            last = start + length
+        parts.append(text[last:])
+        return "".join(parts)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+文件名倒排索引 - 按 n-gram 快速找出包含某个子串的文件名
+
+映射规则改变时，单次扫描语义下只有文件名中出现了被改动的查找内容的
+文件才可能受影响。用 bigram（两个字符，对中文文件名同样有效）建立
+倒排表，查询时取子串中最少见的几个 bigram 的倒排表求交集，再逐个
+确认，避免对每条改动的规则扫描全部文件名。
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Set
+
+
+# n-gram 长度
+GRAM_SIZE = 2
+
+# 查询时最多参与求交集的倒排表数量
+MAX_INTERSECT = 3
+
+
+class NGramIndex:
+    """文件名的 n-gram 倒排索引，支持增删文件名
+
+    casefold=True 时按 casefold 后的文件名建立索引，查找时忽略大小写。
+    """
+
+    def __init__(self, names: Iterable[str] = (), casefold: bool = False):
+        self.casefold = casefold
+        # 文件序号 -> 文件名，删除后置为 None
+        self._names: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        self._removed = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def add(self, name: str):
+        """加入文件名"""
+        if name in self._ids:
+            return
+        file_id = len(self._names)
+        self._names.append(name)
+        self._ids[name] = file_id
+        postings = self._postings
+        text = name.casefold() if self.casefold else name
+        for gram in {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}:
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("i")
+            posting.append(file_id)
+
+    def remove(self, name: str):
+        """移除文件名 - 倒排表中的序号在删除过多时统一重建"""
+        file_id = self._ids.pop(name, None)
+        if file_id is None:
+            return
+        self._names[file_id] = None
+        self._removed += 1
+        if self._removed > len(self._ids):
+            self._rebuild()
+
+    def _rebuild(self):
+        names = list(self._ids)
+        self._names = []
+        self._ids = {}
+        self._postings = {}
+        self._removed = 0
+        for name in names:
+            self.add(name)
+
+    def search(self, substring: str) -> List[str]:
+        """包含 substring 的全部文件名"""
+        names = self._names
+        casefold = self.casefold
+        if casefold:
+            substring = substring.casefold()
+        if len(substring) < GRAM_SIZE:
+            return [name for name in self._ids if substring in (name.casefold() if casefold else name)]
+
+        postings = []
+        for gram in {substring[i:i + GRAM_SIZE] for i in range(len(substring) - GRAM_SIZE + 1)}:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:MAX_INTERSECT]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+
+        result = []
+        for file_id in candidates:
+            name = names[file_id]
+            if name is not None and substring in (name.casefold() if casefold else name):
+                result.append(name)
+        return result
+
+    def search_any(self, substrings: Iterable[str]) -> Set[str]:
+        """包含任意一个子串的全部文件名"""
+        result = set()
+        for substring in substrings:
+            result.update(self.search(substring))
+        return result
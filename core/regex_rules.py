@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+正则替换规则 - 把一组正则规则编译为尽量少的组合模式，一次扫描完成替换
+
+规则保存在配置的 regex_rules 字段中：[{"pattern": 模式, "replacement": 替换内容}, ...]，
+替换内容使用 re.sub 的模板语法（\\1、\\g<name>）引用捕获分组。
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# 模式中引用了自身的分组（\1、(?P=name)、(?(1)...)）时不能与其他规则组合，组合后分组编号会改变
+_GROUP_REFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+# 没有内联全局标志（如 (?i)）的模式的 flags，带全局标志的模式会影响组合中的其他规则
+_DEFAULT_FLAGS = re.compile("").flags
+
+# 替换模板中的转义：1 为 \g<分组>，2 为八进制转义（\0、\012、\101），3 为 \1 ~ \99 分组引用，其余为普通转义
+_TEMPLATE_ESCAPE = re.compile(r"\\(?:g<([^>]*)>|(0[0-7]{0,2}|[1-7][0-7]{2})|([1-9][0-9]?)|.)", re.S)
+
+# 对空字符串执行一次替换，用于按 re 的规则处理模板中不含分组引用的部分（\n、\\ 等转义）
+_EMPTY = re.compile("")
+
+
+def normalize_regex_rules(value: Any) -> List[Tuple[str, str]]:
+    """把配置中的 regex_rules 转换为 (模式, 替换内容) 列表，忽略格式不正确或模式为空的条目"""
+    rules = []
+    for item in value or ():
+        if isinstance(item, dict):
+            pattern, replacement = item.get("pattern"), item.get("replacement", "")
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            pattern, replacement = item
+        else:
+            continue
+        if isinstance(pattern, str) and pattern and isinstance(replacement, str):
+            rules.append((pattern, replacement))
+    return rules
+
+
+def compile_regex_rule(pattern: str, replacement: str = "") -> "re.Pattern":
+    """编译单条规则并检查替换内容中的分组引用，无效时抛出 ValueError"""
+    try:
+        compiled = re.compile(pattern)
+        # 没有匹配时 sub 也会解析模板，可以提前发现不存在的分组
+        compiled.sub(replacement, "")
+    except (re.error, IndexError) as e:
+        raise ValueError(f"正则规则无效: '{pattern}' -> '{replacement}' ({e})") from e
+    return compiled
+
+
+def _compile_template(pattern: "re.Pattern", replacement: str, offset: int) -> str:
+    """把替换模板转换为 str.format 格式串，第 k 个分组对应位置参数 offset + k
+
+    Match.expand 每次调用都要重新解析模板；转换后展开只需一次 format。
+    """
+    parts = []
+    last = 0
+    for escape in _TEMPLATE_ESCAPE.finditer(replacement):
+        name, _, number = escape.groups()
+        if name is None and number is None:
+            continue
+        literal = _EMPTY.sub(replacement[last:escape.start()], "")
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if number is None:
+            number = int(name) if name.isdigit() else pattern.groupindex[name]
+        parts.append(f"{{{offset + int(number)}}}")
+        last = escape.end()
+    literal = _EMPTY.sub(replacement[last:], "")
+    parts.append(literal.replace("{", "{{").replace("}", "}}"))
+    return "".join(parts)
+
+
+class _RuleGroup:
+    """一次搜索的模式：多条规则的组合，或一条不能组合的规则"""
+
+    __slots__ = ("pattern", "owners", "first")
+
+    def __init__(self, pattern: "re.Pattern", owners: Optional[Dict[int, int]], first: int):
+        self.pattern = pattern
+        # 组合模式中外层分组编号 -> 规则序号；单条规则时为 None
+        self.owners = owners
+        self.first = first
+
+    def rule_index(self, match: "re.Match") -> int:
+        # 外层分组最后闭合，lastindex 即为匹配的规则的外层分组
+        return self.owners[match.lastindex] if self.owners else self.first
+
+
+class RegexMatcher:
+    """正则规则匹配器 - 每组规则只编译一次
+
+    默认采用单次扫描语义（与映射的单次扫描替换一致）：从左到右取最早出现
+    的匹配，同一位置按规则顺序取第一条，替换结果不会再被其他规则匹配。
+    为此把可以安全组合的相邻规则合并为一个 (规则1)|(规则2)|... 模式，
+    通常整组规则只需一次 sub；带内联全局标志或引用自身分组的规则单独
+    搜索，再与组合模式的结果按位置合并。sequential=True 时按顺序对每条
+    规则执行 re.sub，前面的替换结果可能被后面的规则再次替换。
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str]], sequential: bool = False):
+        self.sequential = sequential
+        self._patterns = []
+        self._replacements = []
+        # 单次扫描时替换内容的 format 格式串，替换内容不含反斜杠（普通文本）时为 None
+        self._formats = []
+        for index, (pattern, replacement) in enumerate(rules):
+            try:
+                self._patterns.append(compile_regex_rule(pattern, replacement))
+            except ValueError as e:
+                raise ValueError(f"第 {index + 1} 条{e}") from e
+            self._replacements.append(replacement)
+            self._formats.append(None)
+
+        self._groups = [] if sequential else self._combine()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    @property
+    def search_count(self) -> int:
+        """单次扫描时每个文件名需要的搜索次数（组合后的模式数）"""
+        return len(self._groups)
+
+    def _combinable(self, index: int) -> bool:
+        pattern = self._patterns[index]
+        return pattern.flags == _DEFAULT_FLAGS and not _GROUP_REFERENCE.search(pattern.pattern)
+
+    def _set_format(self, index: int, offset: int):
+        """编译规则的替换模板，offset 为规则在所属模式中的外层分组编号"""
+        replacement = self._replacements[index]
+        if "\\" in replacement:
+            self._formats[index] = _compile_template(self._patterns[index], replacement, offset)
+
+    def _combine(self) -> List[_RuleGroup]:
+        """把相邻的可组合规则合并为组合模式，分组名称重复时另起一组"""
+        groups = []
+        members: List[int] = []
+        names = set()
+
+        def single(index: int):
+            self._set_format(index, 0)
+            groups.append(_RuleGroup(self._patterns[index], None, index))
+
+        def flush():
+            if len(members) == 1:
+                single(members[0])
+            elif members:
+                owners = {}
+                parts = []
+                group_number = 1
+                for index in members:
+                    owners[group_number] = index
+                    self._set_format(index, group_number)
+                    parts.append(f"({self._patterns[index].pattern})")
+                    group_number += self._patterns[index].groups + 1
+                groups.append(_RuleGroup(re.compile("|".join(parts)), owners, members[0]))
+            members.clear()
+            names.clear()
+
+        for index, pattern in enumerate(self._patterns):
+            if not self._combinable(index):
+                flush()
+                single(index)
+                continue
+            if names & pattern.groupindex.keys():
+                flush()
+            members.append(index)
+            names.update(pattern.groupindex)
+        flush()
+        return groups
+
+    def _replace(self, group: _RuleGroup, match: "re.Match") -> str:
+        """匹配的替换内容 - 未参与匹配的分组替换为空字符串，与 re.sub 相同"""
+        index = group.rule_index(match)
+        template = self._formats[index]
+        if template is None:
+            return self._replacements[index]
+        return template.format(match.group(0), *match.groups(""))
+
+    def apply(self, filename: str) -> str:
+        """对文件名应用全部正则规则"""
+        if not self._patterns:
+            return filename
+        if self.sequential:
+            for pattern, replacement in zip(self._patterns, self._replacements):
+                filename = pattern.sub(replacement, filename)
+            return filename
+        if len(self._groups) == 1:
+            group = self._groups[0]
+            if group.owners is None:
+                return group.pattern.sub(self._replacements[group.first], filename)
+            return group.pattern.sub(lambda match: self._replace(group, match), filename)
+        return self._apply_merged(filename)
+
+    def _apply_merged(self, text: str) -> str:
+        """分别搜索各组模式，按位置合并结果 - 同一位置取规则序号最小的组"""
+        groups = self._groups
+        # 各组在 pos 之后的下一个匹配，False 表示之后不再有匹配
+        upcoming = [None] * len(groups)
+        parts = []
+        last = 0
+        pos = 0
+        # 与 re.sub 相同，空匹配之后同一位置只允许非空匹配
+        empty_at = -1
+        while pos <= len(text):
+            best = None
+            best_group = None
+            for i, group in enumerate(groups):
+                match = upcoming[i]
+                if match is False:
+                    continue
+                if match is None or match.start() < pos or match.end() == empty_at:
+                    match = group.pattern.search(text, pos)
+                    if match is not None and match.end() == empty_at:
+                        # finditer 在空匹配之后取同一位置的非空匹配或之后的匹配
+                        matches = group.pattern.finditer(text, pos)
+                        next(matches)
+                        match = next(matches, None)
+                    upcoming[i] = match or False
+                    if match is None:
+                        continue
+                if best is None or match.start() < best.start():
+                    best = match
+                    best_group = group
+            if best is None:
+                break
+
+            start, end = best.span()
+            parts.append(text[last:start])
+            parts.append(self._replace(best_group, best))
+            last = end
+            pos = end
+            empty_at = end if end == start else -1
+
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+重命名计划 - 预览和执行共享的不可变重命名列表
+"""
+
+import itertools
+import os
+import time
+from collections import Counter, namedtuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.conflict_resolver import RenameStep, resolve_renames
+from core.name_index import NGramIndex
+
+
+# 计划条目状态
+STATUS_CHANGED = "changed"
+STATUS_UNCHANGED = "unchanged"
+STATUS_CONFLICT = "conflict"
+
+# 目录修改时间的最大精度（FAT 为 2 秒），快照时间距 mtime 太近时无法可靠判断目录是否变化
+MTIME_GRANULARITY_NS = 2_000_000_000
+
+PlanEntry = namedtuple("PlanEntry", ["old_name", "new_name", "status"])
+
+
+class DirectorySnapshot:
+    """目录快照 - 记录目录的设备号、inode 和修改时间"""
+
+    __slots__ = ("path", "device", "inode", "mtime_ns", "taken_at_ns")
+
+    def __init__(self, path: str, device: int, inode: int, mtime_ns: int, taken_at_ns: int):
+        self.path = path
+        self.device = device
+        self.inode = inode
+        self.mtime_ns = mtime_ns
+        self.taken_at_ns = taken_at_ns
+
+    @classmethod
+    def capture(cls, path: str) -> "DirectorySnapshot":
+        """获取目录当前快照"""
+        taken_at_ns = time.time_ns()
+        return cls.from_stat(path, os.stat(path), taken_at_ns)
+
+    @classmethod
+    def from_stat(cls, path: str, st: os.stat_result, taken_at_ns: int) -> "DirectorySnapshot":
+        """由已获取的 stat 结果创建快照"""
+        return cls(os.path.abspath(path), st.st_dev, st.st_ino, st.st_mtime_ns, taken_at_ns)
+
+    def key(self) -> Tuple[str, int, int, int]:
+        return (self.path, self.device, self.inode, self.mtime_ns)
+
+    def is_reliable(self) -> bool:
+        """快照时间是否足够晚于目录修改时间，能够检测到之后的变化"""
+        return self.taken_at_ns - self.mtime_ns > MTIME_GRANULARITY_NS
+
+
+class RenamePlan:
+    """重命名计划 - 由控制器一次生成，预览展示的就是执行的内容"""
+
+    def __init__(self, path: str, entries: Iterable[PlanEntry],
+                 snapshots: Iterable[DirectorySnapshot], rules: Dict[str, Any],
+                 steps: Iterable[RenameStep] = ()):
+        self._path = path
+        # 包含子文件夹时，条目的文件名为相对于 path 的路径
+        self._entries = tuple(entries)
+        # 计划涉及的每个目录的快照
+        self._snapshots = tuple(snapshots)
+        self._rules = rules
+        # 有变化条目的执行步骤，已按依赖顺序排列（含打断循环用的临时文件名步骤）
+        self._steps = tuple(steps)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def entries(self) -> Tuple[PlanEntry, ...]:
+        return self._entries
+
+    @property
+    def snapshots(self) -> Tuple[DirectorySnapshot, ...]:
+        return self._snapshots
+
+    @property
+    def rules(self) -> Dict[str, Any]:
+        return self._rules
+
+    @property
+    def steps(self) -> Tuple[RenameStep, ...]:
+        return self._steps
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[PlanEntry]:
+        return iter(self._entries)
+
+    def count(self, status: str) -> int:
+        """统计指定状态的条目数量"""
+        return sum(1 for entry in self._entries if entry.status == status)
+
+    def is_current(self, path: str, rules: Dict[str, Any]) -> bool:
+        """计划是否仍然适用 - 规则相同且所有目录快照均未变化"""
+        if os.path.abspath(path) != os.path.abspath(self._path):
+            return False
+        if rules != self._rules:
+            return False
+        return self.directories_unchanged()
+
+    def directories_unchanged(self) -> bool:
+        """计划涉及的所有目录自生成计划后是否确定未发生变化"""
+        if not self._snapshots:
+            return False
+
+        for snapshot in self._snapshots:
+            if not snapshot.is_reliable():
+                return False
+            try:
+                current = DirectorySnapshot.capture(snapshot.path)
+            except OSError:
+                return False
+            if current.key() != snapshot.key():
+                return False
+
+        return True
+
+
+class DirectoryPlan:
+    """单个目录的计划条目和执行步骤，目录条目或新文件名变化时尽量只做局部更新
+
+    只有与其他重命名没有任何关联的变化才能局部更新：新增文件不是任何
+    重命名的目标、其新文件名也没有被占用；删除的文件不在重命名链或
+    循环中。其余情况由调用方重新生成整个目录的计划。
+    """
+
+    def __init__(self, relative_dir: str = "", casefold: bool = False):
+        self.relative_dir = relative_dir
+        # 文件系统不区分大小写（或无法确定）时按 casefold 比较文件名，此时不做局部更新
+        self.casefold = casefold
+        # 目录版本号，由调用方维护
+        self.version: Optional[int] = None
+        # 文件名 -> 新文件名（保持目录顺序）
+        self.new_names: Dict[str, str] = {}
+        # 文件以外的条目名（子目录等）
+        self.others: Set[str] = set()
+        # 文件名 -> 计划条目
+        self.entries: Dict[str, PlanEntry] = {}
+        self.steps: List[RenameStep] = []
+
+        # 有变化的文件的新文件名计数
+        self._targets = Counter()
+        # 只包含一个独立步骤的重命名（原文件名）
+        self._standalone: Set[str] = set()
+        # 步骤中使用的临时文件名
+        self._temp_names: Set[str] = set()
+        # 文件名倒排索引，第一次按子串查找时建立
+        self._name_index: Optional[NGramIndex] = None
+
+    def _join(self, name: str) -> str:
+        return os.path.join(self.relative_dir, name) if self.relative_dir else name
+
+    def _entry(self, file: str, new_name: str, status: str) -> PlanEntry:
+        if self.relative_dir:
+            return PlanEntry(self._join(file), self._join(new_name), status)
+        return PlanEntry(file, new_name, status)
+
+    def files_containing(self, substrings: Iterable[str], casefold: bool = False) -> Set[str]:
+        """文件名中包含任意一个子串的文件，casefold 为 True 时忽略大小写"""
+        if self._name_index is None or self._name_index.casefold != casefold:
+            self._name_index = NGramIndex(self.new_names, casefold)
+        return self._name_index.search_any(substrings)
+
+    def rebuild(self, names: Iterable[Tuple[str, str]], others: Iterable[str]):
+        """根据 (原文件名, 新文件名) 列表和其他条目名重新生成整个目录的计划"""
+        new_names = dict(names)
+        others = set(others).difference(new_names)
+        existing = others.union(new_names)
+        renames = [(file, new_name) for file, new_name in new_names.items() if file != new_name]
+
+        # 解析重命名链和循环，目标名被占用且无法腾出的标记为冲突
+        viable, steps = resolve_renames(renames, existing, self.relative_dir, self.casefold)
+        viable = iter(viable)
+        if self.casefold:
+            existing = {name.casefold() for name in existing}
+
+        targets = Counter(new_name for _, new_name in renames)
+        standalone = set()
+        entries = {}
+        for file, new_name in new_names.items():
+            if file == new_name:
+                status = STATUS_UNCHANGED
+            elif next(viable):
+                status = STATUS_CHANGED
+                if (new_name.casefold() if self.casefold else new_name) not in existing and file not in targets:
+                    standalone.add(file)
+            else:
+                status = STATUS_CONFLICT
+            entries[file] = self._entry(file, new_name, status)
+
+        temp_names = {step.target for step in steps if not step.final}
+
+        name_index = self._name_index
+        if name_index is not None:
+            for file in self.new_names:
+                if file not in new_names:
+                    name_index.remove(file)
+            for file in new_names:
+                name_index.add(file)
+
+        self.new_names = new_names
+        self.others = others
+        self.entries = entries
+        self.steps = steps
+        self._targets = targets
+        self._standalone = standalone
+        self._temp_names = temp_names
+
+    def update(self, added: List[Tuple[str, str]] = (), removed: List[str] = (),
+               added_others: Iterable[str] = (), removed_others: Iterable[str] = (),
+               changed: List[Tuple[str, str]] = ()) -> bool:
+        """局部更新
+
+        Args:
+            added: 新增文件的 (原文件名, 新文件名)
+            removed: 删除的文件名
+            added_others / removed_others: 新增/删除的其他条目名
+            changed: 新文件名改变的已有文件的 (原文件名, 新文件名)，保持原位置
+
+        变化与其他重命名有关联时不做任何修改并返回 False；按 casefold 比较文件名时总是返回 False。
+        """
+        if self.casefold:
+            return False
+        added_others = set(added_others)
+        removed_others = set(removed_others)
+        targets = self._targets
+
+        # 删除的文件和新文件名改变的文件，其原有的重命名必须是独立的
+        for file in itertools.chain(removed, (file for file, _ in changed)):
+            new_name = self.new_names[file]
+            if targets[file]:
+                return False
+            if new_name == file:
+                continue
+            # 有其他文件争用同一目标名时，删除后目标名可能改由它们使用
+            if targets[new_name] != 1:
+                return False
+            if file not in self._standalone and self.entries[file].status != STATUS_CONFLICT:
+                return False
+
+        for name in added_others | removed_others:
+            if targets[name] or name in self._temp_names:
+                return False
+
+        existing_after = set(self.new_names).difference(removed)
+        existing_after.update(self.others)
+        existing_after.difference_update(removed_others)
+        existing_after.update(added_others)
+        existing_after.update(file for file, _ in added)
+
+        # 改变的文件原有的目标名不再计入
+        remaining_targets = Counter(self.new_names[file] for file, _ in changed
+                                    if self.new_names[file] != file)
+        new_renames = [(file, new_name) for file, new_name in itertools.chain(added, changed)
+                       if file != new_name]
+        new_targets = Counter(new_name for _, new_name in new_renames)
+        for file, _ in added:
+            if targets[file] or file in self._temp_names:
+                return False
+        for _, new_name in new_renames:
+            if (new_name in existing_after or new_targets[new_name] > 1
+                    or targets[new_name] - remaining_targets[new_name] > 0):
+                return False
+
+        # 全部为局部变化，开始修改
+        removed_paths = set()
+        for file in itertools.chain(removed, (file for file, _ in changed)):
+            new_name = self.new_names[file]
+            if new_name != file:
+                targets[new_name] -= 1
+                if not targets[new_name]:
+                    del targets[new_name]
+            if file in self._standalone:
+                self._standalone.discard(file)
+                removed_paths.add(self._join(file))
+        for file in removed:
+            del self.new_names[file]
+            del self.entries[file]
+        if removed_paths:
+            self.steps = [step for step in self.steps if step.source not in removed_paths]
+
+        self.others.difference_update(removed_others)
+        self.others.update(added_others)
+
+        for file, new_name in itertools.chain(added, changed):
+            self.new_names[file] = new_name
+            if file == new_name:
+                self.entries[file] = self._entry(file, new_name, STATUS_UNCHANGED)
+                continue
+            self.entries[file] = self._entry(file, new_name, STATUS_CHANGED)
+            targets[new_name] += 1
+            self._standalone.add(file)
+            source, target = self._join(file), self._join(new_name)
+            self.steps.append(RenameStep(source, target, source, target, True, None))
+
+        if self._name_index is not None:
+            for file in removed:
+                self._name_index.remove(file)
+            for file, _ in added:
+                self._name_index.add(file)
+
+        return True
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+重命名工作线程 - 在后台线程执行重命名计划，通过线程安全队列报告进度
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.conflict_resolver import RenameStep
+from core.journal import JournalState, RenameJournal, reverse_step
+from core.rename_plan import RenamePlan, STATUS_UNCHANGED, STATUS_CONFLICT
+from utils.stats import PipelineStats, STAGE_JOURNAL, STAGE_RENAME
+
+
+# 事件类型
+EVENT_PROGRESS = "progress"   # (EVENT_PROGRESS, 已处理数, 总数, 已用秒数)
+EVENT_RESULT = "result"       # (EVENT_RESULT, 原文件名, 新文件名, 结果, 错误信息)
+EVENT_DONE = "done"           # (EVENT_DONE, 成功数, 是否已取消, 错误信息)
+EVENT_STATUS = "status"       # (EVENT_STATUS, 状态信息)
+
+# 单个文件的处理结果
+RESULT_RENAMED = "renamed"
+RESULT_UNCHANGED = "unchanged"
+RESULT_EXISTS = "exists"
+RESULT_FAILED = "failed"
+
+
+# 已执行的步骤：(步骤序号, 步骤, 结果, 错误信息, 重命名耗时)，未调用重命名时耗时为 None
+ExecutedStep = Tuple[int, RenameStep, str, Optional[str], Optional[float]]
+
+# 步骤执行器：(工作路径, 步骤, 已腾出的路径, 是否检查目标已存在) -> 按步骤顺序产生的 ExecutedStep
+StepExecutor = Callable[[str, Iterable[Tuple[int, RenameStep]], Set[str], bool], Iterator[ExecutedStep]]
+
+# 依赖的步骤（把环首移到临时文件名）失败时，后续步骤报告的默认错误
+TEMP_NAME_ERROR = "临时文件名已存在"
+REQUIRES_ERROR = "目标文件未能腾出"
+
+
+def execute_step(fs, path: str, step: RenameStep, check_exists: bool) -> Tuple[str, Optional[str], Optional[float]]:
+    """执行单个步骤（不检查依赖），返回 (结果, 错误信息, 重命名耗时)
+
+    fs 提供 rename 和 lexists，为 None 时直接使用 os。
+    """
+    rename, lexists = (os.rename, os.path.lexists) if fs is None else (fs.rename, fs.lexists)
+    if check_exists and step.requires is None and lexists(os.path.join(path, step.target)):
+        return RESULT_EXISTS, None, None
+    start = time.perf_counter()
+    try:
+        rename(os.path.join(path, step.source), os.path.join(path, step.target))
+        result, error = RESULT_RENAMED, None
+    except Exception as e:
+        result, error = RESULT_FAILED, str(e)
+    return result, error, time.perf_counter() - start
+
+
+def execute_steps(path: str, indexed_steps: Iterable[Tuple[int, RenameStep]], vacated: Set[str],
+                  check_exists: bool, fs=None) -> Iterator[ExecutedStep]:
+    """逐个执行步骤 - 依赖的路径尚未腾出时不执行，报告为失败"""
+    temp_errors = {}
+    for index, step in indexed_steps:
+        if step.requires is not None and step.requires not in vacated:
+            result, error, seconds = RESULT_FAILED, temp_errors.get(step.old_name, REQUIRES_ERROR), None
+        else:
+            result, error, seconds = execute_step(fs, path, step, check_exists)
+            if result == RESULT_RENAMED:
+                vacated.add(step.source)
+        if not step.final and result != RESULT_RENAMED:
+            temp_errors[step.old_name] = error or TEMP_NAME_ERROR
+        yield index, step, result, error, seconds
+
+
+def revert_cycle(path: str, executed: List[Tuple[int, RenameStep]], vacated: Set[str]) -> Tuple[List[int], Optional[str]]:
+    """循环中途有步骤失败时，按相反顺序还原循环中已执行的步骤
+
+    executed 为循环中已完成的 (步骤序号, 步骤)，第一个通常是把环首移到
+    临时文件名的步骤。某一步无法还原时停止还原（否则可能覆盖文件），
+    若环首仍在临时文件名且原文件名空闲，把它移回原文件名。
+    返回 (已还原的步骤序号, 环首仍留在临时文件时说明其位置的错误信息)。
+    """
+    reverted = []
+    for index, step in reversed(executed):
+        source = os.path.join(path, step.source)
+        if os.path.lexists(source):
+            break
+        try:
+            os.rename(os.path.join(path, step.target), source)
+        except OSError:
+            break
+        vacated.discard(step.source)
+        reverted.append(index)
+    else:
+        return reverted, None
+
+    if not executed or executed[0][1].final or executed[0][0] in reverted:
+        return reverted, None
+    index, step = executed[0]
+    source = os.path.join(path, step.source)
+    try:
+        if os.path.lexists(source):
+            raise FileExistsError(source)
+        os.rename(os.path.join(path, step.target), source)
+    except OSError:
+        return reverted, f"原文件 {step.source} 保留在临时文件 {step.target}"
+    vacated.discard(step.source)
+    reverted.append(index)
+    return reverted, None
+
+
+def run_steps(path: str, indexed_steps: Iterable[Tuple[int, RenameStep]], vacated: Set[str],
+              check_exists: bool, journal: Optional[RenameJournal] = None,
+              stats: Optional[PipelineStats] = None,
+              execute: Optional[StepExecutor] = None) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+    """按顺序执行步骤，逐个产生已完成条目的 (原文件名, 新文件名, 结果, 错误信息)
+
+    借助临时文件名打断循环的一组步骤全部完成后才产生其结果，以免在
+    循环中途被取消而留下临时文件；循环中有步骤失败时还原整个循环
+    （见 revert_cycle）。每个步骤的结果都会记入日志。
+    提供 stats 时，结束后把重命名和写日志的耗时累加到其中。
+    execute 为步骤执行器，默认为逐个执行的 execute_steps；执行器必须
+    按步骤顺序产生结果，日志才能按顺序记录。
+    """
+    open_cycles = 0
+    buffered = []
+    # 当前循环中已完成的 (步骤序号, 步骤)，以及循环中是否有步骤失败
+    cycle_done = []
+    cycle_failed = False
+
+    perf_counter = time.perf_counter
+    rename_seconds = journal_seconds = 0.0
+    rename_calls = renamed = 0
+    journal_calls = 0
+    journal_bytes = journal.bytes_written if journal is not None else 0
+
+    executed = (execute or execute_steps)(path, indexed_steps, vacated, check_exists)
+    try:
+        for index, step, result, error, seconds in executed:
+            if seconds is not None:
+                rename_seconds += seconds
+                rename_calls += 1
+                if result == RESULT_RENAMED:
+                    renamed += 1
+
+            if journal is not None:
+                start = perf_counter()
+                journal.record(index, result == RESULT_RENAMED)
+                journal_seconds += perf_counter() - start
+                journal_calls += 1
+
+            if open_cycles or not step.final:
+                if result == RESULT_RENAMED:
+                    cycle_done.append((index, step))
+                else:
+                    cycle_failed = True
+
+            if not step.final:
+                # 循环的第一步：把环首移到临时文件名
+                open_cycles += 1
+                continue
+
+            outcome = (step.old_name, step.new_name, result, error)
+            if step.source != step.old_name:
+                # 循环的最后一步：把临时文件移到目标名
+                open_cycles = max(open_cycles - 1, 0)
+                buffered.append(outcome)
+                if open_cycles == 0:
+                    if cycle_failed and cycle_done:
+                        buffered, reverted_count = _revert_buffered(path, cycle_done, vacated, buffered, journal)
+                        renamed -= reverted_count
+                    cycle_done = []
+                    cycle_failed = False
+                    yield from buffered
+                    buffered = []
+            elif open_cycles:
+                buffered.append(outcome)
+            else:
+                yield outcome
+
+        yield from buffered
+        if journal is not None:
+            start = perf_counter()
+            journal.finish()
+            journal_seconds += perf_counter() - start
+    finally:
+        # 停止执行器：异步执行器会等待已发出的调用完成
+        executed.close()
+        # 被取消或出错时日志保持中断状态，可在之后继续或撤销
+        if journal is not None:
+            start = perf_counter()
+            journal.close()
+            journal_seconds += perf_counter() - start
+        if stats is not None:
+            stats.add(STAGE_RENAME, rename_seconds, rename_calls, renamed)
+            if journal is not None:
+                stats.add(STAGE_JOURNAL, journal_seconds, journal_calls, journal_calls,
+                          journal.bytes_written - journal_bytes)
+
+
+def _revert_buffered(path: str, cycle_done: List[Tuple[int, RenameStep]], vacated: Set[str],
+                     buffered: List[Tuple[str, str, str, Optional[str]]],
+                     journal: Optional[RenameJournal]) -> Tuple[List[Tuple[str, str, str, Optional[str]]], int]:
+    """还原失败的循环，改写循环中各条目的结果并记入日志，返回 (新的结果列表, 还原的步骤数)"""
+    reverted, stranded = revert_cycle(path, cycle_done, vacated)
+    if journal is not None:
+        journal.revert(reverted)
+    reverted_names = {step.old_name for index, step in cycle_done if index in reverted and step.final}
+    outcomes = []
+    for old_name, new_name, result, error in buffered:
+        if result == RESULT_RENAMED and old_name in reverted_names:
+            result, error = RESULT_FAILED, "循环中的其他重命名失败，已还原"
+        elif result != RESULT_RENAMED and stranded:
+            error = f"{error}，{stranded}" if error else stranded
+        outcomes.append((old_name, new_name, result, error))
+    return outcomes, len(reverted)
+
+
+def iter_execute(plan: RenamePlan, journal: Optional[RenameJournal] = None,
+                 stats: Optional[PipelineStats] = None,
+                 execute: Optional[StepExecutor] = None) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+    """按计划的步骤顺序执行重命名，逐个产生 (原文件名, 新文件名, 结果, 错误信息)
+
+    只有目录在生成计划后可能发生变化时，才逐个检查目标文件是否已存在。
+    提供日志时，先把全部步骤写入日志再开始重命名。execute 见 run_steps。
+    """
+    # 无变化和冲突的条目不需要执行
+    for file, new_name, status in plan:
+        if status == STATUS_UNCHANGED:
+            yield file, new_name, RESULT_UNCHANGED, None
+        elif status == STATUS_CONFLICT:
+            yield file, new_name, RESULT_EXISTS, None
+
+    check_exists = not plan.directories_unchanged()
+    if journal is not None:
+        start = time.perf_counter()
+        journal.begin(plan.path, plan.steps)
+        if stats is not None:
+            stats.add(STAGE_JOURNAL, time.perf_counter() - start, 1, len(plan.steps), journal.bytes_written)
+
+    yield from run_steps(plan.path, enumerate(plan.steps), set(), check_exists, journal, stats, execute)
+
+
+def count_final_steps(state: JournalState, indices: Iterable[int]) -> int:
+    """统计步骤中会产生结果的条目数量"""
+    return sum(1 for i in indices if state.steps[i].final)
+
+
+def iter_resume(state: JournalState, journal: Optional[RenameJournal] = None,
+                stats: Optional[PipelineStats] = None,
+                execute: Optional[StepExecutor] = None) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+    """继续执行中断的重命名"""
+    if journal is not None:
+        journal.resume(state.next, undo=False)
+    steps = state.steps
+    indexed_steps = ((i, steps[i]) for i in state.remaining_steps())
+    return run_steps(state.work_path, indexed_steps, state.vacated_sources(), True, journal, stats, execute)
+
+
+def iter_undo(state: JournalState, journal: Optional[RenameJournal] = None,
+              stats: Optional[PipelineStats] = None,
+              execute: Optional[StepExecutor] = None) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+    """撤销已执行的重命名，按执行的相反顺序把文件移回原名"""
+    order = state.steps_to_undo()
+    if journal is not None:
+        if state.undo_order is None:
+            journal.begin_undo(order)
+        else:
+            journal.resume(state.undo_next, undo=True)
+    steps = state.steps
+    indexed_steps = ((i, reverse_step(steps[i])) for i in order)
+    return run_steps(state.work_path, indexed_steps, set(), True, journal, stats, execute)
+
+
+class RenameWorker(threading.Thread):
+    """重命名工作线程"""
+
+    # 进度事件的最小发送间隔（秒）
+    progress_interval = 0.1
+
+    def __init__(self, task: Callable[[], Tuple[int, Iterator[Tuple[str, str, str, Optional[str]]]]]):
+        """task 在工作线程中调用，返回 (条目总数, 结果迭代器)"""
+        super().__init__(daemon=True)
+        self.task = task
+        self.events = queue.Queue()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求取消，当前文件处理完成后停止"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def report(self, message: str):
+        """从任务中向视图发送一条状态信息"""
+        self.events.put((EVENT_STATUS, message))
+
+    def run(self):
+        """执行任务"""
+        renamed_count = 0
+        try:
+            total, results = self.task()
+            try:
+                renamed_count = self._consume(total, results)
+            finally:
+                results.close()
+            self.events.put((EVENT_DONE, renamed_count, self.cancelled, None))
+        except Exception as e:
+            self.events.put((EVENT_DONE, renamed_count, self.cancelled, str(e)))
+
+    def _consume(self, total: int, results) -> int:
+        """逐个转发结果事件，返回成功重命名的数量"""
+        put = self.events.put
+        start = time.monotonic()
+        next_progress = start
+
+        put((EVENT_PROGRESS, 0, total, 0.0))
+
+        renamed_count = 0
+        for done, (file, new_name, result, error) in enumerate(results, 1):
+            put((EVENT_RESULT, file, new_name, result, error))
+            if result == RESULT_RENAMED:
+                renamed_count += 1
+
+            now = time.monotonic()
+            if now >= next_progress or done == total:
+                put((EVENT_PROGRESS, done, total, now - start))
+                next_progress = now + self.progress_interval
+
+            if self._cancel_event.is_set():
+                break
+
+        return renamed_count
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+规则编译器 - 把一组重命名规则编译为一个文件名变换函数
+
+映射、正则规则和删除字符在编译时解析一次，空的规则直接省略，前缀和
+后缀按是否设置选用专门的函数。结果与依次调用 RenameController 的
+apply_mappings、apply_regex_rules、apply_delete_chars、apply_prefix_suffix 相同。
+"""
+
+import os
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from core.mapping_engine import MappingMatcher
+from core.regex_rules import RegexMatcher
+
+
+def split_delete_chars(delete_chars: str) -> List[str]:
+    """拆分删除字符中的各个删除模式 - 含逗号时按逗号分割（去掉空白），否则整体作为一个模式"""
+    if ',' in delete_chars:
+        return [pattern.strip() for pattern in delete_chars.split(',') if pattern.strip()]
+    return [delete_chars] if delete_chars else []
+
+
+def _delete_step(patterns: Sequence[str]) -> Callable[[str], str]:
+    """逐个删除模式的函数（区分大小写）"""
+    if len(patterns) == 1:
+        pattern = patterns[0]
+        return lambda name: name.replace(pattern, "")
+
+    patterns = tuple(patterns)
+
+    def delete(name: str) -> str:
+        for pattern in patterns:
+            name = name.replace(pattern, "")
+        return name
+    return delete
+
+
+def _affix_step(prefix: str, suffix: str) -> Callable[[str], str]:
+    """添加前缀和后缀的函数 - 已有前缀或后缀时不重复添加，扩展名保持在最后"""
+    splitext = os.path.splitext
+
+    if prefix and suffix:
+        def affix(name: str) -> str:
+            stem, ext = splitext(name)
+            if not stem.startswith(prefix):
+                stem = prefix + stem
+            if not stem.endswith(suffix):
+                stem = stem + suffix
+            return stem + ext
+    elif prefix:
+        def affix(name: str) -> str:
+            stem, ext = splitext(name)
+            return name if stem.startswith(prefix) else prefix + name
+    else:
+        def affix(name: str) -> str:
+            stem, ext = splitext(name)
+            return name if stem.endswith(suffix) else stem + suffix + ext
+    return affix
+
+
+def _compose(steps: Sequence[Callable[[str], str]]) -> Callable[[str], str]:
+    if not steps:
+        return lambda name: name
+    if len(steps) == 1:
+        return steps[0]
+
+    def transform(name: str) -> str:
+        for step in steps:
+            name = step(name)
+        return name
+    return transform
+
+
+class RuleTransform:
+    """编译后的规则 - 可作为单个文件名的函数调用，也可以一次变换一批文件名"""
+
+    def __init__(self, steps: Sequence[Callable[[str], str]]):
+        self.steps = tuple(steps)
+        self._transform = _compose(self.steps)
+
+    def __call__(self, name: str) -> str:
+        return self._transform(name)
+
+    def __bool__(self) -> bool:
+        """是否有任何规则"""
+        return bool(self.steps)
+
+    def batch(self, names: Iterable[str]) -> List[str]:
+        """变换一批文件名，返回与输入顺序一致的新文件名列表
+
+        按规则逐步处理整批文件名，每一步只需一次 map，而不是对每个文件名
+        依次调用全部规则。
+        """
+        result = list(names)
+        for step in self.steps:
+            result = list(map(step, result))
+        return result
+
+
+def compile_rule_transform(prefix: str = "", suffix: str = "", delete_chars: str = "",
+                           mappings: Optional[MappingMatcher] = None,
+                           regex_rules: Optional[RegexMatcher] = None,
+                           delete_matcher: Optional[MappingMatcher] = None) -> RuleTransform:
+    """按映射、正则规则、删除字符、前后缀的顺序编译规则
+
+    mappings 和 regex_rules 为已编译的匹配器；delete_matcher 不为 None 时
+    （不区分大小写）用它删除，否则按 delete_chars 区分大小写删除。
+    """
+    steps = []
+    if mappings is not None and len(mappings):
+        steps.append(mappings.apply)
+    if regex_rules is not None and len(regex_rules):
+        steps.append(regex_rules.apply)
+    if delete_matcher is not None:
+        if len(delete_matcher):
+            steps.append(delete_matcher.apply)
+    else:
+        patterns = split_delete_chars(delete_chars)
+        if patterns:
+            steps.append(_delete_step(patterns))
+    if prefix or suffix:
+        steps.append(_affix_step(prefix, suffix))
+    return RuleTransform(steps)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+缓冲日志输出 - 收集状态消息，按定时器分批写入 Text 组件
+"""
+
+import time
+import tkinter as tk
+
+from utils.stats import STAGE_RENDER_STATUS
+
+
+class BufferedLogSink:
+    """缓冲日志输出
+
+    write 只把消息追加到缓冲区，真正的 Text.insert / see 由定时器每
+    interval_ms 毫秒批量执行一次，每次最多写入 max_messages_per_flush 条，
+    避免逐行刷新界面。设置 stats（PipelineStats）后，每次写入的耗时、
+    消息数和字符数记入其中。
+    """
+
+    def __init__(self, root: tk.Misc, text_widget: tk.Text,
+                 interval_ms: int = 50, max_messages_per_flush: int = 5000):
+        self.root = root
+        self.text_widget = text_widget
+        self.interval_ms = interval_ms
+        self.max_messages_per_flush = max_messages_per_flush
+        self._buffer = []
+        self._after_id = None
+        self.stats = None
+
+    def write(self, message: str):
+        """追加消息，等待下一次定时刷新"""
+        self._buffer.append(message)
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._after_id = None
+        self._flush_chunk(self.max_messages_per_flush)
+        if self._buffer:
+            self._after_id = self.root.after(self.interval_ms, self._on_timer)
+
+    def _flush_chunk(self, limit: int):
+        """把最多 limit 条消息一次性写入文本框"""
+        if not self._buffer:
+            return
+        start = time.perf_counter()
+        chunk = self._buffer[:limit]
+        del self._buffer[:limit]
+        text = "".join(chunk)
+        self.text_widget.insert(tk.END, text)
+        self.text_widget.see(tk.END)
+        if self.stats is not None:
+            self.stats.add(STAGE_RENDER_STATUS, time.perf_counter() - start,
+                           entries=len(chunk), bytes=len(text.encode("utf-8", "surrogatepass")))
+
+    def flush(self):
+        """立即写入全部缓冲消息"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._flush_chunk(len(self._buffer))
+
+    def clear(self):
+        """清空缓冲区和文本框"""
+        self._buffer.clear()
+        self.text_widget.delete("1.0", tk.END)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑 .fre 配置 - 以 SQLite 数据库存储大量映射
+
+扩展名仍为 .fre，ConfigManager.load_config 按文件头自动识别，返回与
+JSON 格式相同的配置字典。映射以外的字段（包括未知字段）以 JSON 编码
+存放在 meta 表中，只读取元数据时不需要读取映射。
+
+映射按原顺序每 CHUNK_SIZE 条存为一行：查找内容和替换内容分别编码为
+JSON 数组。逐行存放每条映射时，一百万条映射的读取耗时主要花在逐行
+构造元组上；按块存放后只需少量 json.loads，遍历时也只需每次载入一块。
+"""
+
+import json
+import os
+from collections.abc import ItemsView, Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+
+# SQLite 文件头
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# 写入 PRAGMA application_id，用于与其他 SQLite 文件区分（"FRE1"）
+APPLICATION_ID = 0x46524531
+
+# 紧凑格式的结构版本
+SCHEMA_VERSION = 1
+
+# meta 表中记录映射数量的键（不属于配置字段）
+MAPPING_COUNT_KEY = "__mapping_count__"
+
+# 每块的映射条数
+CHUNK_SIZE = 10000
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE mapping_chunks (pos INTEGER PRIMARY KEY, keys TEXT NOT NULL, vals TEXT NOT NULL);
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _iter_chunks(mappings: Dict[str, str]) -> Iterator[Tuple[str, str]]:
+    """把映射按块编码为 (查找内容数组, 替换内容数组)"""
+    keys = list(mappings)
+    values = list(mappings.values())
+    for start in range(0, len(keys), CHUNK_SIZE):
+        yield _dumps(keys[start:start + CHUNK_SIZE]), _dumps(values[start:start + CHUNK_SIZE])
+
+
+def is_compact_config(file_path: str) -> bool:
+    """文件是否为紧凑格式的 .fre 配置"""
+    try:
+        with open(file_path, "rb") as f:
+            if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                return False
+            # application_id 位于文件头第 68 字节处，大端序
+            f.seek(68)
+            return int.from_bytes(f.read(4), "big") == APPLICATION_ID
+    except OSError:
+        return False
+
+
+def _connect(file_path: str) -> "sqlite3.Connection":
+    """以只读方式打开"""
+    # 只在读写紧凑格式时导入 sqlite3，加载 JSON 配置和命令行启动时不需要
+    import sqlite3
+    return sqlite3.connect(Path(os.path.abspath(file_path)).as_uri() + "?mode=ro", uri=True)
+
+
+def write_compact_config(config: Dict[str, Any], file_path: str):
+    """把配置写成紧凑格式，文件已存在时被替换
+
+    写入时不使用 SQLite 的回滚日志，应写入临时文件后再替换目标文件
+    （见 utils.atomic_file.atomic_replace）。
+    """
+    # 清空而不是删除已有文件，保留其权限（SQLite 把空文件视为新数据库）
+    if os.path.exists(file_path):
+        open(file_path, "wb").close()
+
+    import sqlite3
+
+    mappings = config.get("mappings") or {}
+    conn = sqlite3.connect(file_path)
+    try:
+        # 新建的文件由调用方落盘并替换，写入期间不需要回滚日志
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(f"PRAGMA application_id = {APPLICATION_ID}")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.executescript(_SCHEMA)
+        with conn:
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                             [(key, _dumps(value)) for key, value in config.items() if key != "mappings"])
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)",
+                         (MAPPING_COUNT_KEY, str(len(mappings))))
+            conn.executemany("INSERT INTO mapping_chunks (keys, vals) VALUES (?, ?)", _iter_chunks(mappings))
+    finally:
+        conn.close()
+
+
+def read_compact_metadata(file_path: str, preview: int = 0) -> Tuple[Dict[str, Any], int]:
+    """只读取映射以外的字段，返回 (字段字典, 映射数量)
+
+    字段字典中的 mappings 只包含前 preview 条映射（最多一块）。
+    """
+    conn = _connect(file_path)
+    try:
+        meta = {}
+        count = 0
+        for key, value in conn.execute("SELECT key, value FROM meta"):
+            if key == MAPPING_COUNT_KEY:
+                count = int(value)
+            else:
+                meta[key] = json.loads(value)
+        meta["mappings"] = {}
+        if preview > 0:
+            row = conn.execute("SELECT keys, vals FROM mapping_chunks ORDER BY pos LIMIT 1").fetchone()
+            if row is not None:
+                meta["mappings"] = dict(zip(json.loads(row[0])[:preview], json.loads(row[1])[:preview]))
+        return meta, count
+    finally:
+        conn.close()
+
+
+def read_compact_config(file_path: str) -> Dict[str, Any]:
+    """读取全部字段和映射，得到与 JSON 格式相同的字典"""
+    conn = _connect(file_path)
+    try:
+        config = {}
+        for key, value in conn.execute("SELECT key, value FROM meta"):
+            if key != MAPPING_COUNT_KEY:
+                config[key] = json.loads(value)
+        mappings = {}
+        for keys, values in conn.execute("SELECT keys, vals FROM mapping_chunks ORDER BY pos"):
+            mappings.update(zip(json.loads(keys), json.loads(values)))
+        config["mappings"] = mappings
+        return config
+    finally:
+        conn.close()
+
+
+class CompactMappings(Mapping):
+    """紧凑配置中映射的只读视图 - 遍历时逐块从文件读取，不整体载入内存
+
+    按查找内容取值时先用 instr 筛选可能包含它的块再逐块确认，适合遍历
+    和少量查询，不适合大量随机访问。
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._conn = _connect(file_path)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (MAPPING_COUNT_KEY,)).fetchone()
+        self._count = int(row[0]) if row else 0
+
+    def close(self):
+        """关闭数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key: str) -> str:
+        if isinstance(key, str):
+            # 块中的数组包含该元素时必然包含其 JSON 编码，反之未必，需要再确认
+            query = "SELECT keys, vals FROM mapping_chunks WHERE instr(keys, ?) ORDER BY pos"
+            for keys, values in self._conn.execute(query, (_dumps(key),)):
+                keys = json.loads(keys)
+                if key in keys:
+                    return json.loads(values)[keys.index(key)]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for (keys,) in self._conn.execute("SELECT keys FROM mapping_chunks ORDER BY pos"):
+            yield from json.loads(keys)
+
+    def iter_items(self) -> Iterator[Tuple[str, str]]:
+        """按原顺序逐条产生 (查找内容, 替换内容)"""
+        for keys, values in self._conn.execute("SELECT keys, vals FROM mapping_chunks ORDER BY pos"):
+            yield from zip(json.loads(keys), json.loads(values))
+
+    def items(self) -> ItemsView:
+        return _CompactItemsView(self)
+
+
+class _CompactItemsView(ItemsView):
+    """遍历时一次查询同时取出查找内容和替换内容，而不是逐个按键取值"""
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return self._mapping.iter_items()
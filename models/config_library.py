@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+配置库索引 - 为配置管理器列出、搜索和预览大量 .fre 配置
+
+索引保存在一个小的缓存文件中，以配置文件路径为键，记录其修改时间、
+大小、get_config_info 中的元数据、各规则的数量以及前几条映射。刷新时
+只有修改时间或大小变化的文件才重新解析，其余直接使用缓存。
+"""
+
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+from models.config_manager import ConfigManager
+from utils.atomic_file import atomic_replace
+from utils.scanner import walk_directories
+
+
+# 配置文件扩展名
+CONFIG_EXTENSION = ".fre"
+
+# 缓存文件格式版本，不一致时丢弃缓存
+LIBRARY_CACHE_VERSION = 1
+
+# 每个配置在缓存中保留的预览映射条数
+PREVIEW_MAPPINGS = 20
+
+# 元数据字段（与 ConfigManager.get_config_info 一致）
+INFO_FIELDS = ("name", "description", "work_path", "created_at", "updated_at", "version")
+
+
+class LibraryEntry:
+    """配置库中的一个配置"""
+
+    __slots__ = ("path", "mtime_ns", "size", "info", "prefix", "suffix", "delete_chars",
+                 "mapping_count", "preview", "error", "_search_text")
+
+    def __init__(self, path: str, mtime_ns: int, size: int, info: Dict[str, str],
+                 prefix: str = "", suffix: str = "", delete_chars: str = "",
+                 mapping_count: int = 0, preview: Optional[List[List[str]]] = None,
+                 error: Optional[str] = None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.info = info
+        self.prefix = prefix
+        self.suffix = suffix
+        self.delete_chars = delete_chars
+        self.mapping_count = mapping_count
+        # 前 PREVIEW_MAPPINGS 条映射 [[查找内容, 替换内容], ...]
+        self.preview = preview or []
+        # 无法解析时的错误信息
+        self.error = error
+        self._search_text = None
+
+    @property
+    def name(self) -> str:
+        return self.info.get("name") or os.path.splitext(os.path.basename(self.path))[0]
+
+    @classmethod
+    def from_dict(cls, path: str, data: Dict) -> "LibraryEntry":
+        return cls(path, data["mtime_ns"], data["size"], data["info"], data.get("prefix", ""),
+                   data.get("suffix", ""), data.get("delete_chars", ""), data.get("mapping_count", 0),
+                   data.get("preview"), data.get("error"))
+
+    def as_dict(self) -> Dict:
+        """转换为可序列化为 JSON 的字典"""
+        return {"mtime_ns": self.mtime_ns, "size": self.size, "info": self.info,
+                "prefix": self.prefix, "suffix": self.suffix, "delete_chars": self.delete_chars,
+                "mapping_count": self.mapping_count, "preview": self.preview, "error": self.error}
+
+    def matches(self, query: str) -> bool:
+        """名称、描述、工作路径或文件路径中包含 query（不区分大小写）"""
+        if self._search_text is None:
+            self._search_text = "\n".join([self.name, self.info.get("description", ""),
+                                           self.info.get("work_path", ""), self.path]).casefold()
+        return query.casefold() in self._search_text
+
+    def summary(self) -> str:
+        """配置摘要，格式与 ConfigManager.export_config_summary 相近"""
+        if self.error:
+            return f"文件: {self.path}\n无法解析: {self.error}\n"
+
+        info = self.info
+        summary = f"""配置名称: {self.name}
+文件: {self.path}
+描述: {info.get('description', '')}
+工作路径: {info.get('work_path', '')}
+前缀: {self.prefix}
+后缀: {self.suffix}
+删除字符: {self.delete_chars}
+映射规则数量: {self.mapping_count}
+创建时间: {info.get('created_at', '')}
+更新时间: {info.get('updated_at', '')}
+版本: {info.get('version', '')}
+
+映射规则:
+"""
+        if self.preview:
+            for key, value in self.preview:
+                summary += f"  '{key}' -> '{value}'\n"
+            if self.mapping_count > len(self.preview):
+                summary += f"  ... 还有 {self.mapping_count - len(self.preview)} 条\n"
+        else:
+            summary += "  无映射规则\n"
+        return summary
+
+
+class ConfigLibrary:
+    """配置库 - 索引若干目录（含子目录）中的 .fre 配置"""
+
+    cache_dir = os.path.join(os.path.expanduser("~"), ".file_rename_editor")
+
+    def __init__(self, config_manager: ConfigManager, cache_path: Optional[str] = None):
+        self.config_manager = config_manager
+        self.cache_path = cache_path or os.path.join(self.cache_dir, "config_library.json")
+        self.directories: List[str] = []
+        self.entries: Dict[str, LibraryEntry] = {}
+        self.load()
+
+    def load(self):
+        """读取缓存文件，缓存不存在或无法解析时为空"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != LIBRARY_CACHE_VERSION:
+                return
+            self.directories = list(data.get("directories", []))
+            self.entries = {path: LibraryEntry.from_dict(path, entry)
+                            for path, entry in data.get("entries", {}).items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.directories = []
+            self.entries = {}
+
+    def save(self):
+        """写入缓存文件 - 先写临时文件再替换，中途出错不会损坏原缓存"""
+        directory = os.path.dirname(self.cache_path)
+        os.makedirs(directory, exist_ok=True)
+        data = {"version": LIBRARY_CACHE_VERSION, "directories": self.directories,
+                "entries": {path: entry.as_dict() for path, entry in self.entries.items()}}
+        with atomic_replace(self.cache_path) as temp_path:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+
+    def add_directory(self, path: str) -> bool:
+        """加入要索引的目录，已存在时返回 False"""
+        path = os.path.abspath(path)
+        if path in self.directories:
+            return False
+        self.directories.append(path)
+        return True
+
+    def remove_directory(self, path: str):
+        """移除目录及其下的配置"""
+        path = os.path.abspath(path)
+        if path in self.directories:
+            self.directories.remove(path)
+            prefix = os.path.join(path, "")
+            self.entries = {p: e for p, e in self.entries.items() if not p.startswith(prefix)}
+
+    def _index_file(self, path: str, st: os.stat_result) -> LibraryEntry:
+        """解析单个配置文件的元数据"""
+        result = self.config_manager.load_config_metadata(path, preview=PREVIEW_MAPPINGS)
+        if result is None:
+            return LibraryEntry(path, st.st_mtime_ns, st.st_size, {}, error="无法加载配置")
+        config, mapping_count = result
+        info = {field: str(config.get(field, "")) for field in INFO_FIELDS}
+        preview = [[key, value] for key, value in config["mappings"].items()]
+        return LibraryEntry(path, st.st_mtime_ns, st.st_size, info, config.get("prefix", ""),
+                            config.get("suffix", ""), config.get("delete_chars", ""),
+                            mapping_count, preview)
+
+    def refresh(self, should_stop: Optional[Callable[[], bool]] = None) -> int:
+        """重新扫描全部目录，只解析新增或修改时间、大小变化的配置
+
+        返回重新解析的文件数。should_stop 返回 True 时放弃本次刷新，
+        索引保持不变。
+        """
+        entries = {}
+        parsed = 0
+        for directory in self.directories:
+            try:
+                for listing in walk_directories(directory):
+                    if should_stop is not None and should_stop():
+                        return parsed
+                    for item in listing.files:
+                        if not item.name.lower().endswith(CONFIG_EXTENSION):
+                            continue
+                        path = os.path.abspath(item.path)
+                        try:
+                            st = item.stat()
+                        except OSError:
+                            continue
+                        cached = self.entries.get(path)
+                        if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+                            entries[path] = cached
+                        else:
+                            entries[path] = self._index_file(path, st)
+                            parsed += 1
+            except OSError:
+                # 目录暂时无法访问（如网络共享断开）时保留其缓存
+                prefix = os.path.join(directory, "")
+                entries.update((path, entry) for path, entry in self.entries.items()
+                               if path.startswith(prefix))
+
+        changed = parsed or entries.keys() != self.entries.keys()
+        self.entries = entries
+        if changed:
+            self.save()
+        return parsed
+
+    def update_file(self, path: str):
+        """重新索引单个配置文件（如刚保存的配置），文件不在索引目录中时忽略"""
+        path = os.path.abspath(path)
+        if not any(path.startswith(os.path.join(directory, "")) for directory in self.directories):
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        entries = dict(self.entries)
+        entries[path] = self._index_file(path, st)
+        self.entries = entries
+        self.save()
+
+    def search(self, query: str = "") -> List[LibraryEntry]:
+        """按名称排序返回匹配 query 的配置"""
+        query = query.strip()
+        entries = self.entries.values()
+        if query:
+            entries = [entry for entry in entries if entry.matches(query)]
+        return sorted(entries, key=lambda entry: (entry.name.casefold(), entry.path))
@@ -1,13 +1,25 @@
 # -*- coding: utf-8 -*-
 """
 配置管理器 - 负责工作配置的保存和加载
-支持 .fre 配置文件格式
+支持 .fre 配置文件格式（JSON 格式和基于 SQLite 的紧凑格式）
 """
 
+import hashlib
+import itertools
 import json
 import os
-from typing import Dict, Any, Optional
+import re
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from models.compact_config import (CompactMappings, is_compact_config, read_compact_config,
+                                   read_compact_metadata, write_compact_config)
+from utils.atomic_file import atomic_replace
+
+
+# JSON 格式的 .fre 文件以 content_hash 字段开头，保存前只需读取文件开头即可比较
+_CONTENT_HASH_PATTERN = re.compile(rb'\A\s*\{\s*"content_hash"\s*:\s*"([0-9a-f]{64})"')
+_CONTENT_HASH_PROBE_SIZE = 256
 
 
 class ConfigManager:
@@ -29,9 +41,17 @@ class ConfigManager:
             "suffix": str,
             "delete_chars": str,
             "mappings": dict,
-            "settings": dict
+            "regex_rules": list,
+            "settings": dict,
+            "content_hash": str
         }
         
+        # 不参与内容哈希的字段：时间戳和哈希本身
+        self.volatile_fields = {"created_at", "updated_at", "content_hash"}
+        
+        # 已确认记录的哈希与内容相符的文件：绝对路径 -> ((大小, 修改时间, inode), 哈希)
+        self._verified_hashes = {}
+        
         # 默认配置结构
         self.default_config = {
             "version": self.config_version,
@@ -44,11 +64,18 @@ class ConfigManager:
             "suffix": "",
             "delete_chars": "",
             "mappings": {},
+            # 正则替换规则 [{"pattern": 模式, "replacement": 替换内容}, ...]，在映射之后按顺序应用
+            "regex_rules": [],
+            # 保存时计算的内容哈希
+            "content_hash": "",
             # 未来可扩展的字段
             "settings": {
                 "case_sensitive": True,
                 "include_subfolders": False,
-                "backup_original": False
+                "backup_original": False,
+                # 映射按字典顺序逐条替换（旧版语义），新配置默认单次扫描替换；
+                # 没有此项的旧配置加载时按旧版语义处理（见 _load_config_with_compatibility）
+                "sequential_mappings": False
             }
         }
     
@@ -59,12 +86,20 @@ class ConfigManager:
                      delete_chars: str = "",
                      mappings: Dict[str, str] = None,
                      name: str = "",
-                     description: str = "") -> Dict[str, Any]:
+                     description: str = "",
+                     settings: Dict[str, Any] = None,
+                     regex_rules: List[Dict[str, str]] = None) -> Dict[str, Any]:
         """创建配置字典"""
         if mappings is None:
             mappings = {}
+        if regex_rules is None:
+            regex_rules = []
         
         config = self.default_config.copy()
+        config["settings"] = dict(self.default_config["settings"])
+        if settings:
+            config["settings"].update(settings)
+        
         config.update({
             "version": self.config_version,
             "created_at": datetime.now().isoformat(),
@@ -75,16 +110,85 @@ class ConfigManager:
             "prefix": prefix,
             "suffix": suffix,
             "delete_chars": delete_chars,
-            "mappings": mappings
+            "mappings": mappings,
+            "regex_rules": regex_rules
         })
         
         return config
     
-    def save_config(self, config: Dict[str, Any], file_path: str) -> bool:
-        """保存配置到 .fre 文件 - 保留所有字段"""
+    def content_hash(self, config: Dict[str, Any]) -> str:
+        """配置内容的哈希 - 包括除时间戳外的全部字段，映射的顺序也计算在内"""
+        digest = hashlib.sha256()
+        for key in sorted(config):
+            if key in self.volatile_fields:
+                continue
+            value = config[key]
+            if key == "mappings" and isinstance(value, dict):
+                # 逐条替换模式下映射的顺序会影响结果
+                value = list(value.items())
+            digest.update(json.dumps([key, value], ensure_ascii=False, sort_keys=True)
+                          .encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _file_signature(file_path: str) -> Tuple[int, int, int]:
+        st = os.stat(file_path)
+        return st.st_size, st.st_mtime_ns, st.st_ino
+    
+    def _stored_content_hash(self, file_path: str, compact: bool) -> Optional[str]:
+        """读取文件中记录的内容哈希，与文件内容不符时返回 None
+        
+        文件自上次由本管理器写入或检查后大小、修改时间和 inode 都未变化时
+        只读取记录的哈希，不解析映射；否则按文件内容重新计算哈希进行核对，
+        避免文件被其他程序修改后仍因记录的哈希相同而跳过保存。
+        """
         try:
-            # 创建配置副本，避免修改原始配置
-            save_config = config.copy()
+            signature = self._file_signature(file_path)
+            if compact:
+                meta, _ = read_compact_metadata(file_path)
+                stored = meta.get("content_hash")
+            else:
+                with open(file_path, 'rb') as f:
+                    match = _CONTENT_HASH_PATTERN.match(f.read(_CONTENT_HASH_PROBE_SIZE))
+                stored = match.group(1).decode("ascii") if match else None
+            if not stored:
+                return None
+            
+            key = os.path.abspath(file_path)
+            if self._verified_hashes.get(key) == (signature, stored):
+                return stored
+            if compact:
+                loaded_config = read_compact_config(file_path)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    loaded_config = json.load(f)
+            if self.content_hash(loaded_config) != stored:
+                return None
+            self._verified_hashes[key] = (signature, stored)
+            return stored
+        except Exception:
+            return None
+    
+    def save_config(self, config: Dict[str, Any], file_path: str, compact: Optional[bool] = None) -> bool:
+        """保存配置到 .fre 文件 - 保留所有字段
+        
+        compact 为 True 时保存为紧凑格式，为 None 时沿用目标文件原有的格式
+        （新文件为 JSON 格式）。内容哈希与文件中记录的相同且格式不变时不重写
+        文件，updated_at 也保持不变。写入时先写同一目录下的临时文件并落盘，
+        再原子替换目标文件，中途崩溃不会留下损坏的配置。
+        """
+        try:
+            if compact is None:
+                compact = is_compact_config(file_path)
+            
+            digest = self.content_hash(config)
+            if (os.path.exists(file_path) and is_compact_config(file_path) == compact
+                    and self._stored_content_hash(file_path, compact) == digest):
+                return True
+            
+            # 创建配置副本，避免修改原始配置；内容哈希放在最前面
+            save_config = {"content_hash": digest}
+            save_config.update((key, value) for key, value in config.items() if key != "content_hash")
             
             # 更新保存时间
             save_config["updated_at"] = datetime.now().isoformat()
@@ -94,12 +198,17 @@ class ConfigManager:
                 save_config["version"] = self.config_version
             
             # 确保目录存在
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
             
-            # 保存为 JSON 格式，保留所有字段
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(save_config, f, ensure_ascii=False, indent=2)
+            with atomic_replace(file_path) as temp_path:
+                if compact:
+                    write_compact_config(save_config, temp_path)
+                else:
+                    # 保存为 JSON 格式，保留所有字段
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        json.dump(save_config, f, ensure_ascii=False, indent=2)
             
+            self._verified_hashes[os.path.abspath(file_path)] = (self._file_signature(file_path), digest)
             return True
             
         except Exception as e:
@@ -112,8 +221,11 @@ class ConfigManager:
             if not os.path.exists(file_path):
                 return None
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                loaded_config = json.load(f)
+            if is_compact_config(file_path):
+                loaded_config = read_compact_config(file_path)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    loaded_config = json.load(f)
             
             # 使用兼容性加载，保留所有字段
             config = self._load_config_with_compatibility(loaded_config)
@@ -124,6 +236,45 @@ class ConfigManager:
             print(f"加载配置失败: {e}")
             return None
     
+    def load_config_metadata(self, file_path: str, preview: int = 0) -> Optional[Tuple[Dict[str, Any], int]]:
+        """只加载映射以外的字段，返回 (配置, 映射数量)
+        
+        配置中的 mappings 只包含前 preview 条映射。紧凑格式最多读取映射表
+        的第一块；JSON 格式仍需解析整个文件。
+        """
+        try:
+            if not os.path.exists(file_path):
+                return None
+            
+            if is_compact_config(file_path):
+                loaded_config, count = read_compact_metadata(file_path, preview)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    loaded_config = json.load(f)
+                mappings = loaded_config.get("mappings")
+                if isinstance(mappings, dict):
+                    count = len(mappings)
+                    loaded_config["mappings"] = dict(itertools.islice(mappings.items(), preview))
+                else:
+                    count = 0
+            
+            return self._load_config_with_compatibility(loaded_config), count
+            
+        except Exception as e:
+            print(f"加载配置失败: {e}")
+            return None
+    
+    def open_mappings(self, file_path: str) -> Optional[Mapping]:
+        """打开配置中的映射供逐条遍历 - 紧凑格式返回按需读取的 CompactMappings"""
+        if is_compact_config(file_path):
+            try:
+                return CompactMappings(file_path)
+            except Exception as e:
+                print(f"加载配置失败: {e}")
+                return None
+        config = self.load_config(file_path)
+        return config["mappings"] if config is not None else None
+    
     def _load_config_with_compatibility(self, loaded_config: Dict[str, Any]) -> Dict[str, Any]:
         """兼容性加载配置 - 处理字段匹配和缺失"""
         # 从默认配置开始
@@ -142,6 +293,8 @@ class ConfigManager:
                     config[field_name] = str(value) if value is not None else ""
                 elif expected_type == dict and not isinstance(value, dict):
                     config[field_name] = {} if value is None else {}
+                elif expected_type == list and not isinstance(value, list):
+                    config[field_name] = []
                 elif expected_type == bool and not isinstance(value, bool):
                     config[field_name] = bool(value) if value is not None else False
                 else:
@@ -151,12 +304,16 @@ class ConfigManager:
                 if field_name in self.default_config:
                     config[field_name] = self.default_config[field_name]
         
-        # 特殊处理嵌套字典（如settings）
-        if "settings" in loaded_config and isinstance(loaded_config["settings"], dict):
-            # 合并settings，保留未知设置
-            if "settings" not in config:
-                config["settings"] = {}
-            config["settings"].update(loaded_config["settings"])
+        # 特殊处理嵌套字典（如settings）：在默认设置的副本上合并，保留未知设置
+        settings = dict(self.default_config["settings"])
+        loaded_settings = loaded_config.get("settings")
+        if not isinstance(loaded_settings, dict):
+            loaded_settings = {}
+        settings.update(loaded_settings)
+        # 旧版配置没有 sequential_mappings，其映射按顺序逐条替换，保持原有的重命名结果
+        if "sequential_mappings" not in loaded_settings:
+            settings["sequential_mappings"] = True
+        config["settings"] = settings
         
         # 确保mappings是字典
         if "mappings" not in config or not isinstance(config["mappings"], dict):
@@ -233,6 +390,8 @@ class ConfigManager:
                     merged[key] = str(value) if value is not None else ""
                 elif expected_type == dict and not isinstance(value, dict):
                     merged[key] = {} if value is None else {}
+                elif expected_type == list and not isinstance(value, list):
+                    merged[key] = []
                 else:
                     merged[key] = value
             else:
@@ -276,6 +435,7 @@ class ConfigManager:
         """导出配置摘要为文本 - 包含未知字段信息"""
         info = self.get_config_info(config)
         mappings = config.get("mappings", {})
+        regex_rules = config.get("regex_rules", [])
         unknown_fields = self.get_unknown_fields(config)
         
         summary = f"""配置名称: {info['name']}
@@ -298,6 +458,12 @@ class ConfigManager:
         else:
             summary += "  无映射规则\n"
         
+        if regex_rules:
+            summary += f"\n正则规则 ({len(regex_rules)} 条):\n"
+            for rule in regex_rules:
+                if isinstance(rule, dict):
+                    summary += f"  /{rule.get('pattern', '')}/ -> '{rule.get('replacement', '')}'\n"
+        
         # 显示未知字段信息
         if unknown_fields:
             summary += f"\n未知字段 (保留在配置中):\n"
@@ -5,8 +5,10 @@ FileRenameEditor - Model层
 """
 
 import os
-from pathlib import Path
 from typing import List, Tuple, Optional
+from utils.scanner import list_files, walk_directories
+from utils.dir_index import DirectoryIndex
+from core.backup import BACKUP_DIR_NAME
 
 
 class FileManager:
@@ -15,8 +17,12 @@ class FileManager:
     def __init__(self):
         self.current_path = ""
         self.files = []
+        # 是否包含子文件夹中的文件（文件名为相对于工作目录的路径）
+        self.include_subfolders = False
+        # 工作目录的实时索引，预览时只重新计算有变化的目录
+        self.index: Optional[DirectoryIndex] = None
     
-    def set_working_directory(self, path: str) -> bool:
+    def set_working_directory(self, path: str, include_subfolders: Optional[bool] = None) -> bool:
         """设置工作目录"""
         try:
             if not os.path.exists(path):
@@ -24,6 +30,8 @@ class FileManager:
             if not os.path.isdir(path):
                 return False
             
+            if include_subfolders is not None:
+                self.include_subfolders = include_subfolders
             self.current_path = path
             self.files = self._get_files_in_directory(path)
             return True
@@ -33,15 +41,36 @@ class FileManager:
     def _get_files_in_directory(self, path: str) -> List[str]:
         """获取目录中的文件列表"""
         try:
+            if not self.include_subfolders:
+                return list_files(path)
+            
             files = []
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isfile(item_path):
-                    files.append(item)
+            for listing in walk_directories(path, exclude=(BACKUP_DIR_NAME,)):
+                relative_dir = os.path.relpath(listing.path, path)
+                if relative_dir == os.curdir:
+                    files.extend(listing.file_names)
+                else:
+                    files.extend(os.path.join(relative_dir, name) for name in listing.file_names)
             return files
         except Exception:
             return []
     
+    def get_index(self, path: str, include_subfolders: bool = False) -> DirectoryIndex:
+        """获取目录的实时索引，目录或是否包含子文件夹变化时重新建立"""
+        path = os.path.abspath(path)
+        index = self.index
+        if index is None or index.root != path or index.recursive != include_subfolders:
+            self.close_index()
+            index = DirectoryIndex(path, include_subfolders, exclude=(BACKUP_DIR_NAME,))
+            self.index = index
+        return index
+    
+    def close_index(self):
+        """停止监视工作目录"""
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+    
     def get_files(self) -> List[str]:
         """获取文件列表"""
         return self.files.copy()
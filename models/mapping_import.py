@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+映射表批量导入 - 从 CSV / TSV / JSONL 文件流式读取映射
+
+逐行读取文件，在一次遍历中完成去重：同一查找内容重复出现时后出现的
+替换内容生效，重复和冲突只计入导入报告，不逐条提示。读取完成后再与
+现有映射合并，调用方只需刷新一次界面。
+"""
+
+import csv
+import json
+import os
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+
+# 支持的格式
+FORMAT_CSV = "csv"
+FORMAT_TSV = "tsv"
+FORMAT_JSONL = "jsonl"
+
+# 扩展名 -> 格式
+FORMAT_EXTENSIONS = {
+    ".csv": FORMAT_CSV,
+    ".tsv": FORMAT_TSV,
+    ".tab": FORMAT_TSV,
+    ".txt": FORMAT_TSV,
+    ".jsonl": FORMAT_JSONL,
+    ".ndjson": FORMAT_JSONL,
+}
+
+# 依次尝试的编码：带或不带 BOM 的 UTF-8，以及中文 Windows 上表格软件导出的 GBK
+DEFAULT_ENCODINGS = ("utf-8-sig", "gb18030")
+
+# CSV / TSV 首行为这些列名时视为表头
+HEADER_NAMES = {"key", "value", "find", "replace", "查找内容", "替换为", "原文", "替换"}
+
+# JSONL 对象中查找内容和替换内容的字段名
+JSON_KEY_FIELDS = ("key", "find")
+JSON_VALUE_FIELDS = ("value", "replace")
+
+# 报告中保留的示例条数
+MAX_REPORT_SAMPLES = 20
+
+
+class ImportReport:
+    """导入结果统计"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0          # 读取的数据行数
+        self.duplicates = 0    # 文件内重复且替换内容相同的行数
+        self.conflicts = 0     # 文件内重复且替换内容不同的行数（后出现的生效）
+        self.added = 0         # 新增的映射
+        self.updated = 0       # 替换内容被改变的已有映射
+        self.unchanged = 0     # 与已有映射完全相同
+        self.skipped: List[Tuple[int, str]] = []                    # (行号, 原因)
+        self.conflict_samples: List[Tuple[int, str, str, str]] = []  # (行号, 查找内容, 原替换, 新替换)
+        self.update_samples: List[Tuple[str, str, str]] = []         # (查找内容, 原替换, 新替换)
+        self.skipped_count = 0
+
+    def skip(self, line: int, reason: str):
+        self.skipped_count += 1
+        if len(self.skipped) < MAX_REPORT_SAMPLES:
+            self.skipped.append((line, reason))
+
+    def summary(self) -> str:
+        """导入结果摘要"""
+        lines = [
+            f"从 {os.path.basename(self.path)} 读取 {self.rows} 行：",
+            f"新增 {self.added} 条，更新 {self.updated} 条，与现有映射相同 {self.unchanged} 条",
+            f"文件内重复 {self.duplicates} 行，冲突 {self.conflicts} 行（以后出现的为准），"
+            f"跳过 {self.skipped_count} 行",
+        ]
+        if self.conflict_samples:
+            lines.append("\n文件内冲突:")
+            for line, key, old_value, new_value in self.conflict_samples:
+                lines.append(f"  第 {line} 行 '{key}': '{old_value}' -> '{new_value}'")
+        if self.update_samples:
+            lines.append("\n更新的映射:")
+            for key, old_value, new_value in self.update_samples:
+                lines.append(f"  '{key}': '{old_value}' -> '{new_value}'")
+        if self.skipped:
+            lines.append("\n跳过的行:")
+            for line, reason in self.skipped:
+                lines.append(f"  第 {line} 行: {reason}")
+        return "\n".join(lines)
+
+
+def detect_format(path: str) -> str:
+    """按扩展名判断文件格式"""
+    file_format = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f"不支持的文件格式: {path}")
+    return file_format
+
+
+def _iter_delimited(f: TextIO, delimiter: str) -> Iterator[Tuple[int, str, str]]:
+    """逐行读取 CSV / TSV，前两列为查找内容和替换内容"""
+    reader = csv.reader(f, delimiter=delimiter)
+    first = True
+    for row in reader:
+        line = reader.line_num
+        if not any(cell.strip() for cell in row):
+            continue
+        if first:
+            first = False
+            if {cell.strip().lower() for cell in row[:2]} <= HEADER_NAMES:
+                continue
+        yield line, row[0], row[1] if len(row) > 1 else ""
+
+
+def _iter_jsonl(f: TextIO, report: ImportReport) -> Iterator[Tuple[int, str, str]]:
+    """逐行读取 JSONL，每行为 {"key": ..., "value": ...} 或 [查找内容, 替换内容]"""
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            item = json.loads(text)
+        except ValueError as e:
+            report.skip(line, f"JSON 格式错误: {e}")
+            continue
+
+        if isinstance(item, list) and 1 <= len(item) <= 2:
+            key, value = item[0], item[1] if len(item) > 1 else ""
+        elif isinstance(item, dict):
+            key = next((item[field] for field in JSON_KEY_FIELDS if field in item), None)
+            value = next((item[field] for field in JSON_VALUE_FIELDS if field in item), "")
+        else:
+            key = value = None
+        if not isinstance(key, str) or not isinstance(value, str):
+            report.skip(line, "缺少查找内容或替换内容")
+            continue
+        yield line, key, value
+
+
+def _read(path: str, file_format: str, encoding: str) -> Tuple[Dict[str, str], ImportReport]:
+    report = ImportReport(path)
+    imported: Dict[str, str] = {}
+    with open(path, "r", encoding=encoding, newline="") as f:
+        if file_format == FORMAT_JSONL:
+            rows = _iter_jsonl(f, report)
+        else:
+            rows = _iter_delimited(f, "\t" if file_format == FORMAT_TSV else ",")
+
+        for line, key, value in rows:
+            report.rows += 1
+            # 与界面上逐条添加一致，去掉首尾空白
+            key = key.strip()
+            value = value.strip()
+            if not key:
+                report.skip(line, "查找内容为空")
+                continue
+            previous = imported.get(key)
+            if previous is not None:
+                if previous == value:
+                    report.duplicates += 1
+                    continue
+                report.conflicts += 1
+                if len(report.conflict_samples) < MAX_REPORT_SAMPLES:
+                    report.conflict_samples.append((line, key, previous, value))
+            imported[key] = value
+    return imported, report
+
+
+def read_mapping_file(path: str, file_format: Optional[str] = None,
+                      encoding: Optional[str] = None) -> Tuple[Dict[str, str], ImportReport]:
+    """读取映射表文件，返回去重后的映射和导入报告
+
+    未指定编码时依次尝试 DEFAULT_ENCODINGS。文件无法读取时抛出 OSError，
+    格式不受支持或编码无法识别时抛出 ValueError。
+    """
+    if file_format is None:
+        file_format = detect_format(path)
+    encodings = (encoding,) if encoding else DEFAULT_ENCODINGS
+    for candidate in encodings:
+        try:
+            return _read(path, file_format, candidate)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"无法识别文件编码: {path}")
+
+
+def merge_mappings(mappings: Dict[str, str], imported: Dict[str, str],
+                   report: ImportReport) -> Tuple[List[str], List[str]]:
+    """把导入的映射合并到 mappings，返回 (新增的查找内容, 替换内容被改变的查找内容)
+
+    已有的查找内容保持原来的位置，新增的按文件中的顺序追加到末尾。
+    """
+    added = []
+    updated = []
+    for key, value in imported.items():
+        old_value = mappings.get(key)
+        if old_value is None:
+            added.append(key)
+        elif old_value == value:
+            report.unchanged += 1
+            continue
+        else:
+            updated.append(key)
+            if len(report.update_samples) < MAX_REPORT_SAMPLES:
+                report.update_samples.append((key, old_value, value))
+        mappings[key] = value
+    report.added = len(added)
+    report.updated = len(updated)
+    return added, updated
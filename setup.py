@@ -95,6 +95,7 @@ setup(
         "console_scripts": [
             "file-rename-editor=app:main",
             "fre=app:main",  # 简短别名
+            "fre-batch=cli:main",  # 命令行批处理，不依赖 tkinter
         ],
         "gui_scripts": [
             "file-rename-editor-gui=app:main",
@@ -3,13 +3,15 @@
 """
 FileRenameEditor - 文件重命名工具
 支持前缀后缀和映射替换功能
-简化版本，所有代码在一个文件中
+简化版本，界面代码集中在一个文件中
 """
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 from typing import Dict
+from utils.scanner import list_files
+from gui.log_sink import BufferedLogSink
 
 
 class MappingListWidget:
@@ -332,6 +334,9 @@ class FileRenameEditor:
         self.status_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
+        # 状态消息先进入缓冲区，定时批量写入文本框
+        self.log_sink = BufferedLogSink(self.root, self.status_text)
+        
         # 初始状态信息
         self.update_status("欢迎使用文件重命名工具！\n")
         self.update_status(f"当前工作路径: {self.current_path.get()}\n")
@@ -365,7 +370,7 @@ class FileRenameEditor:
             
         # 获取文件夹中的文件信息
         try:
-            files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+            files = list_files(path)
             self.update_status(f"路径确认成功！\n")
             self.update_status(f"文件夹: {path}\n")
             self.update_status(f"包含 {len(files)} 个文件\n")
@@ -408,7 +413,7 @@ class FileRenameEditor:
             return
         
         try:
-            files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+            files = list_files(path)
             if not files:
                 messagebox.showwarning("警告", "该文件夹中没有文件！")
                 return
@@ -458,7 +463,7 @@ class FileRenameEditor:
             return
         
         try:
-            files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+            files = list_files(path)
             if not files:
                 messagebox.showwarning("警告", "该文件夹中没有文件！")
                 return
@@ -500,9 +505,7 @@ class FileRenameEditor:
             
     def update_status(self, message):
         """更新状态信息"""
-        self.status_text.insert(tk.END, message)
-        self.status_text.see(tk.END)
-        self.root.update_idletasks()
+        self.log_sink.write(message)
         
     def run(self):
         """运行应用程序"""
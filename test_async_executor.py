@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试异步重命名执行器 - 与逐个执行的结果一致、保持步骤间的顺序约束、限制并发数
+"""
+
+import functools
+import os
+import tempfile
+import time
+
+from controllers.rename_controller import RenameController
+from core.async_executor import LatencyFileSystem, LocalFileSystem, async_step_executor, iter_execute_steps
+from core.conflict_resolver import resolve_renames
+from core.journal import JournalState, RenameJournal
+from core.rename_worker import execute_steps, iter_execute, iter_resume, iter_undo, run_steps
+
+
+# 链（a1 -> a2 -> a3 -> a4）、环（x <-> y）、三元环和互不相关的文件
+MAPPINGS = {"a1": "a2", "a2": "a3", "a3": "a4", "x": "y", "y": "x", "p": "q", "q": "r", "r": "p", "f": "g"}
+NAMES = ["a1.dat", "a2.dat", "a3.dat", "x.dat", "y.dat", "p.dat", "q.dat", "r.dat"] + [
+    f"f{i:03d}.dat" for i in range(60)]
+
+
+def make_directory(path, names=NAMES):
+    for name in names:
+        with open(os.path.join(path, name), "w") as f:
+            f.write(name)
+
+
+def contents(path):
+    result = {}
+    for name in os.listdir(path):
+        with open(os.path.join(path, name)) as f:
+            result[name] = f.read()
+    return result
+
+
+def plan_for(path):
+    rules = {"prefix": "", "suffix": "", "delete_chars": "", "mappings": MAPPINGS,
+             "regex_rules": [], "settings": {"sequential_mappings": False}}
+    return RenameController(None, None).build_plan(path, rules)
+
+
+def test_matches_sequential():
+    """测试异步执行与逐个执行的结果和文件状态相同，撤销后恢复原状"""
+    print("=== 异步执行器测试 ===\n")
+
+    outcomes = {}
+    with tempfile.TemporaryDirectory() as sequential_dir, tempfile.TemporaryDirectory() as async_dir:
+        for path, execute in ((sequential_dir, None), (async_dir, async_step_executor(depth=8))):
+            make_directory(path)
+            plan = plan_for(path)
+            # 生成计划后目录可能变化：逐个检查目标文件是否已存在
+            plan.directories_unchanged = lambda: False
+            outcomes[path] = list(iter_execute(plan, execute=execute))
+
+        assert outcomes[sequential_dir] == outcomes[async_dir]
+        assert contents(sequential_dir) == contents(async_dir)
+        assert contents(async_dir)["a4.dat"] == "a3.dat" and contents(async_dir)["x.dat"] == "y.dat"
+        print("  ✓ 链和环的结果、顺序与逐个执行相同")
+
+    with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as journal_dir:
+        make_directory(path)
+        original = contents(path)
+        journal_path = os.path.join(journal_dir, "test.journal")
+        fs = LatencyFileSystem(latency=0.001)
+        list(iter_execute(plan_for(path), RenameJournal(journal_path), execute=async_step_executor(4, fs)))
+        assert fs.peak_in_flight <= 4
+        state = JournalState.load(journal_path)
+        state.recover()
+        assert state.finished
+        list(iter_undo(state, RenameJournal(journal_path), execute=async_step_executor(4, fs)))
+        assert contents(path) == original
+        print("  ✓ 同时进行的调用数不超过上限，可按日志异步撤销")
+
+
+def test_casefold_chain():
+    """测试按 casefold 生成的链：a -> B 需要等 b -> c 腾出 b 后才能执行"""
+
+    class SlowSourceFileSystem(LocalFileSystem):
+        def rename(self, source, target):
+            if os.path.basename(source) == "b":
+                time.sleep(0.05)
+            super().rename(source, target)
+
+    viable, steps = resolve_renames([("a", "B"), ("b", "c")], {"a", "b"}, "", True)
+    assert viable == [True, True] and steps[1].requires == "b" and steps[1].target == "B"
+    with tempfile.TemporaryDirectory() as path:
+        make_directory(path, ["a", "b"])
+        execute = async_step_executor(4, SlowSourceFileSystem())
+        results = list(run_steps(path, enumerate(steps), set(), False, execute=execute))
+        assert [result for _, _, result, _ in results] == ["renamed", "renamed"], results
+        assert contents(path) == {"B": "a", "c": "b"}
+    print("  ✓ 只有大小写不同的依赖路径也按顺序执行")
+
+
+def test_cancel_and_resume():
+    """测试中途停止后已发出的调用完成，日志恢复能找出乱序完成的步骤"""
+    with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as journal_dir:
+        make_directory(path)
+        journal_path = os.path.join(journal_dir, "test.journal")
+        journal = RenameJournal(journal_path)
+        # 不按批写入完成记录，模拟崩溃前最后一批未落盘
+        journal.batch_size = 10 ** 6
+        journal.sync_interval = 10 ** 6
+        results = iter_execute(plan_for(path), journal, execute=async_step_executor(8, LatencyFileSystem(0.001)))
+        for _ in range(10):
+            next(results)
+        journal._ok, journal._failed = [], []
+        results.close()
+
+        state = JournalState.load(journal_path)
+        assert not state.done
+        state.recover()
+        # 已完成但未记录的步骤由恢复检查补全，之后只执行剩下的步骤
+        assert len(state.done) >= 10
+        assert len(state.done) + len(state.remaining_steps()) == len(state.steps)
+        list(iter_resume(state, RenameJournal(journal_path), execute=async_step_executor(8)))
+        with tempfile.TemporaryDirectory() as reference:
+            make_directory(reference)
+            list(iter_execute(plan_for(reference)))
+            assert contents(path) == contents(reference)
+        print("  ✓ 停止时等待已发出的调用，继续执行后结果与一次执行完相同")
+
+
+def test_latency_speedup():
+    """测试高延迟文件系统上的调用确实并发进行，结果按步骤顺序产生"""
+    with tempfile.TemporaryDirectory() as path:
+        names = [f"file{i:04d}.dat" for i in range(200)]
+        make_directory(path, names)
+        rules = {"prefix": "new_", "suffix": "", "delete_chars": "", "mappings": {},
+                 "regex_rules": [], "settings": {}}
+        timings = {}
+        for depth in (1, 16):
+            plan = RenameController(None, None).build_plan(path, rules)
+            fs = LatencyFileSystem(0.002)
+            if depth == 1:
+                execute = functools.partial(execute_steps, fs=fs)
+            else:
+                execute = functools.partial(iter_execute_steps, fs=fs, depth=depth)
+            start = time.perf_counter()
+            results = list(run_steps(path, enumerate(plan.steps), set(), True, execute=execute))
+            timings[depth] = time.perf_counter() - start
+            assert [(old, new) for old, new, _, _ in results] == [(step.old_name, step.new_name)
+                                                                 for step in plan.steps]
+            assert all(result == "renamed" for _, _, result, _ in results)
+            # 耗时受机器负载影响，只检查同时进行的调用数
+            expected_peak = range(1, 2) if depth == 1 else range(2, depth + 1)
+            assert fs.peak_in_flight in expected_peak, fs.peak_in_flight
+            # 第二次把文件名改回原样
+            rules = dict(rules, prefix="", mappings={"new_": ""})
+        assert sorted(os.listdir(path)) == names
+        print(f"  ✓ 每次调用延迟 2 ms：逐个执行 {timings[1]:.2f} 秒，16 个并发 {timings[16]:.2f} 秒")
+
+
+if __name__ == "__main__":
+    test_matches_sequential()
+    test_casefold_chain()
+    test_cancel_and_resume()
+    test_latency_speedup()
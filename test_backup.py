@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试重命名前备份原文件
+"""
+
+import os
+import tempfile
+
+from core.backup import BACKUP_DIR_NAME, BACKUP_LINKED, FileBackup
+
+
+def make_files(path, names):
+    for name in names:
+        full_path = os.path.join(path, name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(name * 100)
+
+
+def test_backup():
+    """测试硬链接备份和不支持硬链接时的复制"""
+    print("=== 备份测试 ===\n")
+
+    names = ["a.txt", "b.txt", os.path.join("sub", "c.txt")]
+    with tempfile.TemporaryDirectory() as path:
+        make_files(path, names)
+
+        backup = FileBackup(path, os.path.join(path, "linked"))
+        report = backup.run(names)
+        assert report.complete and report.files[BACKUP_LINKED] == 3
+        assert os.path.samefile(os.path.join(path, "a.txt"), os.path.join(path, "linked", "a.txt"))
+        print(f"  ✓ {report.summary()}")
+
+        # 模拟不支持硬链接的文件系统
+        backup = FileBackup(path, os.path.join(path, "copied"))
+        backup._no_link.add(os.stat(path).st_dev)
+        report = backup.run(names)
+        assert report.complete and report.files[BACKUP_LINKED] == 0
+        assert sum(report.bytes.values()) == sum(len(n) * 100 for n in names)
+        for name in names:
+            with open(os.path.join(path, "copied", name), encoding="utf-8") as f:
+                assert f.read() == name * 100
+        print(f"  ✓ {report.summary()}")
+
+        report = FileBackup(path, os.path.join(path, "missing")).run(["missing.txt"])
+        assert not report.complete and report.failed[0][0] == "missing.txt"
+        print("  ✓ 原文件不存在时记录失败")
+
+        # 连续两次备份通常在同一秒内，各自使用新的目录
+        first = FileBackup(path).run(names[:1])
+        second = FileBackup(path).run(names[:1])
+        assert first.complete and second.complete and first.backup_dir != second.backup_dir
+        assert os.path.dirname(first.backup_dir) == os.path.join(path, BACKUP_DIR_NAME)
+        print("  ✓ 同一秒内多次备份不互相冲突")
+
+
+if __name__ == "__main__":
+    test_backup()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试紧凑格式（SQLite）的 .fre 配置
+"""
+
+import os
+import tempfile
+
+from models.config_manager import ConfigManager
+from models.compact_config import CHUNK_SIZE, is_compact_config
+
+
+def test_compact_config():
+    """测试保存、加载、只读元数据和按需读取映射"""
+    print("=== 紧凑格式配置测试 ===\n")
+
+    config_manager = ConfigManager()
+    mappings = {f"键{i}": f"值{i}" for i in range(CHUNK_SIZE * 2 + 5)}
+    mappings['含"引号'] = "q"
+    config = config_manager.create_config("/tmp", mappings=mappings, name="紧凑",
+                                          settings={"sequential_mappings": True})
+    config["future_field"] = {"nested": [1, 2]}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "compact.fre")
+        assert config_manager.save_config(config, path, compact=True)
+        assert is_compact_config(path)
+
+        loaded = config_manager.load_config(path)
+        assert loaded["mappings"] == mappings and list(loaded["mappings"]) == list(mappings)
+        assert loaded["settings"]["sequential_mappings"] is True
+        assert loaded["future_field"] == {"nested": [1, 2]}
+        print("  ✓ 加载结果与 JSON 格式相同，保留未知字段和映射顺序")
+
+        metadata, count = config_manager.load_config_metadata(path)
+        assert metadata["name"] == "紧凑" and metadata["mappings"] == {} and count == len(mappings)
+        print("  ✓ 只读取元数据和映射数量")
+
+        with config_manager.open_mappings(path) as lazy:
+            assert len(lazy) == len(mappings)
+            assert list(lazy.items()) == list(mappings.items())
+            assert lazy[f"键{CHUNK_SIZE + 1}"] == f"值{CHUNK_SIZE + 1}"
+            assert lazy['含"引号'] == "q"
+            assert "键" not in lazy
+        print("  ✓ 按块遍历和按查找内容取值")
+
+        # 不指定格式时沿用原有格式
+        loaded["mappings"] = {"a": "b"}
+        assert config_manager.save_config(loaded, path)
+        assert is_compact_config(path)
+        assert config_manager.load_config(path)["mappings"] == {"a": "b"}
+
+        json_path = os.path.join(directory, "plain.fre")
+        assert config_manager.save_config(loaded, json_path)
+        assert not is_compact_config(json_path)
+        assert config_manager.load_config_metadata(json_path)[1] == 1
+        print("  ✓ 再次保存沿用原格式，新文件默认为 JSON")
+
+
+if __name__ == "__main__":
+    test_compact_config()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试配置库索引
+"""
+
+import os
+import tempfile
+
+from models.config_manager import ConfigManager
+from models.config_library import ConfigLibrary, PREVIEW_MAPPINGS
+
+
+def test_config_library():
+    """测试索引缓存、增量刷新和搜索"""
+    print("=== 配置库索引测试 ===\n")
+
+    config_manager = ConfigManager()
+    with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as cache_dir:
+        os.makedirs(os.path.join(directory, "子目录"))
+        plain = os.path.join(directory, "plain.fre")
+        compact = os.path.join(directory, "子目录", "compact.fre")
+        broken = os.path.join(directory, "broken.fre")
+
+        mappings = {f"k{i}": f"v{i}" for i in range(50)}
+        config_manager.save_config(config_manager.create_config(
+            "/data/动画", prefix="[字幕组]", mappings=mappings, name="动画重命名",
+            description="番剧整理"), plain)
+        config_manager.save_config(config_manager.create_config(
+            "/data/music", mappings={"a": "b"}, name="音乐"), compact, compact=True)
+        with open(broken, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        with open(os.path.join(directory, "notes.txt"), "w", encoding="utf-8") as f:
+            f.write("ignored")
+
+        cache_path = os.path.join(cache_dir, "library.json")
+        library = ConfigLibrary(config_manager, cache_path)
+        assert library.add_directory(directory) and not library.add_directory(directory)
+        assert library.refresh() == 3
+        entry = library.entries[os.path.abspath(plain)]
+        assert entry.name == "动画重命名" and entry.mapping_count == 50 and entry.prefix == "[字幕组]"
+        assert len(entry.preview) == PREVIEW_MAPPINGS and entry.preview[0] == ["k0", "v0"]
+        assert library.entries[os.path.abspath(compact)].mapping_count == 1
+        assert library.entries[os.path.abspath(broken)].error
+        assert "还有 30 条" in entry.summary()
+        print("  ✓ 索引 JSON、紧凑格式和无法解析的配置")
+
+        assert [e.name for e in library.search("番剧")] == ["动画重命名"]
+        assert [e.name for e in library.search("MUSIC")] == ["音乐"]
+        assert len(library.search("")) == 3
+        print("  ✓ 按名称、描述和路径搜索")
+
+        library = ConfigLibrary(config_manager, cache_path)
+        assert len(library.entries) == 3 and library.refresh() == 0
+        print("  ✓ 缓存有效时不重新解析")
+
+        config_manager.save_config(config_manager.create_config("/data/music", mappings={"a": "b", "c": "d"},
+                                                                 name="音乐"), compact, compact=True)
+        os.remove(broken)
+        assert library.refresh() == 1
+        assert library.entries[os.path.abspath(compact)].mapping_count == 2
+        assert os.path.abspath(broken) not in library.entries
+        print("  ✓ 只重新解析修改过的配置，删除的配置移出索引")
+
+
+if __name__ == "__main__":
+    test_config_library()
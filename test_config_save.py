@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试配置的原子保存和内容未变化时跳过写入
+"""
+
+import os
+import tempfile
+
+from models.config_manager import ConfigManager
+
+
+def test_save_config():
+    """测试跳过未变化的保存、原子替换和写入失败时保留原文件"""
+    print("=== 配置保存测试 ===\n")
+
+    config_manager = ConfigManager()
+    with tempfile.TemporaryDirectory() as directory:
+        for compact in (False, True):
+            path = os.path.join(directory, f"config_{compact}.fre")
+            config = config_manager.create_config("/data", mappings={"a": "1", "b": "2"}, name="测试")
+            assert config_manager.save_config(config, path, compact=compact)
+            saved = config_manager.load_config(path)
+            st = os.stat(path)
+
+            # 重新创建的配置只有时间戳不同
+            again = config_manager.create_config("/data", mappings={"a": "1", "b": "2"}, name="测试")
+            assert config_manager.save_config(again, path)
+            assert os.stat(path).st_mtime_ns == st.st_mtime_ns and os.stat(path).st_ino == st.st_ino
+            assert config_manager.load_config(path)["updated_at"] == saved["updated_at"]
+
+            # 映射顺序改变也要重新写入
+            again["mappings"] = {"b": "2", "a": "1"}
+            assert config_manager.save_config(again, path)
+            assert list(config_manager.load_config(path)["mappings"]) == ["b", "a"]
+            assert os.stat(path).st_ino != st.st_ino
+            print(f"  ✓ {'紧凑' if compact else 'JSON'} 格式：内容未变化时跳过写入，变化时原子替换")
+
+        # 其他程序修改了映射但保留文件开头记录的哈希：按内容核对后重新写入
+        path = os.path.join(directory, "config_False.fre")
+        config = config_manager.load_config(path)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text.replace('"b": "2"', '"b": "edited"'))
+        assert config_manager.save_config(config, path)
+        assert config_manager.load_config(path)["mappings"] == {"a": "1", "b": "2"}
+        print("  ✓ 文件内容与记录的哈希不符时不跳过保存")
+
+        path = os.path.join(directory, "config_False.fre")
+        with open(path, "rb") as f:
+            original = f.read()
+        broken = config_manager.create_config("/data", mappings={"a": "1"}, name="测试")
+        broken["unserializable"] = object()
+        assert not config_manager.save_config(broken, path)
+        with open(path, "rb") as f:
+            assert f.read() == original
+        assert sorted(os.listdir(directory)) == ["config_False.fre", "config_True.fre"]
+        print("  ✓ 写入失败时原文件不变，不留下临时文件")
+
+
+if __name__ == "__main__":
+    test_save_config()
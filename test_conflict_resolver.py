@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试重命名链和循环的冲突解析
+"""
+
+import os
+import tempfile
+
+from controllers.rename_controller import RenameController
+from core.conflict_resolver import resolve_renames
+from core.rename_plan import DirectoryPlan, STATUS_CHANGED, STATUS_CONFLICT
+from core.journal import JournalState, RenameJournal
+from core.rename_worker import iter_execute, iter_undo, RESULT_FAILED, RESULT_RENAMED
+from utils.scanner import is_case_sensitive
+
+
+def run_mappings(files, mappings):
+    """在临时目录中按映射执行重命名，返回 (计划状态, 执行后目录内容)"""
+    with tempfile.TemporaryDirectory() as path:
+        for name in files:
+            with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+                f.write(name)
+
+        controller = RenameController(None, None)
+        rules = {"prefix": "", "suffix": "", "delete_chars": "",
+                 "mappings": mappings, "settings": {}}
+        plan = controller.build_plan(path, rules)
+        statuses = {entry.old_name: entry.status for entry in plan}
+        results = list(iter_execute(plan))
+
+        contents = {}
+        for name in os.listdir(path):
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                contents[name] = f.read()
+        return statuses, results, contents
+
+
+def test_swap_and_cycle():
+    """测试交换和三元循环"""
+    print("=== 交换与循环测试 ===\n")
+
+    statuses, results, contents = run_mappings(["a", "b"], {"a": "b", "b": "a"})
+    assert statuses == {"a": STATUS_CHANGED, "b": STATUS_CHANGED}
+    assert contents == {"a": "b", "b": "a"}, contents
+    print("  ✓ a <-> b 交换成功")
+
+    statuses, results, contents = run_mappings(["x1", "x2", "x3"], {"1": "2", "2": "3", "3": "1"})
+    assert contents == {"x2": "x1", "x3": "x2", "x1": "x3"}, contents
+    assert all(result == RESULT_RENAMED for _, _, result, _ in results)
+    print("  ✓ 三元循环成功")
+
+
+def test_chain():
+    """测试重命名链与被阻塞的链"""
+    print("\n=== 重命名链测试 ===\n")
+
+    # a1 -> a2 -> a3 -> a4，与列出顺序无关
+    statuses, results, contents = run_mappings(["a1", "a2", "a3"], {"3": "4", "2": "3", "1": "2"})
+    assert contents == {"a2": "a1", "a3": "a2", "a4": "a3"}, contents
+    print("  ✓ 链式重命名成功")
+
+    # b -> c，而 c 不会被移走，整条链冲突
+    viable, steps = resolve_renames([("a", "b"), ("b", "c")], {"a", "b", "c"})
+    assert viable == [False, False] and steps == []
+    print("  ✓ 被阻塞的链标记为冲突")
+
+    # 两个文件映射到同一目标名，只保留第一个
+    viable, steps = resolve_renames([("a", "x"), ("b", "x")], {"a", "b"})
+    assert viable == [True, False]
+    print("  ✓ 重复目标名只保留第一个")
+
+    statuses, results, contents = run_mappings(["a1", "a2"], {"1": "3", "2": "3"})
+    assert sorted(statuses.values()) == [STATUS_CHANGED, STATUS_CONFLICT]
+    print("  ✓ 计划中标记冲突")
+
+
+def test_failed_cycle_reverted():
+    """测试循环中途失败时还原已执行的步骤，不把文件留在临时文件名"""
+    print("\n=== 循环失败还原测试 ===\n")
+
+    real_rename = os.rename
+
+    def check_contents(path):
+        names = sorted(os.listdir(path))
+        assert names == ["p", "q", "r"], names
+        for name in names:
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                assert f.read() == name
+
+    # 第一种情况移出 r 失败；第二种情况移入 p 失败，已执行的步骤也无法还原
+    for fails in (lambda source, target: os.path.basename(source) == "r",
+                  lambda source, target: os.path.basename(target) == "p"):
+        def failing_rename(source, target):
+            if fails(source, target):
+                raise PermissionError("模拟失败")
+            real_rename(source, target)
+
+        with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as journal_dir:
+            for name in ("p", "q", "r"):
+                with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+                    f.write(name)
+            rules = {"prefix": "", "suffix": "", "delete_chars": "",
+                     "mappings": {"p": "q", "q": "r", "r": "p"}, "settings": {}}
+            plan = RenameController(None, None).build_plan(path, rules)
+            journal_path = os.path.join(journal_dir, "test.journal")
+            os.rename = failing_rename
+            try:
+                results = list(iter_execute(plan, RenameJournal(journal_path)))
+            finally:
+                os.rename = real_rename
+            temp_names = [name for name in os.listdir(path) if ".fre-tmp" in name]
+            if temp_names:
+                # 无法还原时错误信息指出临时文件，之后可按日志撤销
+                assert any(temp_names[0] in (error or "") for _, _, _, error in results), results
+                state = JournalState.load(journal_path)
+                state.recover()
+                list(iter_undo(state, RenameJournal(journal_path)))
+            else:
+                assert all(result == RESULT_FAILED for _, _, result, _ in results), results
+                state = JournalState.load(journal_path)
+                assert not state.done and len(state.failed) == len(plan.steps)
+            check_contents(path)
+    print("  ✓ 三元循环中一步失败时还原为原文件名；无法还原时报告临时文件，可按日志撤销")
+
+
+def test_case_insensitive_names():
+    """测试不区分大小写的文件系统上按 casefold 判断目标名是否被占用"""
+    print("\n=== 大小写不敏感测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as path:
+        open(os.path.join(path, "a.txt"), "w").close()
+        # 测试环境为 Linux 临时目录，区分大小写；没有含字母的条目时无法判断
+        assert is_case_sensitive(path, ["a.txt"]) is True
+        assert is_case_sensitive(path, ["1", "2"]) is None
+    print("  ✓ 检测目录所在文件系统是否区分大小写")
+
+    # a -> B 而 b 保留：不区分大小写时 B 就是 b，不能覆盖
+    for casefold, expected in ((False, STATUS_CHANGED), (True, STATUS_CONFLICT)):
+        plan = DirectoryPlan(casefold=casefold)
+        plan.rebuild([("a", "B"), ("b", "b")], set())
+        assert plan.entries["a"].status == expected, (casefold, plan.entries["a"])
+    print("  ✓ 与已有文件只有大小写不同的目标名标记为冲突")
+
+    # 只改变大小写和大小写不同的交换都通过临时文件名完成
+    plan = DirectoryPlan(casefold=True)
+    plan.rebuild([("a", "A"), ("x", "Y"), ("y", "X")], set())
+    assert all(entry.status == STATUS_CHANGED for entry in plan.entries.values())
+    assert len(plan.steps) == 5 and sum(not step.final for step in plan.steps) == 2, plan.steps
+    assert not plan.update(changed=[("a", "b")])
+    print("  ✓ 只改变大小写的重命名和交换通过临时文件名执行")
+
+
+if __name__ == "__main__":
+    test_swap_and_cycle()
+    test_chain()
+    test_failed_cycle_reverted()
+    test_case_insensitive_names()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试目录实时索引、文件名倒排索引和增量预览
+"""
+
+import os
+import tempfile
+
+from controllers.rename_controller import RenameController
+from core.name_index import NGramIndex
+from models.file_manager import FileManager
+from utils.dir_index import DirectoryIndex
+
+
+RULES = {"prefix": "", "suffix": "", "delete_chars": "",
+         "mappings": {"old": "new", "a": "b", "b": "a"}, "settings": {}}
+
+
+def touch(path, name):
+    open(os.path.join(path, name), "w").close()
+
+
+def check_incremental(use_inotify):
+    """增量计划与完整重新扫描的结果一致"""
+    with tempfile.TemporaryDirectory() as path:
+        for i in range(20):
+            touch(path, f"{i}_old.txt")
+        touch(path, "xa")
+        touch(path, "xb")
+
+        file_manager = FileManager()
+        file_manager.index = DirectoryIndex(path, use_inotify=use_inotify)
+        controller = RenameController(None, file_manager)
+        reference = RenameController(None, None)
+
+        controller.build_plan(path, RULES)
+        changes = [
+            lambda: touch(path, "new_old.txt"),                     # 独立的新增文件
+            lambda: os.remove(os.path.join(path, "3_old.txt")),     # 独立的删除
+            lambda: touch(path, "5_new.txt"),                       # 占用了已有重命名的目标名
+            lambda: os.remove(os.path.join(path, "xb")),            # 拆开交换
+            lambda: os.mkdir(os.path.join(path, "7_new.txt")),      # 新增子目录占用目标名
+        ]
+        for change in changes:
+            change()
+            if not use_inotify:
+                # 轮询依赖目录修改时间，测试中强制重新检查
+                for directory in file_manager.index.sync():
+                    directory.scanned_at_ns = 0
+            plan = controller.build_plan(path, RULES)
+            expected = reference.build_plan(path, RULES)
+            assert sorted(plan.entries) == sorted(expected.entries), change
+        file_manager.close_index()
+        return file_manager.index is None
+
+
+def test_incremental_plan():
+    """测试 inotify 和轮询两种方式"""
+    print("=== 增量预览测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as path:
+        index = DirectoryIndex(path)
+        backend = index.backend
+        index.close()
+    if backend == "inotify":
+        assert check_incremental(True)
+        print("  ✓ inotify 增量计划与重新扫描一致")
+    assert check_incremental(False)
+    print("  ✓ 轮询增量计划与重新扫描一致")
+
+
+def test_mapping_change():
+    """测试映射改变时只重新计算受影响的文件"""
+    print("\n=== 映射改变测试 ===\n")
+
+    index = NGramIndex(["第一集.mp4", "第二集.mp4", "a_b.txt", "ab.txt"])
+    assert sorted(index.search("第一")) == ["第一集.mp4"]
+    assert sorted(index.search("集")) == ["第一集.mp4", "第二集.mp4"]
+    index.remove("第一集.mp4")
+    assert index.search("第一") == []
+    assert index.search_any(["ab", "_b"]) == {"a_b.txt", "ab.txt"}
+    print("  ✓ 倒排索引查找子串")
+
+    with tempfile.TemporaryDirectory() as path:
+        for name in ["第一集.mp4", "第二集.mp4", "第三集.mp4", "花絮.mp4", "第1集.mp4"]:
+            touch(path, name)
+
+        file_manager = FileManager()
+        file_manager.index = DirectoryIndex(path, use_inotify=False)
+        controller = RenameController(None, file_manager)
+        reference = RenameController(None, None)
+
+        mappings = {"第一集": "E01"}
+        for change in [{"第二集": "E02"}, {"第一集": "Ep01"}, {"花絮": "第1集"}, {"花絮": "SP"}]:
+            mappings = dict(mappings, **change)
+            rules = dict(RULES, mappings=mappings)
+            plan = controller.build_plan(path, rules)
+            expected = reference.build_plan(path, rules)
+            assert sorted(plan.entries) == sorted(expected.entries), change
+        file_manager.close_index()
+    print("  ✓ 增量重新计算与完整计算一致")
+
+
+if __name__ == "__main__":
+    test_incremental_plan()
+    test_mapping_change()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多目录任务 - 按设备分组、每个设备的并发上限和汇总报告
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+import cli
+from controllers.job_runner import (JobRunner, MODE_DRY_RUN, MODE_UNDO, ROOT_DONE, ROOT_ERROR, ROOT_NO_JOURNAL,
+                                    ROOT_PATH_ERROR, group_by_device, nested_roots)
+from controllers.rename_controller import RenameController
+from core.journal import RenameJournal
+from models.config_manager import ConfigManager
+
+
+RULES = {"prefix": "", "suffix": "", "delete_chars": "", "mappings": {"old": "new"},
+         "regex_rules": [], "settings": {}}
+
+
+def make_roots(directory, count):
+    roots = []
+    for i in range(count):
+        root = os.path.join(directory, f"root{i}")
+        os.mkdir(root)
+        for name in ("old_a.txt", "old_b.txt", "keep.txt"):
+            open(os.path.join(root, name), "w").close()
+        roots.append(root)
+    return roots
+
+
+class TrackingRunner(JobRunner):
+    """记录同时处理的目录数 - 先开始的目录等到同时处理的目录数达到上限后才继续，不依赖线程调度的时机"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.saturated = threading.Event()
+
+    def run_root(self, path, device=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            if self.active >= self.device_limit:
+                self.saturated.set()
+        self.saturated.wait(timeout=10)
+        try:
+            return super().run_root(path, device)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_job_runner():
+    """测试并发上限、结果汇总和出错的目录"""
+    print("=== 多目录任务测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        roots = make_roots(directory, 6)
+        missing = os.path.join(directory, "missing")
+        groups = group_by_device(roots + [missing, roots[0]])
+        assert groups == {os.stat(directory).st_dev: roots, None: [missing]}
+        print("  ✓ 按 st_dev 分组，重复目录只处理一次，无法访问的目录单独一组")
+
+        records = []
+        runner = TrackingRunner(RenameController(None, None), RULES, MODE_DRY_RUN, device_limit=2,
+                                on_record=records.append)
+        report = runner.run(roots)
+        assert runner.peak == 2
+        assert len([r for r in records if r["type"] == "plan"]) == 18
+        assert all(name.startswith("old") for root in roots for name in os.listdir(root) if name != "keep.txt")
+        print("  ✓ 每个设备同时处理的目录数不超过上限，预览不修改文件")
+
+        records = []
+        controller = RenameController(None, None)
+        report = JobRunner(controller, RULES, device_limit=3, on_record=records.append).run(roots + [missing])
+        assert [root.path for root in report.roots] == roots + [missing]
+        assert [root.status for root in report.roots] == [ROOT_DONE] * 6 + [ROOT_PATH_ERROR]
+        assert report.counts == {"renamed": 12, "unchanged": 6, "skipped": 0, "failed": 0}
+        assert sorted(os.listdir(roots[3])) == ["keep.txt", "new_a.txt", "new_b.txt"]
+        summary = report.as_dict()
+        assert {device["device"]: device["roots"] for device in summary["devices"]} == {
+            os.stat(directory).st_dev: 6, None: 1}
+        assert [r["path"] for r in records if r["type"] == "error"] == [missing]
+        print("  ✓ 汇总报告按输入顺序列出各目录，并按设备统计")
+
+        report = JobRunner(controller, RULES, MODE_UNDO).run(roots[:2] + [missing])
+        assert report.roots[2].status == ROOT_NO_JOURNAL
+        assert report.counts["renamed"] == 4
+        assert sorted(os.listdir(roots[0])) == ["keep.txt", "old_a.txt", "old_b.txt"]
+        print("  ✓ 各目录使用各自的日志撤销")
+
+
+def test_root_error():
+    """测试一个目录发生意外错误时其他目录照常处理"""
+    with tempfile.TemporaryDirectory() as directory:
+        roots = make_roots(directory, 3)
+        real_begin = RenameJournal.begin
+
+        def failing_begin(journal, work_path, steps):
+            if work_path == roots[1]:
+                raise OSError(28, "No space left on device")
+            return real_begin(journal, work_path, steps)
+
+        records = []
+        RenameJournal.begin = failing_begin
+        try:
+            report = JobRunner(RenameController(None, None), RULES, on_record=records.append).run(roots)
+        finally:
+            RenameJournal.begin = real_begin
+        assert [root.status for root in report.roots] == [ROOT_DONE, ROOT_ERROR, ROOT_DONE]
+        assert "No space left on device" in report.roots[1].error
+        assert [r["path"] for r in records if r["type"] == "error"] == [roots[1]]
+        assert sorted(os.listdir(roots[1])) == ["keep.txt", "old_a.txt", "old_b.txt"]
+        assert sorted(os.listdir(roots[2])) == ["keep.txt", "new_a.txt", "new_b.txt"]
+        print("  ✓ 无法写入重命名日志的目录报告为出错，不影响其他目录")
+
+
+def test_nested_roots():
+    """测试包含子文件夹时，位于另一个目录之下的目录只随外层目录处理一次"""
+    with tempfile.TemporaryDirectory() as directory:
+        top = make_roots(directory, 1)[0]
+        sub = make_roots(top, 1)[0]
+        link = os.path.join(directory, "link")
+        os.symlink(sub, link)
+        assert nested_roots([sub, top, link]) == {sub: top, link: top}
+        assert nested_roots([top, os.path.join(directory, "root")]) == {}
+
+        records = []
+        rules = dict(RULES, settings={"include_subfolders": True})
+        report = JobRunner(RenameController(None, None), rules, on_record=records.append).run([link, top])
+        assert [root.path for root in report.roots] == [top]
+        assert report.roots[0].status == ROOT_DONE and report.counts["renamed"] == 4
+        assert [(r["path"], r["parent"]) for r in records if r["type"] == "nested"] == [(link, top)]
+        assert sorted(os.listdir(sub)) == ["keep.txt", "new_a.txt", "new_b.txt"]
+        print("  ✓ 包含子文件夹时内层目录（包括经符号链接指定的）不与外层目录并发处理")
+
+
+def test_cli_multiple_roots():
+    """测试命令行处理多个目录"""
+    with tempfile.TemporaryDirectory() as directory:
+        roots = make_roots(directory, 3)
+        config_path = os.path.join(directory, "rules.fre")
+        config_manager = ConfigManager()
+        assert config_manager.save_config(config_manager.create_config(directory, mappings={"old": "new"}),
+                                          config_path)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            exit_code = cli.main([config_path, *roots, os.path.join(directory, "missing"),
+                                  "--jobs-per-device", "2"])
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert exit_code == cli.EXIT_PATH_ERROR
+        report = next(r for r in records if r["type"] == "report")
+        assert [root["status"] for root in report["roots"]] == [ROOT_DONE] * 3 + [ROOT_PATH_ERROR]
+        assert records[-1]["type"] == "summary" and records[-1]["renamed"] == 6
+        print("  ✓ 命令行输出汇总报告，退出码与逐个处理时相同")
+
+
+# 命令行启动时不应导入的模块：只在需要时才导入，保持启动快
+STARTUP_EXCLUDED_MODULES = ("tkinter", "asyncio", "sqlite3", "concurrent.futures")
+
+
+def test_cli_startup_imports():
+    """测试命令行解析参数、导入各模块并加载 JSON 配置后，没有导入较慢的模块"""
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "rules.fre")
+        config_manager = ConfigManager()
+        assert config_manager.save_config(config_manager.create_config(directory, mappings={"old": "new"}),
+                                          config_path)
+        # 在新的解释器中检查，不受本进程已导入模块的影响
+        script = (
+            "import sys, cli\n"
+            f"cli.parse_args([{config_path!r}, {directory!r}, '--dry-run'])\n"
+            "from models.config_manager import ConfigManager\n"
+            "from controllers.rename_controller import RenameController\n"
+            "from controllers import job_runner\n"
+            f"assert ConfigManager().load_config({config_path!r}) is not None\n"
+            f"print(','.join(m for m in {STARTUP_EXCLUDED_MODULES!r} if m in sys.modules))\n"
+        )
+        output = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+        assert output == "", f"启动时导入了 {output}"
+    print("  ✓ 命令行启动时不导入 tkinter、asyncio、sqlite3 和 concurrent.futures")
+
+
+if __name__ == "__main__":
+    test_job_runner()
+    test_root_error()
+    test_nested_roots()
+    test_cli_multiple_roots()
+    test_cli_startup_imports()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试重命名日志的撤销与中断恢复
+"""
+
+import os
+import tempfile
+
+from controllers.rename_controller import RenameController
+from core.journal import JournalState, RenameJournal
+from core.rename_worker import iter_execute, iter_resume, iter_undo
+
+
+def make_files(path, names):
+    for name in names:
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write(name)
+
+
+def read_files(path):
+    contents = {}
+    for name in os.listdir(path):
+        with open(os.path.join(path, name), encoding="utf-8") as f:
+            contents[name] = f.read()
+    return contents
+
+
+def build_plan(path, mappings):
+    rules = {"prefix": "", "suffix": "", "delete_chars": "",
+             "mappings": mappings, "settings": {}}
+    return RenameController(None, None).build_plan(path, rules)
+
+
+def load_state(journal_path):
+    state = JournalState.load(journal_path)
+    state.recover()
+    return state
+
+
+def test_undo():
+    """测试执行后撤销，包括交换产生的临时文件名步骤"""
+    print("=== 撤销测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as journal_dir:
+        make_files(path, ["a1", "a2", "x"])
+        original = read_files(path)
+        journal_path = os.path.join(journal_dir, "test.journal")
+
+        list(iter_execute(build_plan(path, {"1": "2", "2": "1", "x": "y"}), RenameJournal(journal_path)))
+        assert read_files(path) == {"a1": "a2", "a2": "a1", "y": "x"}
+
+        state = load_state(journal_path)
+        assert state.finished and not state.is_interrupted()
+        list(iter_undo(state, RenameJournal(journal_path)))
+        assert read_files(path) == original
+        assert not load_state(journal_path).steps_to_undo()
+        print("  ✓ 撤销后恢复原文件名")
+
+
+def test_interrupted_resume():
+    """测试完成记录未落盘时的恢复与继续"""
+    print("\n=== 中断恢复测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as journal_dir:
+        names = [f"f{i:03d}_old" for i in range(50)]
+        make_files(path, names)
+        journal_path = os.path.join(journal_dir, "test.journal")
+
+        # 模拟在第 20 个文件后崩溃：截断日志到 ready 之后
+        results = iter_execute(build_plan(path, {"old": "new"}), RenameJournal(journal_path))
+        for _ in range(20):
+            next(results)
+        results.close()
+        with open(journal_path, encoding="utf-8") as f:
+            lines = f.readlines()
+        ready = next(i for i, line in enumerate(lines) if '"ready"' in line)
+        with open(journal_path, "w", encoding="utf-8") as f:
+            f.writelines(lines[:ready + 1])
+
+        state = load_state(journal_path)
+        assert state.is_interrupted()
+        assert len(state.done) == 20 and len(state.remaining_steps()) == 30
+        print("  ✓ 恢复出已执行的 20 个步骤")
+
+        list(iter_resume(state, RenameJournal(journal_path)))
+        assert sorted(read_files(path)) == [f"f{i:03d}_new" for i in range(50)]
+        assert not load_state(journal_path).is_interrupted()
+        print("  ✓ 继续执行剩余步骤")
+
+
+if __name__ == "__main__":
+    test_undo()
+    test_interrupted_resume()
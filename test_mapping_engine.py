@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试映射匹配引擎
+"""
+
+import json
+import os
+import random
+import tempfile
+
+from controllers.rename_controller import RenameController
+from core.mapping_engine import MappingMatcher
+from models.config_manager import ConfigManager
+from models.file_manager import FileManager
+
+
+def legacy_apply_mappings(filename, mappings):
+    """旧版逐条替换逻辑"""
+    result = filename
+    for key, value in mappings.items():
+        if key in result:
+            result = result.replace(key, value)
+    return result
+
+
+def test_single_pass():
+    """测试单次扫描替换"""
+    print("=== 单次扫描替换测试 ===\n")
+
+    test_cases = [
+        ({"IMG_": "照片_", "_": " "}, "IMG_2023_01.jpg", "照片_2023 01.jpg",
+         "替换结果不会被后续规则再次替换"),
+        ({"ab": "X", "abc": "Y"}, "abcab", "YX", "同一位置取最长匹配"),
+        ({"bc": "X", "abcd": "Y"}, "abcde", "Ye", "最左匹配优先"),
+        ({"a": "b", "b": "a"}, "abba", "baab", "交换字符"),
+        ({"旧": "新", "文件": "档案"}, "旧文件.txt", "新档案.txt", "中文映射"),
+        ({}, "photo.jpg", "photo.jpg", "无映射"),
+    ]
+
+    for mappings, filename, expected, description in test_cases:
+        result = MappingMatcher(mappings).apply(filename)
+        print(f"{description}: {filename} -> {result}")
+        assert result == expected, f"期望 {expected}, 实际 {result}"
+        print("  ✓ 结果正确")
+
+
+def test_sequential_matches_legacy():
+    """测试顺序模式与旧版逐条替换结果一致"""
+    print("\n=== 顺序模式兼容性测试 ===\n")
+
+    rng = random.Random(42)
+    alphabet = "ab_c文"
+
+    for _ in range(500):
+        mappings = {}
+        for _ in range(rng.randint(0, 8)):
+            key = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 3)))
+            mappings[key] = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 3)))
+        filename = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+        expected = legacy_apply_mappings(filename, mappings)
+        result = MappingMatcher(mappings, sequential=True).apply(filename)
+        assert result == expected, f"{mappings!r} {filename!r}: 期望 {expected!r}, 实际 {result!r}"
+
+    print("  ✓ 500 组随机用例结果一致")
+
+
+def casefold_apply_mappings(filename, mappings):
+    """逐个位置比较 casefold 结果的单次扫描替换（同一位置取 casefold 后最长的查找内容）"""
+    keys = {}
+    for key in mappings:
+        keys.setdefault(key.casefold(), key)
+    result = []
+    pos = 0
+    while pos < len(filename):
+        best = None
+        for end in range(pos + 1, len(filename) + 1):
+            key = keys.get(filename[pos:end].casefold())
+            if key and (best is None or len(key.casefold()) > len(best[1].casefold())):
+                best = (end, key)
+        if best is None:
+            result.append(filename[pos])
+            pos += 1
+        else:
+            result.append(mappings[best[1]])
+            pos = best[0]
+    return "".join(result)
+
+
+def test_compile_cache():
+    """测试映射编译缓存：同一映射对象直接复用，内容相同的新字典也复用，内容变化时重新编译"""
+    controller = RenameController(None, None)
+    mappings = {"IMG_": "照片_", "_": " "}
+    matcher = controller.compile_mappings(mappings)
+    assert controller.apply_mappings("IMG_01.jpg", mappings) == "照片_01.jpg"
+    assert controller.compile_mappings(mappings) is matcher
+    assert controller.compile_mappings(dict(mappings)) is matcher
+    assert controller.compile_mappings(dict(reversed(mappings.items()))) is not matcher
+    assert controller.compile_mappings(mappings, sequential=True) is not matcher
+    mappings["01"] = "02"
+    assert controller.apply_mappings("IMG_01.jpg", mappings) == "照片_02.jpg"
+    print("  ✓ 映射未变化时复用编译结果，条数、顺序或设置变化时重新编译")
+
+
+def test_legacy_config_sequential():
+    """测试没有 sequential_mappings 的旧配置加载后仍按顺序逐条替换"""
+    config_manager = ConfigManager()
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, "legacy.fre")
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump({"version": "1.0", "mappings": {"IMG_": "照片_", "_": " "},
+                       "settings": {"case_sensitive": True}}, f)
+        legacy = config_manager.load_config(legacy_path)
+        assert legacy["settings"]["sequential_mappings"] is True
+        matcher = MappingMatcher(legacy["mappings"], sequential=legacy["settings"]["sequential_mappings"])
+        assert matcher.apply("IMG_01.jpg") == legacy_apply_mappings("IMG_01.jpg", legacy["mappings"])
+
+        new_path = os.path.join(directory, "new.fre")
+        assert config_manager.save_config(config_manager.create_config(directory), new_path)
+        assert config_manager.load_config(new_path)["settings"]["sequential_mappings"] is False
+        assert config_manager.default_config["settings"]["sequential_mappings"] is False
+    print("  ✓ 旧配置按顺序逐条替换，新配置默认单次扫描替换")
+
+
+def test_case_insensitive():
+    """测试不区分大小写的匹配，包括 casefold 后长度改变的字符"""
+    print("\n=== 不区分大小写测试 ===\n")
+
+    test_cases = [
+        ({"abc": "X"}, "ABC_abc_AbC.TXT", "X_X_X.TXT", "大小写混合"),
+        ({"straße": "S"}, "STRASSE_Straße", "S_S", "ß 与 ss"),
+        ({"s": "z"}, "ßs", "ßz", "不匹配 ß 的一半"),
+        ({"i": "1"}, "İi", "İ1", "不匹配 İ 的一半"),
+        ({"σ": "s", "第一集": "EP1"}, "文件ΣΑς第一集", "文件sΑsEP1", "希腊字母和中文"),
+        ({"ABC": "1", "abc": "2"}, "aBc", "1", "忽略大小写后相同的查找内容只有第一条生效"),
+    ]
+    for mappings, filename, expected, description in test_cases:
+        result = MappingMatcher(mappings, case_sensitive=False).apply(filename)
+        assert result == expected, f"{description}: 期望 {expected}, 实际 {result}"
+        print(f"  ✓ {description}: {filename} -> {result}")
+
+    rng = random.Random(7)
+    alphabet = "aAbßSsİi文Σσς"
+    for _ in range(500):
+        mappings = {}
+        for _ in range(rng.randint(0, 6)):
+            key = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3)))
+            mappings[key] = "".join(rng.choice("xy_") for _ in range(rng.randint(0, 2)))
+        filename = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        expected = casefold_apply_mappings(filename, mappings)
+        result = MappingMatcher(mappings, case_sensitive=False).apply(filename)
+        assert result == expected, f"{mappings!r} {filename!r}: 期望 {expected!r}, 实际 {result!r}"
+    print("  ✓ 500 组随机用例与逐位置比较结果一致")
+
+    mappings = {"ab": "b", "B": "c"}
+    assert MappingMatcher(mappings, sequential=True, case_sensitive=False).apply("AB_ab") == "c_c"
+    print("  ✓ 顺序模式逐条不区分大小写替换")
+
+    with tempfile.TemporaryDirectory() as path:
+        for name in ("Photo_IMG.JPG", "img_photo.jpg", "other.TXT"):
+            open(os.path.join(path, name), "w").close()
+        rules = {"prefix": "", "suffix": "", "delete_chars": "_PHOTO", "mappings": {"img": "pic"},
+                 "settings": {"case_sensitive": False}}
+        controller = RenameController(None, FileManager())
+        plan = controller.build_plan(path, rules)
+        assert sorted(entry.new_name for entry in plan) == ["Photo_pic.JPG", "other.TXT", "pic.jpg"]
+
+        # 只调换忽略大小写后相同的查找内容的顺序，生效的映射随之改变
+        rules = dict(rules, mappings={"img": "pic", "IMG": "image"})
+        plan = controller.build_plan(path, rules)
+        assert sorted(entry.new_name for entry in plan) == ["Photo_pic.JPG", "other.TXT", "pic.jpg"]
+        rules = dict(rules, mappings={"IMG": "image", "img": "pic"})
+        plan = controller.build_plan(path, rules)
+        assert sorted(entry.new_name for entry in plan) == ["Photo_image.JPG", "image.jpg", "other.TXT"]
+
+        # 只改动映射时按忽略大小写的倒排索引找出受影响的文件
+        rules = dict(rules, mappings={"img": "pic", ".txt": ".md"})
+        plan = controller.build_plan(path, rules)
+        assert sorted(entry.new_name for entry in plan) == ["Photo_pic.JPG", "other.md", "pic.jpg"]
+        controller.file_manager.close_index()
+    print("  ✓ 预览中的映射和删除字符不区分大小写")
+
+
+if __name__ == "__main__":
+    test_single_pass()
+    test_sequential_matches_legacy()
+    test_compile_cache()
+    test_legacy_config_sequential()
+    test_case_insensitive()
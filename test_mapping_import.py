@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试映射表批量导入
+"""
+
+import json
+import os
+import tempfile
+
+from models.mapping_import import read_mapping_file, merge_mappings
+
+
+def write_file(directory, name, content, encoding="utf-8"):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(content)
+    return path
+
+
+def test_read_formats():
+    """测试 CSV / TSV / JSONL 读取、表头识别和去重"""
+    print("=== 读取格式测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_file(directory, "map.csv",
+                          "查找内容,替换为\n"
+                          "旧,新\n"
+                          "\"a,b\",c\n"
+                          "旧,新\n"
+                          "x,1\n"
+                          "x,2\n"
+                          ",空\n"
+                          "\n"
+                          "删除\n")
+        imported, report = read_mapping_file(path)
+        assert imported == {"旧": "新", "a,b": "c", "x": "2", "删除": ""}
+        assert report.rows == 7 and report.duplicates == 1 and report.conflicts == 1
+        assert report.skipped_count == 1 and report.skipped[0][0] == 7
+        assert report.conflict_samples == [(6, "x", "1", "2")]
+        print("  ✓ CSV 表头、重复、冲突和空查找内容")
+
+        path = write_file(directory, "map.tsv", "旧\t新\nfoo\tbar\n", encoding="gbk")
+        imported, report = read_mapping_file(path)
+        assert imported == {"旧": "新", "foo": "bar"}
+        print("  ✓ GBK 编码的 TSV")
+
+        lines = [json.dumps({"key": "k1", "value": "v1"}, ensure_ascii=False),
+                 json.dumps(["k2", "v2"]),
+                 "{bad json",
+                 json.dumps({"value": "no key"}),
+                 json.dumps({"find": "k3", "replace": "v3"})]
+        path = write_file(directory, "map.jsonl", "\n".join(lines) + "\n")
+        imported, report = read_mapping_file(path)
+        assert imported == {"k1": "v1", "k2": "v2", "k3": "v3"}
+        assert [line for line, _ in report.skipped] == [3, 4]
+        print("  ✓ JSONL 对象和数组两种行格式")
+
+        try:
+            read_mapping_file(os.path.join(directory, "map.xlsx"))
+            assert False, "应当拒绝不支持的格式"
+        except ValueError:
+            print("  ✓ 拒绝不支持的格式")
+
+
+def test_merge():
+    """测试与现有映射合并"""
+    print("\n=== 合并测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_file(directory, "map.csv", "a,1\nb,new\nc,3\n")
+        imported, report = read_mapping_file(path)
+
+    mappings = {"b": "old", "a": "1", "z": "9"}
+    added, updated = merge_mappings(mappings, imported, report)
+    assert added == ["c"] and updated == ["b"]
+    assert list(mappings.items()) == [("b", "new"), ("a", "1"), ("z", "9"), ("c", "3")]
+    assert (report.added, report.updated, report.unchanged) == (1, 1, 1)
+    assert "新增 1 条，更新 1 条" in report.summary()
+    print("  ✓ 已有映射原位更新，新增映射追加到末尾")
+
+
+if __name__ == "__main__":
+    test_read_formats()
+    test_merge()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试正则替换规则
+"""
+
+import os
+import re
+import tempfile
+
+from controllers.rename_controller import RenameController
+from core.regex_rules import RegexMatcher, normalize_regex_rules
+from models.config_manager import ConfigManager
+from models.file_manager import FileManager
+
+
+def rule(pattern, replacement):
+    return {"pattern": pattern, "replacement": replacement}
+
+
+def test_regex_matcher():
+    """测试分组引用、组合模式和单次扫描语义"""
+    print("=== 正则规则测试 ===\n")
+
+    rules = normalize_regex_rules([rule(r"第(\d+)集", r"E\1"), rule(r"(?P<y>\d{4})年", r"\g<y>-"),
+                                   rule(r"(?P<y>[A-Z])_", r"\g<y>{}"), rule(r"([a-z])\1", r"\1"),
+                                   rule(r"(?i)MP4$", "mp4"), rule("E", "e")])
+    matcher = RegexMatcher(rules)
+    # 引用自身分组和带全局标志的规则单独搜索，重名分组另起一组
+    assert len(matcher) == 6 and matcher.search_count == 5
+    assert matcher.apply("2024年第12集_ooK_x.MP4") == "2024-E12_oK{}x.mp4"
+    print("  ✓ 捕获分组替换，组合模式与单独搜索的规则按位置合并")
+
+    # 单次扫描：替换结果不会再被后面的规则匹配；逐条替换时会
+    assert RegexMatcher(rules).apply("第1集") == "E1"
+    assert RegexMatcher(rules, sequential=True).apply("第1集") == "e1"
+    print("  ✓ 单次扫描与逐条替换两种语义")
+
+    for texts in (["aab", "b", ""], ["x", "xx"]):
+        for text in texts:
+            expected = re.sub(r"x*|b", lambda m: "-" if m.group() != "b" else "B", text)
+            assert RegexMatcher([("x*", "-"), ("b", "B")]).apply(text) == expected
+            assert RegexMatcher([("x*", "-"), ("(b)\\1?", "B")]).apply(text) == expected
+    print("  ✓ 空匹配的处理与 re.sub 一致")
+
+    for invalid in ([rule("(", "")], [rule("a", r"\2")], [rule("a", r"\g<name>")]):
+        try:
+            RegexMatcher(normalize_regex_rules(invalid))
+        except ValueError as e:
+            assert "第 1 条正则规则无效" in str(e)
+        else:
+            assert False, invalid
+    print("  ✓ 无效的模式或分组引用报告规则序号")
+
+
+def test_regex_rules_in_plan():
+    """测试预览中应用正则规则、编译缓存和配置保存"""
+    with tempfile.TemporaryDirectory() as path:
+        for name in ("show 第01集.mkv", "show 第02集.mkv", "other.txt"):
+            open(os.path.join(path, name), "w").close()
+
+        regex_rules = [rule(r"第(\d+)集", r"E\1")]
+        rules = {"prefix": "", "suffix": "", "delete_chars": "", "mappings": {"show": "Show"},
+                 "regex_rules": regex_rules, "settings": {}}
+        controller = RenameController(None, FileManager())
+        plan = controller.build_plan(path, rules)
+        assert {entry.old_name: entry.new_name for entry in plan} == {
+            "show 第01集.mkv": "Show E01.mkv", "show 第02集.mkv": "Show E02.mkv", "other.txt": "other.txt"}
+
+        # 只改动正则规则时重新计算全部文件
+        rules = dict(rules, regex_rules=[rule(r"第(\d+)集", r"S01E\1")])
+        plan = controller.build_plan(path, rules)
+        assert sorted(entry.new_name for entry in plan) == ["Show S01E01.mkv", "Show S01E02.mkv", "other.txt"]
+        controller.file_manager.close_index()
+        print("  ✓ 在映射之后应用正则规则，规则改变时重新生成计划")
+
+        matcher = controller.compile_regex_rules(regex_rules)
+        assert controller.compile_regex_rules([dict(r) for r in regex_rules]) is matcher
+        for i in range(controller.regex_cache_size):
+            controller.compile_regex_rules([rule(f"x{i}", "")])
+        assert len(controller._compiled_regex_rules) == controller.regex_cache_size
+        assert controller.compile_regex_rules(regex_rules) is not matcher
+        print("  ✓ 编译结果按最近使用缓存，数量有上限")
+
+        config_manager = ConfigManager()
+        config = config_manager.create_config(path, regex_rules=regex_rules)
+        for compact in (False, True):
+            config_path = os.path.join(path, f"config_{compact}.fre")
+            assert config_manager.save_config(config, config_path, compact=compact)
+            assert config_manager.load_config(config_path)["regex_rules"] == regex_rules
+        print("  ✓ 正则规则保存在 .fre 配置中")
+
+
+if __name__ == "__main__":
+    test_regex_matcher()
+    test_regex_rules_in_plan()
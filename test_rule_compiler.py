@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试规则编译器 - 编译后的变换与逐步应用规则的结果一致
+"""
+
+import random
+
+from controllers.rename_controller import RenameController
+from core.rule_compiler import compile_rule_transform, split_delete_chars
+from models.file_manager import FileManager
+
+
+def step_by_step(controller, name, rules):
+    """按原来的方式依次调用各个规则"""
+    settings = rules["settings"]
+    sequential = settings.get("sequential_mappings", False)
+    case_sensitive = settings.get("case_sensitive", True)
+    name = controller.apply_mappings(name, controller.compile_mappings(rules["mappings"], sequential, case_sensitive))
+    if rules["regex_rules"]:
+        name = controller.apply_regex_rules(name, controller.compile_regex_rules(rules["regex_rules"], sequential))
+    delete_chars = rules["delete_chars"]
+    if delete_chars and not case_sensitive:
+        delete_chars = controller.compile_delete_chars(delete_chars)
+    name = controller.apply_delete_chars(name, delete_chars)
+    return controller.apply_prefix_suffix(name, rules["prefix"], rules["suffix"])
+
+
+def test_compiled_matches_step_by_step():
+    """测试随机规则下编译结果与逐步应用一致"""
+    print("=== 规则编译测试 ===\n")
+
+    controller = RenameController(None, FileManager())
+    rng = random.Random(23)
+    alphabet = "abAB_.-1 "
+    pieces = ["", "a", "ab", "B", "_", ".", "x.", "ab, _", " a ", ",", "1,,b"]
+    for _ in range(300):
+        keys = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(0, 4))}
+        rules = {
+            "prefix": rng.choice(pieces),
+            "suffix": rng.choice(pieces),
+            "delete_chars": rng.choice(pieces),
+            "mappings": {key: rng.choice(pieces) for key in keys},
+            "regex_rules": rng.choice([[], [{"pattern": r"(\d)", "replacement": r"<\1>"}],
+                                       [{"pattern": "a+", "replacement": "A"}, {"pattern": "_$", "replacement": ""}]]),
+            "settings": {"sequential_mappings": rng.random() < 0.5, "case_sensitive": rng.random() < 0.5},
+        }
+        transform = controller.compile_rules(rules)
+        names = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10))) for _ in range(20)]
+        expected = [step_by_step(controller, name, rules) for name in names]
+        assert [transform(name) for name in names] == expected, rules
+        assert transform.batch(names) == expected, rules
+    print("  ✓ 单个调用和批量变换都与逐步应用规则一致")
+
+
+def test_specialization():
+    """测试空规则被省略，删除字符只解析一次"""
+    assert split_delete_chars("a, b,,") == ["a", "b"]
+    assert split_delete_chars(" a ") == [" a "]
+    assert split_delete_chars("") == []
+
+    transform = compile_rule_transform()
+    assert not transform and transform("a.txt") == "a.txt" and transform.batch(iter(["b"])) == ["b"]
+    assert len(compile_rule_transform(prefix="p_", delete_chars=",").steps) == 1
+    transform = compile_rule_transform(suffix="_s", delete_chars="-, =")
+    assert len(transform.steps) == 2
+    assert transform.batch(["a-=.txt", "a_s.txt", ".bashrc"]) == ["a_s.txt", "a_s.txt", ".bashrc_s"]
+    print("  ✓ 空规则不生成步骤，删除模式在编译时拆分")
+
+
+if __name__ == "__main__":
+    test_compiled_matches_step_by_step()
+    test_specialization()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试各阶段耗时统计
+"""
+
+import json
+import os
+import tempfile
+
+from controllers.rename_controller import RenameController
+from core.journal import RenameJournal
+from core.rename_worker import iter_execute
+from utils.stats import (PipelineStats, STAGE_SCAN, STAGE_COMPILE, STAGE_RULES, STAGE_CONFLICTS,
+                         STAGE_JOURNAL, STAGE_RENAME)
+
+
+def test_pipeline_stats():
+    """测试累加、计时和 JSON 输出"""
+    print("=== 统计对象测试 ===\n")
+
+    stats = PipelineStats()
+    stats.add(STAGE_RULES, 0.5, entries=10)
+    stats.add(STAGE_RULES, 0.25, entries=5)
+    with stats.measure(STAGE_SCAN, entries=3, bytes=100):
+        pass
+
+    rules = stats.get(STAGE_RULES)
+    assert (rules.seconds, rules.calls, rules.entries) == (0.75, 2, 15)
+    assert [stage.name for stage in stats.stages()] == [STAGE_RULES, STAGE_SCAN]
+    data = json.loads(json.dumps(stats.as_dict()))
+    assert data["stages"][STAGE_SCAN]["bytes"] == 100
+    assert data["total_seconds"] >= 0.75
+    print("  ✓ 累加和 JSON 输出正确")
+
+    stats.reset()
+    assert not stats.stages() and stats.get(STAGE_RULES).calls == 0
+    print("  ✓ 清零后没有记录")
+
+
+def test_controller_stats():
+    """测试生成计划和执行时记录的各阶段数据"""
+    print("\n=== 控制器统计测试 ===\n")
+
+    with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as journal_dir:
+        for i in range(20):
+            with open(os.path.join(path, f"a{i:02d}.txt"), "w", encoding="utf-8") as f:
+                f.write("x")
+
+        controller = RenameController(None, None)
+        rules = {"prefix": "", "suffix": "", "delete_chars": "",
+                 "mappings": {"a": "b"}, "settings": {}}
+        plan = controller.build_plan(path, rules)
+        stats = controller.stats
+        assert stats.get(STAGE_SCAN).entries == 20
+        assert stats.get(STAGE_COMPILE).entries == 1
+        assert stats.get(STAGE_RULES).entries == 20
+        assert stats.get(STAGE_CONFLICTS).calls == 1
+        print("  ✓ 记录扫描、编译、规则和冲突解析")
+
+        journal = RenameJournal(os.path.join(journal_dir, "test.journal"))
+        list(iter_execute(plan, journal, stats))
+        rename = stats.get(STAGE_RENAME)
+        assert rename.calls == 20 and rename.entries == 20
+        assert stats.get(STAGE_JOURNAL).bytes == os.path.getsize(journal.journal_path)
+        print("  ✓ 记录重命名次数和日志字节数")
+
+
+if __name__ == "__main__":
+    test_pipeline_stats()
+    test_controller_stats()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+原子写文件 - 先写入同一目录下的临时文件并落盘，再用 os.replace 替换目标
+
+替换在同一文件系统内是原子的：读者要么看到旧文件，要么看到完整的新
+文件，写入中途崩溃只会留下一个被忽略的临时文件。
+"""
+
+import os
+import stat
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+
+def fsync_directory(path: str):
+    """同步目录项，确保新建或替换的文件名本身已落盘（Windows 不支持，忽略）"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_file(path: str):
+    """把文件内容落盘"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_replace(file_path: str) -> Iterator[str]:
+    """产生同一目录下的临时文件路径供写入，with 块正常结束后落盘并替换 file_path
+
+    临时文件沿用目标文件原有的权限（新文件按 umask 创建）。with 块中出现
+    异常时删除临时文件，目标文件保持不变。
+    """
+    file_path = os.path.abspath(file_path)
+    directory = os.path.dirname(file_path)
+    temp_path = os.path.join(directory, f".{os.path.basename(file_path)}.{uuid.uuid4().hex[:12]}.tmp")
+    os.close(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+    try:
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+        except FileNotFoundError:
+            pass
+        yield temp_path
+        fsync_file(temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
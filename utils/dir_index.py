@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+目录实时索引 - 保存工作目录（及子目录）的条目，只在目录变化时更新
+
+Linux 上通过 inotify 接收目录变化事件（ctypes 调用 libc，无需第三方库），
+每次 sync() 时读取积压的事件增量更新索引；其他平台或 inotify 不可用时
+改为轮询：逐个检查目录的 stat，只重新扫描修改时间变化的目录。
+
+每个目录有一个版本号，条目变化时更新。调用方可以按 (目录, 版本号)
+缓存根据目录内容计算的结果，版本号不变时直接复用。
+"""
+
+import itertools
+import os
+import stat as stat_module
+import struct
+import sys
+import threading
+import time
+from typing import Collection, Dict, List, Optional
+
+from utils.scanner import DirectoryListing, scan_directory, walk_directories
+
+
+# 目录修改时间的最大精度（FAT 为 2 秒），与 core.rename_plan 一致
+MTIME_GRANULARITY_NS = 2_000_000_000
+
+# 一次 sync() 中最多读取事件的轮数，目录持续变化时不无限等待
+MAX_SYNC_ROUNDS = 8
+
+# inotify 常量（见 <sys/inotify.h>）
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """inotify 的最小封装"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self._get_errno = ctypes.get_errno
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(self._get_errno(), "inotify_init1 失败")
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = self._get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """读取当前积压的全部事件，产生 (wd, mask, name)"""
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                yield wd, mask, os.fsdecode(name)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class IndexedDirectory:
+    """索引中的一个目录，属性与 DirectoryListing 对应"""
+
+    __slots__ = ("path", "files", "dirs", "others", "stat", "scanned_at_ns", "version")
+
+    def __init__(self, listing: DirectoryListing, version: int):
+        self.path = listing.path
+        # 文件名（有序字典，保持扫描顺序，新增条目排在末尾）
+        self.files = dict.fromkeys(listing.file_names)
+        # 子目录名（不跟随符号链接）
+        self.dirs = {entry.name for entry in listing.dirs}
+        # 其他条目名（子目录、失效的符号链接等），用于判断目标名是否被占用
+        self.others = set(listing.names).difference(self.files)
+        self.stat = listing.stat
+        self.scanned_at_ns = listing.scanned_at_ns
+        self.version = version
+
+    @property
+    def names(self) -> List[str]:
+        """目录中所有条目名"""
+        return list(itertools.chain(self.files, self.others))
+
+    @property
+    def file_names(self) -> List[str]:
+        """文件名列表"""
+        return list(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def is_reliable(self) -> bool:
+        """stat 获取时间是否足够晚于目录修改时间，能够检测到之后的变化"""
+        return self.scanned_at_ns - self.stat.st_mtime_ns > MTIME_GRANULARITY_NS
+
+
+def _same_directory(a: os.stat_result, b: os.stat_result) -> bool:
+    return (a.st_dev, a.st_ino, a.st_mtime_ns) == (b.st_dev, b.st_ino, b.st_mtime_ns)
+
+
+class DirectoryIndex:
+    """工作目录的实时索引"""
+
+    def __init__(self, root: str, recursive: bool = False, exclude: Collection[str] = (),
+                 use_inotify: bool = True):
+        self.root = os.path.abspath(root)
+        self.recursive = recursive
+        # 递归时跳过的子目录名
+        self.exclude = frozenset(exclude)
+
+        self._dirs: Dict[str, IndexedDirectory] = {}
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self._inotify: Optional[_Inotify] = None
+        self._wd_paths: Dict[int, str] = {}
+        self._path_wds: Dict[str, int] = {}
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+        with self._lock:
+            self._rebuild()
+
+    @property
+    def backend(self) -> str:
+        """当前使用的变化检测方式"""
+        return "inotify" if self._inotify is not None else "polling"
+
+    def sync(self) -> List[IndexedDirectory]:
+        """处理自上次调用以来的变化，返回全部目录（根目录在前）
+
+        根目录无法访问时抛出 OSError。
+        """
+        with self._lock:
+            if self._inotify is not None:
+                self._refresh_stats()
+                self._sync_events()
+            else:
+                self._poll()
+            return list(self._dirs.values())
+
+    def close(self):
+        """停止监视"""
+        with self._lock:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            self._wd_paths.clear()
+            self._path_wds.clear()
+
+    # ---- 索引维护 ----
+
+    def _rebuild(self):
+        """重新扫描整个目录树（初始化或 inotify 事件队列溢出时）"""
+        for wd in list(self._wd_paths):
+            self._inotify.rm_watch(wd)
+        self._wd_paths.clear()
+        self._path_wds.clear()
+        self._dirs.clear()
+        self._add_tree(self.root)
+
+    def _add_tree(self, path: str):
+        """扫描并加入一个目录（递归时包括其子目录）"""
+        if self.recursive:
+            listings = walk_directories(path, exclude=self.exclude)
+        else:
+            listings = [scan_directory(path)]
+
+        added = []
+        for listing in listings:
+            self._dirs[listing.path] = IndexedDirectory(listing, next(self._versions))
+            added.append(listing.path)
+
+        if self._inotify is not None:
+            for directory in added:
+                if self._inotify is None:
+                    break
+                self._watch(directory)
+            # 扫描与开始监视之间可能有变化，通过目录 stat 确认
+            for directory in added:
+                if directory in self._dirs:
+                    self._verify(directory)
+
+    def _drop_tree(self, path: str):
+        """移除一个目录及其全部子目录"""
+        prefix = path + os.sep
+        for directory in [d for d in self._dirs if d == path or d.startswith(prefix)]:
+            del self._dirs[directory]
+            wd = self._path_wds.pop(directory, None)
+            if wd is not None:
+                self._wd_paths.pop(wd, None)
+                if self._inotify is not None:
+                    self._inotify.rm_watch(wd)
+
+    def _watch(self, path: str):
+        try:
+            wd = self._inotify.add_watch(path)
+        except OSError:
+            # 达到 max_user_watches 等限制时整个索引改用轮询
+            self._fall_back_to_polling()
+            return
+        self._wd_paths[wd] = path
+        self._path_wds[path] = wd
+
+    def _fall_back_to_polling(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        self._wd_paths.clear()
+        self._path_wds.clear()
+
+    def _verify(self, path: str):
+        """目录 stat 与索引记录不一致或不可靠时重新扫描该目录"""
+        directory = self._dirs[path]
+        taken_at_ns = time.time_ns()
+        try:
+            st = os.stat(path)
+        except OSError:
+            if path == self.root:
+                raise
+            self._drop_tree(path)
+            return
+
+        if _same_directory(st, directory.stat):
+            directory.stat = st
+            directory.scanned_at_ns = taken_at_ns
+            if directory.is_reliable():
+                return
+        self._rescan(path)
+
+    def _rescan(self, path: str):
+        """重新扫描一个目录，条目有变化时更新版本号"""
+        directory = self._dirs[path]
+        try:
+            listing = scan_directory(path)
+        except OSError:
+            if path == self.root:
+                raise
+            self._drop_tree(path)
+            return
+
+        file_names = listing.file_names
+        current = set(file_names)
+        names = set(listing.names)
+        directory.stat = listing.stat
+        directory.scanned_at_ns = listing.scanned_at_ns
+        if directory.files.keys() == current and names == current.union(directory.others):
+            return
+
+        # 保留原有顺序，新增条目排在末尾
+        files = {name: None for name in directory.files if name in current}
+        files.update(dict.fromkeys(file_names))
+        directory.files = files
+        directory.others = names.difference(files)
+        directory.version = next(self._versions)
+
+        if self.recursive:
+            subdirs = {entry.name for entry in listing.dirs if entry.name not in self.exclude}
+            for name in directory.dirs - subdirs:
+                self._drop_tree(os.path.join(path, name))
+            directory.dirs = subdirs
+            for name in subdirs:
+                child = os.path.join(path, name)
+                if child not in self._dirs:
+                    self._add_tree(child)
+
+    def _refresh_stats(self):
+        """重新获取不可靠的目录 stat，之后再读取事件，保证索引不旧于 stat"""
+        taken_at_ns = time.time_ns()
+        for directory in self._dirs.values():
+            if not directory.is_reliable():
+                try:
+                    directory.stat = os.stat(directory.path)
+                    directory.scanned_at_ns = taken_at_ns
+                except OSError:
+                    pass
+
+    def _poll(self):
+        """轮询：检查每个目录的 stat"""
+        for path in list(self._dirs):
+            if path in self._dirs:
+                self._verify(path)
+
+    # ---- inotify 事件 ----
+
+    def _sync_events(self):
+        """读取并应用积压的事件，直到事件队列为空"""
+        for _ in range(MAX_SYNC_ROUNDS):
+            touched = set()
+            for wd, mask, name in self._inotify.read_events():
+                if mask & IN_Q_OVERFLOW:
+                    self._rebuild()
+                    return
+                path = self._wd_paths.get(wd)
+                if path is None or path not in self._dirs:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                    if path == self.root:
+                        self._rebuild()
+                        return
+                    continue
+                self._apply_event(path, mask, name)
+                touched.add(path)
+                if self._inotify is None:
+                    return
+
+            if not touched:
+                return
+            # 先读取事件再获取 stat：stat 之后的变化会在下一轮读到
+            taken_at_ns = time.time_ns()
+            for path in touched:
+                directory = self._dirs.get(path)
+                if directory is not None:
+                    try:
+                        directory.stat = os.stat(path)
+                        directory.scanned_at_ns = taken_at_ns
+                    except OSError:
+                        pass
+
+    def _apply_event(self, path: str, mask: int, name: str):
+        """把一个条目的创建/删除/移入/移出应用到目录"""
+        directory = self._dirs[path]
+        full_path = os.path.join(path, name)
+        was_dir = name in directory.dirs
+        directory.files.pop(name, None)
+        directory.others.discard(name)
+        directory.dirs.discard(name)
+        directory.version = next(self._versions)
+        if was_dir:
+            self._drop_tree(full_path)
+
+        if not mask & (IN_CREATE | IN_MOVED_TO):
+            return
+
+        # 与 scan_directory 一致：文件跟随符号链接，子目录不跟随
+        try:
+            st = os.lstat(full_path)
+        except OSError:
+            return
+        if stat_module.S_ISDIR(st.st_mode):
+            directory.others.add(name)
+            if name not in self.exclude:
+                directory.dirs.add(name)
+                if self.recursive:
+                    try:
+                        self._add_tree(full_path)
+                    except OSError:
+                        directory.dirs.discard(name)
+            return
+        if stat_module.S_ISLNK(st.st_mode):
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                directory.others.add(name)
+                return
+        if stat_module.S_ISREG(st.st_mode):
+            directory.files[name] = None
+        else:
+            directory.others.add(name)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+目录扫描器 - 基于 os.scandir，一次 readdir 遍历获取文件列表
+
+os.DirEntry 会利用 readdir 返回的 d_type 判断条目类型，stat 结果在首次
+调用后缓存，避免逐个文件再调用 os.path.isfile 产生额外的 stat 系统调用。
+"""
+
+import os
+import time
+from collections import deque
+from typing import Collection, Iterable, Iterator, List, Optional
+
+
+# 递归扫描时的默认线程数
+DEFAULT_SCAN_WORKERS = 8
+
+
+class DirectoryListing:
+    """目录列表 - 保存一次扫描得到的全部条目"""
+
+    __slots__ = ("path", "names", "files", "dirs", "stat", "scanned_at_ns")
+
+    def __init__(self, path: str, names: List[str], files: List[os.DirEntry],
+                 dirs: List[os.DirEntry], stat: os.stat_result, scanned_at_ns: int):
+        self.path = path
+        # 目录中所有条目名（包括子目录等非文件条目）
+        self.names = names
+        # 文件条目，保留 DirEntry 以复用其缓存的 stat 结果
+        self.files = files
+        # 子目录条目（不跟随符号链接，避免循环）
+        self.dirs = dirs
+        # 扫描前获取的目录自身 stat 结果及时间，用于判断目录之后是否变化
+        self.stat = stat
+        self.scanned_at_ns = scanned_at_ns
+
+    @property
+    def file_names(self) -> List[str]:
+        """文件名列表"""
+        return [entry.name for entry in self.files]
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+
+def scan_directory(path: str) -> DirectoryListing:
+    """扫描目录，返回全部条目名、文件条目和子目录条目"""
+    scanned_at_ns = time.time_ns()
+    stat = os.stat(path)
+
+    names = []
+    files = []
+    dirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            names.append(entry.name)
+            try:
+                # 与 os.path.isfile 一致：跟随符号链接
+                if entry.is_file():
+                    files.append(entry)
+                elif entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry)
+            except OSError:
+                continue
+
+    return DirectoryListing(path, names, files, dirs, stat, scanned_at_ns)
+
+
+def is_case_sensitive(path: str, names: Iterable[str]) -> Optional[bool]:
+    """目录所在文件系统是否区分大小写 - 取一个改变大小写后不在目录中的条目名检查是否存在
+
+    只使用 ASCII 条目名（其他字符的大小写对应关系因文件系统而异），
+    目录中没有含 ASCII 字母的条目时无法判断，返回 None。
+    """
+    names = set(names) if not isinstance(names, (set, frozenset, dict)) else names
+    for name in names:
+        swapped = name.swapcase()
+        if swapped != name and name.isascii() and swapped not in names:
+            return not os.path.lexists(os.path.join(path, swapped))
+    return None
+
+
+def list_files(path: str) -> List[str]:
+    """获取目录中的文件名列表"""
+    return scan_directory(path).file_names
+
+
+def walk_directories(root: str, max_workers: int = DEFAULT_SCAN_WORKERS,
+                     exclude: Collection[str] = ()) -> Iterator[DirectoryListing]:
+    """并行递归扫描目录树，每扫描完一个目录立即产生其 DirectoryListing
+
+    各目录的 scandir 调用分发到有界线程池中并发执行，产生顺序取决于
+    完成顺序。根目录无法访问时抛出异常，子目录无法访问时跳过。
+    名称在 exclude 中的子目录不会被扫描。
+    """
+    # 延迟导入，避免只扫描单个目录时（如命令行批处理）付出线程池模块的导入开销
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    pending_dirs = deque()
+    # 限制同时提交的任务数，其余目录在队列中等待
+    max_in_flight = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        root_future = executor.submit(scan_directory, root)
+        in_flight = {root_future}
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    listing = future.result()
+                except OSError:
+                    if future is root_future:
+                        raise
+                    continue
+
+                pending_dirs.extend(entry.path for entry in listing.dirs if entry.name not in exclude)
+                while pending_dirs and len(in_flight) < max_in_flight:
+                    in_flight.add(executor.submit(scan_directory, pending_dirs.popleft()))
+
+                yield listing
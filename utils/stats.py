@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+流水线统计 - 记录各阶段的耗时、调用次数以及处理的条目数和字节数
+
+控制器、后台重命名线程和界面都向同一个 PipelineStats 累加数据，
+预览或执行开始时清零，结束后由界面面板显示，或由命令行输出为 JSON。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+# 阶段名
+STAGE_SCAN = "scan"                      # 列出目录 / 同步实时索引
+STAGE_COMPILE = "compile"                # 编译映射
+STAGE_RULES = "rules"                    # 对文件名应用规则
+STAGE_CONFLICTS = "conflicts"            # 冲突解析和执行步骤排序
+STAGE_BACKUP = "backup"                  # 备份原文件
+STAGE_JOURNAL = "journal"                # 写重命名日志
+STAGE_RENAME = "rename"                  # os.rename
+STAGE_RENDER_PREVIEW = "render_preview"  # 填充预览表格
+STAGE_RENDER_STATUS = "render_status"    # 写入状态文本框
+
+# 界面上显示的阶段名称
+STAGE_LABELS = {
+    STAGE_SCAN: "扫描目录",
+    STAGE_COMPILE: "编译映射",
+    STAGE_RULES: "应用规则",
+    STAGE_CONFLICTS: "冲突解析",
+    STAGE_BACKUP: "备份原文件",
+    STAGE_JOURNAL: "写入日志",
+    STAGE_RENAME: "重命名",
+    STAGE_RENDER_PREVIEW: "显示预览",
+    STAGE_RENDER_STATUS: "显示状态",
+}
+
+
+class StageStats:
+    """单个阶段的累计数据"""
+
+    __slots__ = ("name", "seconds", "calls", "entries", "bytes")
+
+    def __init__(self, name: str, seconds: float = 0.0, calls: int = 0, entries: int = 0, bytes: int = 0):
+        self.name = name
+        self.seconds = seconds
+        self.calls = calls
+        self.entries = entries
+        self.bytes = bytes
+
+    @property
+    def label(self) -> str:
+        return STAGE_LABELS.get(self.name, self.name)
+
+    def as_dict(self) -> Dict:
+        """转换为可序列化为 JSON 的字典"""
+        return {"seconds": round(self.seconds, 6), "calls": self.calls,
+                "entries": self.entries, "bytes": self.bytes}
+
+
+class PipelineStats:
+    """各阶段统计，可在多个线程中同时累加"""
+
+    def __init__(self):
+        self._stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """清空全部统计"""
+        with self._lock:
+            self._stages = {}
+
+    def add(self, stage: str, seconds: float, calls: int = 1, entries: int = 0, bytes: int = 0):
+        """累加一个阶段的数据"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats(stage)
+            stats.seconds += seconds
+            stats.calls += calls
+            stats.entries += entries
+            stats.bytes += bytes
+
+    @contextmanager
+    def measure(self, stage: str, entries: int = 0, bytes: int = 0) -> Iterator[None]:
+        """计时 with 块，记为该阶段的一次调用"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, 1, entries, bytes)
+
+    def stages(self) -> List[StageStats]:
+        """按首次记录的顺序返回各阶段数据的副本"""
+        with self._lock:
+            return [StageStats(s.name, s.seconds, s.calls, s.entries, s.bytes)
+                    for s in self._stages.values()]
+
+    def get(self, stage: str) -> StageStats:
+        """单个阶段数据的副本，没有记录时各项为 0"""
+        with self._lock:
+            s = self._stages.get(stage)
+            if s is None:
+                return StageStats(stage)
+            return StageStats(s.name, s.seconds, s.calls, s.entries, s.bytes)
+
+    @property
+    def total_seconds(self) -> float:
+        with self._lock:
+            return sum(s.seconds for s in self._stages.values())
+
+    def as_dict(self) -> Dict:
+        """转换为可序列化为 JSON 的字典"""
+        stages = self.stages()
+        return {
+            "total_seconds": round(sum(s.seconds for s in stages), 6),
+            "stages": {s.name: s.as_dict() for s in stages},
+        }
+
+    def summary(self) -> str:
+        """多行文本摘要"""
+        lines = []
+        for s in self.stages():
+            line = f"{s.label}: {s.seconds * 1000:.1f} ms，{s.calls} 次"
+            if s.entries:
+                line += f"，{s.entries} 个条目"
+            if s.bytes:
+                line += f"，{s.bytes} 字节"
+            lines.append(line)
+        return "\n".join(lines)
@@ -4,16 +4,35 @@
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
-from typing import Dict
+from tkinter import ttk, messagebox, filedialog
+from typing import Dict, List
+from models.mapping_import import ImportReport, merge_mappings, read_mapping_file
 
 
 class MappingListWidget:
-    """映射列表组件"""
+    """映射列表组件
+    
+    维护查找内容与表格行的对应关系，添加、编辑和删除只更新受影响的行；
+    加载大量映射时分批插入，每批之间把控制权交还事件循环。
+    """
+    
+    # 每批插入的行数和批次间隔（毫秒）
+    insert_chunk_size = 2000
+    insert_interval = 1
     
     def __init__(self, parent):
         self.parent = parent
         self.mappings = {}  # 存储映射关系
+        
+        # 查找内容 -> 行 id，行 id -> 查找内容
+        self._items: Dict[str, str] = {}
+        self._keys: Dict[str, str] = {}
+        
+        # 分批插入中尚未插入的查找内容
+        self._pending: List[str] = []
+        self._pending_pos = 0
+        self._after_id = None
+        
         self.setup_ui()
     
     def setup_ui(self):
@@ -52,7 +71,9 @@ class MappingListWidget:
         ttk.Button(button_frame, text="删除", command=self.delete_mapping, 
                   style="Mapping.TButton").grid(row=0, column=1, padx=(0, 8))
         ttk.Button(button_frame, text="清空", command=self.clear_mappings, 
-                  style="Mapping.TButton").grid(row=0, column=2)
+                  style="Mapping.TButton").grid(row=0, column=2, padx=(0, 8))
+        ttk.Button(button_frame, text="导入", command=self.import_mapping_file, 
+                  style="Mapping.TButton").grid(row=0, column=3)
         
         # 映射列表显示
         list_frame = ttk.Frame(mapping_frame)
@@ -100,8 +121,7 @@ class MappingListWidget:
         if key in self.mappings:
             messagebox.showwarning("警告", f"'{key}' 已存在，将更新其值")
         
-        self.mappings[key] = value
-        self.refresh_tree()
+        self._put(key, value)
         
         # 清空输入框
         self.key_entry.delete(0, tk.END)
@@ -114,12 +134,10 @@ class MappingListWidget:
             messagebox.showwarning("警告", "请选择要删除的映射！")
             return
         
-        item = selection[0]
-        key = self.tree.item(item, "values")[0]
+        key = self._keys[selection[0]]
         
         if messagebox.askyesno("确认", f"确定要删除映射 '{key}' 吗？"):
-            del self.mappings[key]
-            self.refresh_tree()
+            self._remove(key)
     
     def clear_mappings(self):
         """清空所有映射"""
@@ -128,7 +146,36 @@ class MappingListWidget:
         
         if messagebox.askyesno("确认", "确定要清空所有映射吗？"):
             self.mappings.clear()
-            self.refresh_tree()
+            self._clear_tree()
+    
+    def import_mapping_file(self):
+        """从 CSV / TSV / JSONL 文件批量导入映射，结束后显示一次导入报告"""
+        file_path = filedialog.askopenfilename(
+            title="导入映射表",
+            filetypes=[("映射表", "*.csv *.tsv *.tab *.txt *.jsonl *.ndjson"),
+                       ("CSV 文件", "*.csv"), ("TSV 文件", "*.tsv *.tab *.txt"),
+                       ("JSON Lines 文件", "*.jsonl *.ndjson"), ("所有文件", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        try:
+            report = self.import_mappings(file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"导入映射表失败: {e}")
+            return
+        messagebox.showinfo("导入完成", report.summary())
+    
+    def import_mappings(self, file_path: str) -> ImportReport:
+        """导入映射表文件 - 合并完成后只刷新一次：更新已有的行，新增的行分批插入"""
+        imported, report = read_mapping_file(file_path)
+        self._finish_loading()
+        added, updated = merge_mappings(self.mappings, imported, report)
+        for key in updated:
+            self.tree.item(self._items[key], values=(key, self.mappings[key]))
+        self._pending = added
+        self._on_insert_timer()
+        return report
     
     def on_double_click(self, event):
         """双击编辑映射"""
@@ -136,11 +183,11 @@ class MappingListWidget:
         if not selection:
             return
         
-        item = selection[0]
-        key, value = self.tree.item(item, "values")
+        # 表格返回的值可能被 Tcl 转换（如 "007" 变为 7），从映射中取原值
+        key = self._keys[selection[0]]
         
         # 创建编辑对话框
-        self.edit_mapping_dialog(key, value)
+        self.edit_mapping_dialog(key, self.mappings[key])
     
     def edit_mapping_dialog(self, old_key, old_value):
         """编辑映射对话框"""
@@ -183,25 +230,79 @@ class MappingListWidget:
             
             # 删除旧的映射
             if old_key in self.mappings:
-                del self.mappings[old_key]
+                self._remove(old_key)
             
             # 添加新的映射
-            self.mappings[new_key] = new_value
-            self.refresh_tree()
+            self._put(new_key, new_value)
             dialog.destroy()
         
         ttk.Button(button_frame, text="保存", command=save_mapping).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(button_frame, text="取消", command=dialog.destroy).pack(side=tk.LEFT)
     
+    def _put(self, key: str, value: str):
+        """设置一条映射 - 已有的查找内容原位更新，新的追加到末尾，与字典顺序一致"""
+        self._finish_loading()
+        self.mappings[key] = value
+        item = self._items.get(key)
+        if item is not None:
+            self.tree.item(item, values=(key, value))
+        else:
+            self._insert_row(key, value)
+    
+    def _remove(self, key: str):
+        """删除一条映射及其所在行"""
+        self._finish_loading()
+        del self.mappings[key]
+        item = self._items.pop(key)
+        del self._keys[item]
+        self.tree.delete(item)
+    
+    def _insert_row(self, key: str, value: str):
+        item = self.tree.insert("", tk.END, values=(key, value))
+        self._items[key] = item
+        self._keys[item] = key
+    
+    def _clear_tree(self):
+        """删除全部行并停止分批插入"""
+        if self._after_id is not None:
+            self.tree.after_cancel(self._after_id)
+            self._after_id = None
+        self._pending = []
+        self._pending_pos = 0
+        self.tree.delete(*self.tree.get_children())
+        self._items.clear()
+        self._keys.clear()
+    
+    def _insert_chunk(self, limit: int):
+        """插入最多 limit 条尚未显示的映射"""
+        end = min(self._pending_pos + limit, len(self._pending))
+        mappings = self.mappings
+        for key in self._pending[self._pending_pos:end]:
+            self._insert_row(key, mappings[key])
+        self._pending_pos = end
+        if end == len(self._pending):
+            self._pending = []
+            self._pending_pos = 0
+    
+    def _on_insert_timer(self):
+        self._after_id = None
+        self._insert_chunk(self.insert_chunk_size)
+        if self._pending:
+            self._after_id = self.tree.after(self.insert_interval, self._on_insert_timer)
+    
+    def _finish_loading(self):
+        """分批插入尚未完成时先插入剩余的行，保证行的顺序与字典一致"""
+        if self._after_id is not None:
+            self.tree.after_cancel(self._after_id)
+            self._after_id = None
+        if self._pending:
+            self._insert_chunk(len(self._pending))
+    
     def refresh_tree(self):
-        """刷新树形视图"""
-        # 清空现有项目
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 添加映射项目
-        for key, value in self.mappings.items():
-            self.tree.insert("", tk.END, values=(key, value))
+        """刷新树形视图 - 按映射字典重新填充全部行"""
+        self._clear_tree()
+        self._pending = list(self.mappings)
+        self._on_insert_timer()
     
     def get_mappings(self) -> Dict[str, str]:
         """获取映射字典"""
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+预览表格组件 - 只渲染可见行的虚拟化重命名预览
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import List, Optional
+
+from core.rename_plan import RenamePlan, STATUS_CHANGED, STATUS_UNCHANGED, STATUS_CONFLICT
+
+
+class PreviewTable:
+    """预览表格组件
+
+    Treeview 中只保留固定数量的行，滚动时改写这些行的内容；排序和筛选
+    只操作条目序号列表，不会为每个文件创建界面元素。
+    """
+
+    STATUS_LABELS = {
+        STATUS_CHANGED: "有变化",
+        STATUS_UNCHANGED: "无变化",
+        STATUS_CONFLICT: "冲突",
+    }
+
+    FILTER_OPTIONS = [
+        ("全部", None),
+        ("有变化", STATUS_CHANGED),
+        ("无变化", STATUS_UNCHANGED),
+        ("冲突", STATUS_CONFLICT),
+    ]
+
+    COLUMNS = ("old_name", "new_name", "status")
+
+    def __init__(self, parent, rows: int = 10):
+        self.parent = parent
+        self.rows = rows
+
+        self.plan = None
+        self._view = []           # 当前筛选和排序后的条目序号
+        self._first = 0           # 第一个可见行对应的 _view 下标
+        self._sort_column = None
+        self._sort_reverse = False
+        self._sort_cache = {}     # 列名 -> 升序排列的条目序号
+        self._status_filter = None
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """设置预览表格界面"""
+        self.frame = ttk.Frame(self.parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(1, weight=1)
+
+        # 筛选区域
+        filter_frame = ttk.Frame(self.frame)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        filter_frame.columnconfigure(2, weight=1)
+
+        ttk.Label(filter_frame, text="筛选:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        self.filter_var = tk.StringVar(value=self.FILTER_OPTIONS[0][0])
+        filter_box = ttk.Combobox(filter_frame, textvariable=self.filter_var, state="readonly", width=10,
+                                  values=[label for label, _ in self.FILTER_OPTIONS])
+        filter_box.grid(row=0, column=1, sticky=tk.W)
+        filter_box.bind("<<ComboboxSelected>>", self.on_filter_changed)
+
+        self.summary_label = ttk.Label(filter_frame, text="", foreground="gray")
+        self.summary_label.grid(row=0, column=2, sticky=tk.E)
+
+        # 表格
+        self.tree = ttk.Treeview(self.frame, columns=self.COLUMNS, show="headings",
+                                 height=self.rows, selectmode="none")
+        self.tree.heading("old_name", text="原文件名", command=lambda: self.sort_by("old_name"))
+        self.tree.heading("new_name", text="新文件名", command=lambda: self.sort_by("new_name"))
+        self.tree.heading("status", text="状态", command=lambda: self.sort_by("status"))
+        self.tree.column("old_name", width=320)
+        self.tree.column("new_name", width=320)
+        self.tree.column("status", width=80, anchor=tk.CENTER, stretch=False)
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scroll)
+
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+
+        # 固定数量的行，滚动时复用
+        self._items = [self.tree.insert("", tk.END, values=("", "", "")) for _ in range(self.rows)]
+
+        # 鼠标滚轮（Windows/macOS 与 X11）
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(3))
+
+        self.render()
+
+    def grid(self, **kwargs):
+        """放置组件"""
+        self.frame.grid(**kwargs)
+
+    def set_plan(self, plan: Optional[RenamePlan]):
+        """显示新的重命名计划"""
+        self.plan = plan
+        self._sort_cache = {}
+        self._first = 0
+        self.rebuild_view()
+
+    def on_filter_changed(self, event=None):
+        """筛选条件变化"""
+        label = self.filter_var.get()
+        self._status_filter = dict(self.FILTER_OPTIONS).get(label)
+        self._first = 0
+        self.rebuild_view()
+
+    def sort_by(self, column: str):
+        """按列排序，再次点击同一列切换升序/降序"""
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column = column
+            self._sort_reverse = False
+        self._first = 0
+        self.rebuild_view()
+
+    def _sorted_order(self) -> List[int]:
+        """返回当前排序列的条目序号（升序，结果缓存）"""
+        column = self._sort_column
+        order = self._sort_cache.get(column)
+        if order is None:
+            entries = self.plan.entries
+            field = self.COLUMNS.index(column)
+            order = sorted(range(len(entries)), key=lambda i: entries[i][field])
+            self._sort_cache[column] = order
+        return order
+
+    def rebuild_view(self):
+        """重新计算筛选和排序后的条目序号"""
+        if self.plan is None:
+            self._view = []
+        else:
+            entries = self.plan.entries
+            if self._sort_column is None:
+                order = range(len(entries))
+            else:
+                order = self._sorted_order()
+                if self._sort_reverse:
+                    order = order[::-1]
+
+            status = self._status_filter
+            if status is None:
+                self._view = list(order)
+            else:
+                self._view = [i for i in order if entries[i].status == status]
+
+        self._update_summary()
+        self.render()
+
+    def _update_summary(self):
+        if self.plan is None:
+            self.summary_label.configure(text="")
+            return
+        plan = self.plan
+        self.summary_label.configure(
+            text=f"共 {len(plan)} 个文件：有变化 {plan.count(STATUS_CHANGED)}，"
+                 f"无变化 {plan.count(STATUS_UNCHANGED)}，冲突 {plan.count(STATUS_CONFLICT)}"
+                 f"（显示 {len(self._view)} 个）")
+
+    def render(self):
+        """只刷新可见行"""
+        entries = self.plan.entries if self.plan is not None else ()
+        view = self._view
+        labels = self.STATUS_LABELS
+        for offset, item in enumerate(self._items):
+            position = self._first + offset
+            if position < len(view):
+                old_name, new_name, status = entries[view[position]]
+                self.tree.item(item, values=(old_name, new_name, labels.get(status, status)))
+            else:
+                self.tree.item(item, values=("", "", ""))
+
+        total = len(view)
+        if total <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._first / total, (self._first + self.rows) / total)
+
+    def _max_first(self) -> int:
+        return max(len(self._view) - self.rows, 0)
+
+    def scroll_to(self, first: int):
+        """滚动到指定行"""
+        first = min(max(first, 0), self._max_first())
+        if first != self._first:
+            self._first = first
+            self.render()
+
+    def scroll_rows(self, count: int):
+        """按行滚动"""
+        self.scroll_to(self._first + count)
+        return "break"
+
+    def on_scroll(self, *args):
+        """滚动条回调"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self._view)))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                count *= self.rows
+            self.scroll_rows(count)
+
+    def on_mousewheel(self, event):
+        """鼠标滚轮滚动"""
+        # Windows 每格 delta 为 120，macOS 为 1
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_rows(-step * 3)
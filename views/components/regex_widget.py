@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+正则规则列表组件 - 用于按正则表达式替换文件名
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from typing import Dict, List
+from core.regex_rules import compile_regex_rule, normalize_regex_rules
+
+
+class RegexRuleListWidget:
+    """正则规则列表组件 - 规则按列表顺序应用，可上移、下移调整"""
+
+    def __init__(self, parent, row: int):
+        self.parent = parent
+        self.rules = []  # [(模式, 替换内容), ...]
+        self.setup_ui(row)
+
+    def setup_ui(self, row: int):
+        """设置正则规则界面"""
+        regex_frame = ttk.LabelFrame(self.parent, text="正则替换设置", padding="15")
+        regex_frame.grid(row=row, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        regex_frame.columnconfigure(0, weight=1)
+
+        # 输入区域
+        input_frame = ttk.Frame(regex_frame)
+        input_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        input_frame.columnconfigure(1, weight=1)
+        input_frame.columnconfigure(3, weight=1)
+
+        ttk.Label(input_frame, text="正则:", font=("Arial", 10, "bold")).grid(row=0, column=0, sticky=tk.W, padx=(0, 8))
+        self.pattern_entry = ttk.Entry(input_frame, width=22, font=("Consolas", 11))
+        self.pattern_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 15))
+
+        ttk.Label(input_frame, text="替换为:", font=("Arial", 10, "bold")).grid(row=0, column=2, sticky=tk.W, padx=(0, 8))
+        self.replacement_entry = ttk.Entry(input_frame, width=22, font=("Consolas", 11))
+        self.replacement_entry.grid(row=0, column=3, sticky=(tk.W, tk.E), padx=(0, 15))
+
+        button_frame = ttk.Frame(input_frame)
+        button_frame.grid(row=0, column=4, padx=(15, 0))
+
+        for column, (text, command) in enumerate((("添加", self.add_rule), ("修改", self.update_rule),
+                                                  ("删除", self.delete_rule), ("上移", lambda: self.move_rule(-1)),
+                                                  ("下移", lambda: self.move_rule(1)))):
+            ttk.Button(button_frame, text=text, command=command, width=5,
+                       style="Mapping.TButton").grid(row=0, column=column, padx=(0, 8))
+
+        # 规则列表
+        list_frame = ttk.Frame(regex_frame)
+        list_frame.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        list_frame.columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(list_frame, columns=("pattern", "replacement"), show="headings", height=3)
+        self.tree.heading("pattern", text="正则")
+        self.tree.heading("replacement", text="替换为")
+        self.tree.column("pattern", width=250)
+        self.tree.column("replacement", width=250)
+
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        # 双击把规则填入输入框，修改后点“修改”
+        self.tree.bind("<Double-1>", self.on_double_click)
+
+        info_label = ttk.Label(regex_frame,
+                               text="说明：在映射替换之后按顺序应用，替换内容可用 \\1、\\g<name> 引用捕获分组。",
+                               font=("Arial", 9), foreground="gray")
+        info_label.grid(row=2, column=0, pady=(10, 0))
+
+    def _read_entries(self):
+        """读取并检查输入框中的规则，无效时返回 None"""
+        pattern = self.pattern_entry.get()
+        replacement = self.replacement_entry.get()
+        if not pattern:
+            messagebox.showerror("错误", "请输入正则表达式！")
+            return None
+        try:
+            compile_regex_rule(pattern, replacement)
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return None
+        return pattern, replacement
+
+    def _selected_index(self):
+        selection = self.tree.selection()
+        return self.tree.index(selection[0]) if selection else None
+
+    def _refresh_tree(self, select=None):
+        """按规则列表重建表格（规则通常只有几条）"""
+        self.tree.delete(*self.tree.get_children())
+        for index, (pattern, replacement) in enumerate(self.rules):
+            iid = self.tree.insert("", tk.END, values=(pattern, replacement))
+            if index == select:
+                self.tree.selection_set(iid)
+
+    def add_rule(self):
+        """添加规则"""
+        rule = self._read_entries()
+        if rule is None:
+            return
+        self.rules.append(rule)
+        self._refresh_tree()
+        self.pattern_entry.delete(0, tk.END)
+        self.replacement_entry.delete(0, tk.END)
+
+    def update_rule(self):
+        """用输入框中的内容替换选中的规则"""
+        index = self._selected_index()
+        if index is None:
+            messagebox.showwarning("警告", "请选择要修改的规则！")
+            return
+        rule = self._read_entries()
+        if rule is None:
+            return
+        self.rules[index] = rule
+        self._refresh_tree(index)
+
+    def delete_rule(self):
+        """删除选中的规则"""
+        index = self._selected_index()
+        if index is None:
+            messagebox.showwarning("警告", "请选择要删除的规则！")
+            return
+        del self.rules[index]
+        self._refresh_tree()
+
+    def move_rule(self, offset: int):
+        """上移或下移选中的规则"""
+        index = self._selected_index()
+        if index is None or not 0 <= index + offset < len(self.rules):
+            return
+        rules = self.rules
+        rules[index], rules[index + offset] = rules[index + offset], rules[index]
+        self._refresh_tree(index + offset)
+
+    def on_double_click(self, event):
+        """双击把规则填入输入框"""
+        index = self._selected_index()
+        if index is None:
+            return
+        pattern, replacement = self.rules[index]
+        self.pattern_entry.delete(0, tk.END)
+        self.pattern_entry.insert(0, pattern)
+        self.replacement_entry.delete(0, tk.END)
+        self.replacement_entry.insert(0, replacement)
+
+    def get_rules(self) -> List[Dict[str, str]]:
+        """获取规则列表（配置中的格式）"""
+        return [{"pattern": pattern, "replacement": replacement} for pattern, replacement in self.rules]
+
+    def set_rules(self, rules):
+        """设置规则列表"""
+        self.rules = normalize_regex_rules(rules)
+        self._refresh_tree()
@@ -5,20 +5,44 @@
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import itertools
 import os
-from typing import Dict, Any
+import queue
+import threading
+from typing import Dict, Any, List
 from .components.mapping_widget import MappingListWidget
+from .components.regex_widget import RegexRuleListWidget
+from .components.preview_table import PreviewTable
 from models.config_manager import ConfigManager
+from models.config_library import ConfigLibrary
+from utils.scanner import list_files
+from gui.log_sink import BufferedLogSink
+from core.backup import format_size
+from core.rename_worker import (EVENT_PROGRESS, EVENT_RESULT, EVENT_DONE, EVENT_STATUS,
+                                RESULT_RENAMED, RESULT_UNCHANGED, RESULT_EXISTS)
 
 
 class MainWindow:
     """主窗口类"""
     
+    # 后台任务事件队列的轮询间隔（毫秒）和每次最多处理的事件数
+    worker_poll_interval = 50
+    worker_events_per_poll = 2000
+    
+    # 性能统计面板展开时的刷新间隔（毫秒）
+    stats_refresh_interval = 500
+    
+    # 保存对话框中最多预览的映射条数
+    save_preview_mappings = 200
+    
+    # 映射达到该数量时默认保存为紧凑格式
+    compact_config_threshold = 100000
+    
     def __init__(self, controller):
         self.controller = controller
         self.root = tk.Tk()
         self.root.title("文件重命名工具 - 支持映射替换")
-        self.root.geometry("900x900")
+        self.root.geometry("900x1000")
         self.root.resizable(True, True)
         
         # 当前工作路径
@@ -33,6 +57,20 @@ class MainWindow:
         # 配置管理器
         self.config_manager = ConfigManager()
         
+        # 配置库索引，打开配置管理器时创建
+        self.config_library = None
+        
+        # 配置中的设置项（保留界面上未展示的设置）
+        self.settings = dict(self.config_manager.default_config["settings"])
+        self.sequential_mappings = tk.BooleanVar(value=self.settings["sequential_mappings"])
+        self.include_subfolders = tk.BooleanVar(value=self.settings["include_subfolders"])
+        self.backup_original = tk.BooleanVar(value=self.settings["backup_original"])
+        self.case_sensitive = tk.BooleanVar(value=self.settings["case_sensitive"])
+        
+        # 控制器的各阶段统计，由 bind_stats 设置
+        self.stats = None
+        self._stats_after_id = None
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -72,8 +110,14 @@ class MainWindow:
         # 重命名设置区域
         self.create_rename_section(main_frame, 2)
         
+        # 重命名预览区域
+        self.create_preview_section(main_frame, 3)
+        
         # 状态显示区域
-        self.create_status_section(main_frame, 3)
+        self.create_status_section(main_frame, 4)
+        
+        # 性能统计区域
+        self.create_stats_section(main_frame, 5)
         
         # 初始状态信息
         self.update_status("欢迎使用文件重命名工具！\n")
@@ -147,12 +191,33 @@ class MainWindow:
                                      font=("Arial", 8), foreground="gray")
         delete_help_label.grid(row=1, column=4, columnspan=2, sticky=tk.W, pady=(2, 0))
         
+        # 映射替换模式
+        sequential_check = ttk.Checkbutton(prefix_suffix_frame, 
+                                           text="映射按顺序逐条替换（兼容旧版，替换结果可被后续规则再次替换）",
+                                           variable=self.sequential_mappings)
+        sequential_check.grid(row=1, column=0, columnspan=4, sticky=tk.W, pady=(2, 0))
+        
+        subfolders_check = ttk.Checkbutton(prefix_suffix_frame, text="包含子文件夹",
+                                           variable=self.include_subfolders)
+        subfolders_check.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(2, 0))
+        
+        backup_check = ttk.Checkbutton(prefix_suffix_frame, text="重命名前备份原文件",
+                                       variable=self.backup_original)
+        backup_check.grid(row=2, column=2, columnspan=2, sticky=tk.W, pady=(2, 0))
+        
+        case_check = ttk.Checkbutton(prefix_suffix_frame, text="映射和删除字符区分大小写",
+                                     variable=self.case_sensitive)
+        case_check.grid(row=2, column=4, columnspan=2, sticky=tk.W, pady=(2, 0))
+        
         # 映射列表组件
         self.mapping_widget = MappingListWidget(rename_frame)
         
+        # 正则规则列表组件
+        self.regex_widget = RegexRuleListWidget(rename_frame, row=2)
+        
         # 重命名按钮区域
         button_frame = ttk.Frame(rename_frame)
-        button_frame.grid(row=2, column=0, columnspan=3, pady=(20, 0))
+        button_frame.grid(row=3, column=0, columnspan=3, pady=(20, 0))
         
         # 按钮样式
         button_style = ttk.Style()
@@ -164,7 +229,42 @@ class MainWindow:
         
         execute_btn = ttk.Button(button_frame, text="执行重命名", 
                                 command=self.execute_rename, style="Action.TButton")
-        execute_btn.pack(side=tk.LEFT)
+        execute_btn.pack(side=tk.LEFT, padx=(0, 15))
+        
+        undo_btn = ttk.Button(button_frame, text="撤销上次重命名", 
+                             command=self.undo_rename)
+        undo_btn.pack(side=tk.LEFT, padx=(0, 15))
+        
+        resume_btn = ttk.Button(button_frame, text="继续中断的重命名", 
+                               command=self.resume_rename)
+        resume_btn.pack(side=tk.LEFT, padx=(0, 15))
+        
+        self.cancel_btn = ttk.Button(button_frame, text="取消", 
+                                     command=self.cancel_rename, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.LEFT)
+        
+        # 执行进度
+        progress_frame = ttk.Frame(rename_frame)
+        progress_frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        progress_frame.columnconfigure(0, weight=1)
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+        self.progress_bar.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+        
+        self.progress_label = ttk.Label(progress_frame, text="", width=32, 
+                                        font=("Consolas", 9), foreground="gray")
+        self.progress_label.grid(row=0, column=1, sticky=tk.E)
+    
+    def create_preview_section(self, parent, row):
+        """创建重命名预览区域"""
+        preview_frame = ttk.LabelFrame(parent, text="重命名预览", padding="15")
+        preview_frame.grid(row=row, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), 
+                          pady=(10, 0))
+        preview_frame.columnconfigure(0, weight=1)
+        preview_frame.rowconfigure(0, weight=1)
+        
+        self.preview_table = PreviewTable(preview_frame, rows=10)
+        self.preview_table.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
     
     def create_status_section(self, parent, row):
         """创建状态显示区域"""
@@ -175,7 +275,7 @@ class MainWindow:
         status_frame.rowconfigure(0, weight=1)
         
         # 状态文本框
-        self.status_text = tk.Text(status_frame, height=12, wrap=tk.WORD, 
+        self.status_text = tk.Text(status_frame, height=8, wrap=tk.WORD, 
                                   font=("Consolas", 10))
         scrollbar = ttk.Scrollbar(status_frame, orient=tk.VERTICAL, 
                                  command=self.status_text.yview)
@@ -183,6 +283,63 @@ class MainWindow:
         
         self.status_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        # 状态消息先进入缓冲区，定时批量写入文本框
+        self.log_sink = BufferedLogSink(self.root, self.status_text)
+    
+    def create_stats_section(self, parent, row):
+        """创建可折叠的性能统计区域，默认折叠"""
+        stats_frame = ttk.Frame(parent)
+        stats_frame.grid(row=row, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        stats_frame.columnconfigure(0, weight=1)
+        
+        self.stats_toggle = ttk.Button(stats_frame, text="▶ 性能统计", 
+                                       command=self.toggle_stats_panel)
+        self.stats_toggle.grid(row=0, column=0, sticky=tk.W)
+        
+        self.stats_tree = ttk.Treeview(stats_frame, columns=("seconds", "calls", "entries", "bytes"),
+                                       height=10, selectmode="none")
+        self.stats_tree.heading("#0", text="阶段")
+        self.stats_tree.heading("seconds", text="耗时")
+        self.stats_tree.heading("calls", text="调用次数")
+        self.stats_tree.heading("entries", text="条目数")
+        self.stats_tree.heading("bytes", text="字节数")
+        self.stats_tree.column("#0", width=160)
+        for column in ("seconds", "calls", "entries", "bytes"):
+            self.stats_tree.column(column, width=120, anchor=tk.E)
+    
+    def bind_stats(self, stats):
+        """设置性能统计面板显示的统计对象，状态信息的写入也记入其中"""
+        self.stats = stats
+        self.log_sink.stats = stats
+    
+    def toggle_stats_panel(self):
+        """展开或折叠性能统计面板"""
+        if self.stats_tree.winfo_manager():
+            self.stats_tree.grid_remove()
+            self.stats_toggle.configure(text="▶ 性能统计")
+            if self._stats_after_id is not None:
+                self.root.after_cancel(self._stats_after_id)
+                self._stats_after_id = None
+        else:
+            self.stats_tree.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+            self.stats_toggle.configure(text="▼ 性能统计")
+            self.refresh_stats_panel()
+    
+    def refresh_stats_panel(self):
+        """刷新性能统计面板，展开期间定时刷新"""
+        self._stats_after_id = None
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        if self.stats is not None:
+            stages = self.stats.stages()
+            for stage in stages:
+                self.stats_tree.insert("", tk.END, text=stage.label, values=(
+                    f"{stage.seconds * 1000:.1f} ms", stage.calls, stage.entries,
+                    format_size(stage.bytes) if stage.bytes else ""))
+            if stages:
+                self.stats_tree.insert("", tk.END, text="合计", values=(
+                    f"{sum(stage.seconds for stage in stages) * 1000:.1f} ms", "", "", ""))
+        self._stats_after_id = self.root.after(self.stats_refresh_interval, self.refresh_stats_panel)
     
     def browse_folder(self):
         """浏览文件夹"""
@@ -213,7 +370,7 @@ class MainWindow:
             
         # 获取文件夹中的文件信息
         try:
-            files = [f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))]
+            files = list_files(path)
             self.update_status(f"路径确认成功！\n")
             self.update_status(f"文件夹: {path}\n")
             self.update_status(f"包含 {len(files)} 个文件\n")
@@ -238,11 +395,83 @@ class MainWindow:
         """执行重命名"""
         self.controller.execute_rename()
     
+    def undo_rename(self):
+        """撤销上次重命名"""
+        self.controller.undo_rename()
+    
+    def resume_rename(self):
+        """继续中断的重命名"""
+        self.controller.resume_rename()
+    
+    def cancel_rename(self):
+        """取消重命名"""
+        self.controller.cancel_rename()
+    
+    def watch_rename_worker(self, worker):
+        """开始轮询后台重命名线程的事件队列"""
+        self.progress_bar.configure(value=0, maximum=1)
+        self.progress_label.configure(text="准备中...")
+        self.cancel_btn.configure(state=tk.NORMAL)
+        self.root.after(self.worker_poll_interval, self._poll_rename_worker, worker)
+    
+    def _poll_rename_worker(self, worker):
+        """处理后台线程发来的事件"""
+        finished = False
+        try:
+            for _ in range(self.worker_events_per_poll):
+                event = worker.events.get_nowait()
+                if event[0] == EVENT_DONE:
+                    self._on_rename_done(*event[1:])
+                    finished = True
+                    break
+                elif event[0] == EVENT_PROGRESS:
+                    self._on_rename_progress(*event[1:])
+                elif event[0] == EVENT_RESULT:
+                    self._on_rename_result(*event[1:])
+                elif event[0] == EVENT_STATUS:
+                    self.update_status(event[1] + "\n")
+        except queue.Empty:
+            pass
+        
+        if not finished:
+            self.root.after(self.worker_poll_interval, self._poll_rename_worker, worker)
+    
+    def _on_rename_progress(self, done: int, total: int, elapsed: float):
+        """更新进度条和速率"""
+        self.progress_bar.configure(value=done, maximum=max(total, 1))
+        rate = done / elapsed if elapsed > 0 else 0.0
+        self.progress_label.configure(text=f"{done}/{total}  {rate:.0f} 文件/秒")
+        if total == 0:
+            self.update_status("警告：该文件夹中没有文件！\n")
+    
+    def _on_rename_result(self, file: str, new_name: str, result: str, error: str):
+        """显示单个文件的处理结果"""
+        if result == RESULT_RENAMED:
+            self.update_status(f"重命名: {file} -> {new_name}\n")
+        elif result == RESULT_UNCHANGED:
+            self.update_status(f"跳过: {file} (无变化)\n")
+        elif result == RESULT_EXISTS:
+            self.update_status(f"跳过: {file} -> {new_name} (文件已存在)\n")
+        else:
+            self.update_status(f"失败: {file} -> {new_name} (错误: {error})\n")
+    
+    def _on_rename_done(self, renamed_count: int, cancelled: bool, error: str):
+        """重命名结束"""
+        self.cancel_btn.configure(state=tk.DISABLED)
+        if error:
+            self.update_status(f"重命名操作失败: {error}\n")
+        elif cancelled:
+            self.update_status(f"\n重命名已取消！已成功重命名 {renamed_count} 个文件\n")
+        else:
+            self.update_status(f"\n重命名完成！成功重命名 {renamed_count} 个文件\n")
+    
+    def show_plan(self, plan):
+        """在预览表格中显示重命名计划"""
+        self.preview_table.set_plan(plan)
+    
     def update_status(self, message):
         """更新状态信息"""
-        self.status_text.insert(tk.END, message)
-        self.status_text.see(tk.END)
-        self.root.update_idletasks()
+        self.log_sink.write(message)
     
     def get_current_path(self) -> str:
         """获取当前路径"""
@@ -264,6 +493,19 @@ class MainWindow:
         """获取映射字典"""
         return self.mapping_widget.get_mappings()
     
+    def get_regex_rules(self) -> List[Dict[str, str]]:
+        """获取正则规则列表"""
+        return self.regex_widget.get_rules()
+    
+    def get_settings(self) -> Dict[str, Any]:
+        """获取设置项"""
+        settings = dict(self.settings)
+        settings["sequential_mappings"] = self.sequential_mappings.get()
+        settings["include_subfolders"] = self.include_subfolders.get()
+        settings["backup_original"] = self.backup_original.get()
+        settings["case_sensitive"] = self.case_sensitive.get()
+        return settings
+    
     def save_config(self):
         """保存当前配置"""
         # 获取当前配置信息
@@ -272,19 +514,23 @@ class MainWindow:
         suffix = self.get_suffix()
         delete_chars = self.get_delete_chars()
         mappings = self.get_mappings()
+        settings = self.get_settings()
+        regex_rules = self.get_regex_rules()
         
         if not work_path:
             messagebox.showerror("错误", "请先设置工作路径！")
             return
         
         # 创建保存配置对话框
-        self.show_save_config_dialog(work_path, prefix, suffix, delete_chars, mappings)
+        self.show_save_config_dialog(work_path, prefix, suffix, delete_chars, mappings, settings, regex_rules)
     
-    def show_save_config_dialog(self, work_path: str, prefix: str, suffix: str, delete_chars: str, mappings: Dict[str, str]):
+    def show_save_config_dialog(self, work_path: str, prefix: str, suffix: str, delete_chars: str,
+                                mappings: Dict[str, str], settings: Dict[str, Any] = None,
+                                regex_rules: List[Dict[str, str]] = None):
         """显示保存配置对话框"""
         dialog = tk.Toplevel(self.root)
         dialog.title("保存工作配置")
-        dialog.geometry("500x300")
+        dialog.geometry("500x330")
         dialog.resizable(False, False)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -320,19 +566,32 @@ class MainWindow:
 前缀: {prefix or '(无)'}
 后缀: {suffix or '(无)'}
 删除字符: {delete_chars or '(无)'}
-映射规则: {len(mappings)} 条"""
+映射规则: {len(mappings)} 条
+正则规则: {len(regex_rules or [])} 条"""
         
         if mappings:
             preview_content += "\n\n映射详情:"
-            for key, value in mappings.items():
-                preview_content += f"\n  '{key}' -> '{value}'"
+            details = [f"\n  '{key}' -> '{value}'"
+                       for key, value in itertools.islice(mappings.items(), self.save_preview_mappings)]
+            preview_content += "".join(details)
+            if len(mappings) > self.save_preview_mappings:
+                preview_content += f"\n  ... 还有 {len(mappings) - self.save_preview_mappings} 条"
+        
+        if regex_rules:
+            preview_content += "\n\n正则详情:"
+            preview_content += "".join(f"\n  /{rule['pattern']}/ -> '{rule['replacement']}'" for rule in regex_rules)
         
         preview_text.insert(tk.END, preview_content)
         preview_text.config(state=tk.DISABLED)
         
+        # 映射很多时默认使用紧凑格式
+        compact_var = tk.BooleanVar(value=len(mappings) >= self.compact_config_threshold)
+        ttk.Checkbutton(frame, text="紧凑格式（SQLite，适合大量映射）", 
+                        variable=compact_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
         # 按钮
         button_frame = ttk.Frame(frame)
-        button_frame.grid(row=3, column=0, columnspan=2, pady=(20, 0))
+        button_frame.grid(row=4, column=0, columnspan=2, pady=(20, 0))
         
         def save_config_file():
             name = name_var.get().strip()
@@ -359,11 +618,15 @@ class MainWindow:
                     delete_chars=delete_chars,
                     mappings=mappings,
                     name=name,
-                    description=description
+                    description=description,
+                    settings=settings,
+                    regex_rules=regex_rules
                 )
                 
                 # 保存配置
-                if self.config_manager.save_config(config, file_path):
+                if self.config_manager.save_config(config, file_path, compact=compact_var.get()):
+                    if self.config_library is not None:
+                        self.config_library.update_file(file_path)
                     messagebox.showinfo("成功", f"配置已保存到:\n{file_path}")
                     dialog.destroy()
                 else:
@@ -403,6 +666,20 @@ class MainWindow:
         if hasattr(self, 'mapping_widget'):
             self.mapping_widget.set_mappings(mappings)
         
+        # 应用正则规则
+        regex_rules = config.get("regex_rules", [])
+        if hasattr(self, 'regex_widget'):
+            self.regex_widget.set_rules(regex_rules)
+        
+        # 应用设置项
+        settings = config.get("settings", {})
+        if isinstance(settings, dict):
+            self.settings.update(settings)
+        self.sequential_mappings.set(bool(self.settings.get("sequential_mappings", False)))
+        self.include_subfolders.set(bool(self.settings.get("include_subfolders", False)))
+        self.backup_original.set(bool(self.settings.get("backup_original", False)))
+        self.case_sensitive.set(bool(self.settings.get("case_sensitive", True)))
+        
         # 显示配置加载信息
         config_name = config.get("name", "未命名配置")
         version = config.get("version", "未知版本")
@@ -420,12 +697,22 @@ class MainWindow:
         self.update_status(f"后缀: {config.get('suffix', '')}\n")
         self.update_status(f"删除字符: {config.get('delete_chars', '')}\n")
         self.update_status(f"映射规则: {len(mappings)} 条\n")
+        if regex_rules:
+            self.update_status(f"正则规则: {len(regex_rules)} 条\n")
+    
+    def get_config_library(self) -> ConfigLibrary:
+        """配置库索引，首次使用时读取缓存"""
+        if self.config_library is None:
+            self.config_library = ConfigLibrary(self.config_manager)
+        return self.config_library
     
     def show_config_manager(self):
-        """显示配置管理器"""
+        """显示配置管理器 - 从配置库索引中列出、搜索和预览配置"""
+        library = self.get_config_library()
+        
         dialog = tk.Toplevel(self.root)
         dialog.title("配置管理器")
-        dialog.geometry("600x400")
+        dialog.geometry("760x560")
         dialog.resizable(True, True)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -441,22 +728,51 @@ class MainWindow:
         
         # 说明文字
         info_label = ttk.Label(frame, 
-                              text="选择配置文件进行加载，或查看配置详情",
+                              text="添加存放配置的目录后，可在下方列表中搜索、查看并加载配置",
                               font=("Arial", 10))
         info_label.pack(pady=(0, 10))
         
-        # 文件选择区域
+        # 文件选择和搜索区域
         file_frame = ttk.Frame(frame)
         file_frame.pack(fill=tk.X, pady=(0, 10))
         
+        ttk.Button(file_frame, text="添加目录", 
+                  command=lambda: self.add_config_directory(dialog)).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(file_frame, text="刷新索引", 
+                  command=lambda: self.refresh_config_library(dialog)).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(file_frame, text="选择配置文件", 
                   command=lambda: self.select_config_file(dialog)).pack(side=tk.LEFT, padx=(0, 10))
         
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(file_frame, textvariable=search_var, width=24)
+        search_entry.pack(side=tk.RIGHT)
+        ttk.Label(file_frame, text="搜索:").pack(side=tk.RIGHT, padx=(0, 5))
+        
+        # 配置列表
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        
+        config_tree = ttk.Treeview(list_frame, columns=("mappings", "updated_at", "path"),
+                                   height=8, selectmode="browse")
+        config_tree.heading("#0", text="配置名称")
+        config_tree.heading("mappings", text="映射数")
+        config_tree.heading("updated_at", text="更新时间")
+        config_tree.heading("path", text="文件")
+        config_tree.column("#0", width=160)
+        config_tree.column("mappings", width=70, anchor=tk.E)
+        config_tree.column("updated_at", width=150)
+        config_tree.column("path", width=320)
+        tree_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=config_tree.yview)
+        config_tree.configure(yscrollcommand=tree_scrollbar.set)
+        
+        config_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
         # 配置详情显示区域
         detail_frame = ttk.LabelFrame(frame, text="配置详情", padding="10")
-        detail_frame.pack(fill=tk.BOTH, expand=True)
+        detail_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
         
-        detail_text = tk.Text(detail_frame, wrap=tk.WORD, font=("Consolas", 9))
+        detail_text = tk.Text(detail_frame, wrap=tk.WORD, font=("Consolas", 9), height=10)
         scrollbar = ttk.Scrollbar(detail_frame, orient=tk.VERTICAL, command=detail_text.yview)
         detail_text.configure(yscrollcommand=scrollbar.set)
         
@@ -467,17 +783,104 @@ class MainWindow:
         button_frame = ttk.Frame(frame)
         button_frame.pack(fill=tk.X, pady=(10, 0))
         
+        status_label = ttk.Label(button_frame, text="", foreground="gray")
+        
+        def on_select(event):
+            selection = config_tree.selection()
+            if not selection:
+                return
+            entry = library.entries.get(selection[0])
+            if entry is None:
+                return
+            dialog.selected_path = entry.path
+            detail_text.delete("1.0", tk.END)
+            detail_text.insert("1.0", entry.summary())
+        
         def load_selected_config():
-            # 这里可以实现加载选中配置的逻辑
-            pass
+            if not dialog.selected_path:
+                messagebox.showwarning("警告", "请先选择配置！", parent=dialog)
+                return
+            config = self.config_manager.load_config(dialog.selected_path)
+            if config:
+                self.apply_config(config)
+                dialog.destroy()
+                messagebox.showinfo("成功", f"配置已加载:\n{config.get('name', '未命名配置')}")
+            else:
+                messagebox.showerror("错误", "加载配置文件失败！", parent=dialog)
+        
+        config_tree.bind("<<TreeviewSelect>>", on_select)
+        config_tree.bind("<Double-1>", lambda event: load_selected_config())
+        search_var.trace_add("write", lambda *args: self.fill_config_list(dialog))
         
         ttk.Button(button_frame, text="加载配置", 
                   command=load_selected_config).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(button_frame, text="关闭", 
                   command=dialog.destroy).pack(side=tk.LEFT)
+        status_label.pack(side=tk.RIGHT)
         
         # 存储对话框引用以便其他方法使用
         dialog.detail_text = detail_text
+        dialog.config_tree = config_tree
+        dialog.search_var = search_var
+        dialog.status_label = status_label
+        dialog.selected_path = None
+        dialog.refresh_thread = None
+        
+        # 对话框关闭后，后台的索引刷新随之放弃
+        dialog.closed = threading.Event()
+        dialog.bind("<Destroy>", lambda event: dialog.closed.set() if event.widget is dialog else None)
+        
+        self.fill_config_list(dialog)
+        if library.directories:
+            self.refresh_config_library(dialog)
+        search_entry.focus_set()
+    
+    def fill_config_list(self, dialog):
+        """按搜索内容填充配置列表，只使用配置库索引中的信息"""
+        library = self.get_config_library()
+        tree = dialog.config_tree
+        tree.delete(*tree.get_children())
+        entries = library.search(dialog.search_var.get())
+        for entry in entries:
+            mappings = "错误" if entry.error else entry.mapping_count
+            tree.insert("", tk.END, iid=entry.path, text=entry.name,
+                        values=(mappings, entry.info.get("updated_at", "")[:19], entry.path))
+        dialog.status_label.configure(
+            text=f"共 {len(library.entries)} 个配置，显示 {len(entries)} 个")
+    
+    def add_config_directory(self, dialog):
+        """把目录加入配置库并刷新索引"""
+        directory = filedialog.askdirectory(title="选择存放配置的目录", parent=dialog)
+        if directory and self.get_config_library().add_directory(directory):
+            self.refresh_config_library(dialog)
+    
+    def refresh_config_library(self, dialog):
+        """在后台线程中刷新配置库索引，完成后重新填充列表"""
+        if dialog.refresh_thread is not None and dialog.refresh_thread.is_alive():
+            return
+        library = self.get_config_library()
+        result = {}
+        
+        def refresh():
+            try:
+                result["parsed"] = library.refresh(dialog.closed.is_set)
+            except Exception as e:
+                result["error"] = str(e)
+        
+        def poll():
+            if dialog.closed.is_set():
+                return
+            if dialog.refresh_thread.is_alive():
+                dialog.after(100, poll)
+                return
+            self.fill_config_list(dialog)
+            if "error" in result:
+                dialog.status_label.configure(text=f"刷新索引失败: {result['error']}")
+        
+        dialog.status_label.configure(text="正在刷新索引...")
+        dialog.refresh_thread = threading.Thread(target=refresh, daemon=True)
+        dialog.refresh_thread.start()
+        dialog.after(100, poll)
     
     def select_config_file(self, dialog):
         """选择配置文件并显示详情"""
@@ -493,9 +896,11 @@ class MainWindow:
                 summary = self.config_manager.export_config_summary(config)
                 dialog.detail_text.delete("1.0", tk.END)
                 dialog.detail_text.insert("1.0", summary)
+                dialog.selected_path = file_path
             else:
                 dialog.detail_text.delete("1.0", tk.END)
                 dialog.detail_text.insert("1.0", "加载配置文件失败！")
+                dialog.selected_path = None
     
     def get_timestamp(self):
         """获取当前时间戳"""